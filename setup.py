@@ -90,6 +90,7 @@ DEPS = [
 ]
 if PY2:
     DEPS += [
+        'futures',
         'subprocess32',
     ]
 
@@ -1,4 +1,4 @@
-from simpleflow.exceptions import AggregateException
+from simpleflow.exceptions import AggregateException, ExecutionBlocked
 from simpleflow.utils import issubclass_
 from . import futures
 from .activity import Activity
@@ -121,6 +121,16 @@ class Group(SubmittableContainer):
 
 
 class GroupFuture(futures.Future):
+    """
+    Future of a Group.
+
+    The states of the underlying futures are known once they're submitted,
+    so they're tallied as they come: building and syncing a group is linear
+    in its number of activities.
+
+    Futures of the local executor may run concurrently: waiting for the
+    group blocks on them and submits the remaining activities.
+    """
 
     def __init__(self, activities, workflow, max_parallel=None, bubbles_exception_on_failure=True):
         super(GroupFuture, self).__init__()
@@ -129,28 +139,102 @@ class GroupFuture(futures.Future):
         self.workflow = workflow
         self.max_parallel = max_parallel
         self.bubbles_exception_on_failure = bubbles_exception_on_failure
+        self._reset_counters()
+        self._nb_waited = 0
 
-        for a in self.activities:
-            if not self.max_parallel or self._count_pending_or_running < self.max_parallel:
-                future = workflow.submit(a)
-                self.futures.append(future)
-                if self._count_pending_or_running == self.max_parallel:
-                    break
-
+        self._submit_activities()
         self.sync_state()
         self.sync_result()
 
+    def _submit_activities(self):
+        for a in self.activities[len(self.futures):]:
+            if self.max_parallel and self._count_pending_or_running >= self.max_parallel:
+                break
+            self._add_future(self.workflow.submit(a))
+
+    def _reset_counters(self):
+        self.nb_pending = 0
+        self.nb_running = 0
+        self.nb_finished = 0
+        self.nb_cancelled = 0
+        self.nb_failed = 0
+        self._tallies = []
+
+    def _add_future(self, future):
+        """
+        Append a submitted future and account for its state.
+        :param future:
+        :type future: futures.Future
+        """
+        self.futures.append(future)
+        self._tallies.append(self._tally(future))
+
+    def _tally(self, future):
+        """
+        Account for the state of a future.
+        :return: names of the updated counters.
+        :rtype: tuple[str]
+        """
+        if future.finished:
+            self.nb_finished += 1
+            if future.exception:
+                self.nb_failed += 1
+                return 'nb_finished', 'nb_failed'
+            return 'nb_finished',
+        elif future.running:
+            self.nb_running += 1
+            return 'nb_running',
+        elif future.cancelled:
+            self.nb_cancelled += 1
+            return 'nb_cancelled',
+        elif future.pending:
+            self.nb_pending += 1
+            return 'nb_pending',
+        return ()
+
+    def _update_tally(self, index):
+        """
+        Account for the new state of a future which may have changed since
+        its submission.
+        """
+        for name in self._tallies[index]:
+            setattr(self, name, getattr(self, name) - 1)
+        self._tallies[index] = self._tally(self.futures[index])
+
+    def wait(self):
+        """
+        Wait for the submitted futures and submit the remaining activities.
+        Raises ExecutionBlocked as soon as a future can't be waited for
+        (SWF executor).
+        """
+        try:
+            while not self.done:
+                nb_futures = len(self.futures)
+                for index in range(self._nb_waited, nb_futures):
+                    future = self.futures[index]
+                    if not future.done:
+                        future.wait()
+                    self._update_tally(index)
+                self._nb_waited = nb_futures
+                self._submit_activities()
+                self.sync_state()
+                if not self.done and len(self.futures) == nb_futures:
+                    raise ExecutionBlocked()
+        finally:
+            self.sync_result()
+        return self._result
+
     def sync_state(self):
-        if all(a.finished for a in self.futures) and self._futures_contain_all_activities:
+        if self.nb_finished == len(self.futures) and self._futures_contain_all_activities:
             self._state = futures.FINISHED
-        elif any(a.cancelled for a in self.futures):
+        elif self.nb_cancelled:
             self._state = futures.CANCELLED
-        elif any(a.running for a in self.futures):
+        elif self.nb_running:
             self._state = futures.RUNNING
 
     @property
     def _count_pending_or_running(self):
-        return len([True for f in self.futures if f.pending or f.running])
+        return self.nb_pending + self.nb_running
 
     @property
     def _futures_contain_all_activities(self):
@@ -163,18 +247,16 @@ class GroupFuture(futures.Future):
             if future.finished:
                 self._result.append(future.result)
                 if self.bubbles_exception_on_failure is not False:
-                    exception = future.exception
-                    exceptions.append(exception)
+                    exceptions.append(future.exception)
             else:
                 self._result.append(None)
                 exceptions.append(None)
-        if any(ex for ex in exceptions):
+        if self.nb_failed and self.bubbles_exception_on_failure is not False:
             self._exception = AggregateException(exceptions)
 
     @property
     def count_finished_activities(self):
-        return sum(1 if a.finished else 0
-                   for a in self.futures)
+        return self.nb_finished
 
     def __repr__(self):
         return '<{} at {:#x}, state={state}, exception={exception}, activities={activities}, futures={futures}>'.format(
@@ -228,12 +310,32 @@ class ChainFuture(GroupFuture):
         self._state = futures.PENDING
         self._result = None
         self._exception = None
+        self.send_result = send_result
+        self.break_on_failure = break_on_failure
         self.futures = []
         self._has_failed = False
+        self._reset_counters()
+        self._nb_waited = 0
+
+        self._submit_activities()
+        self.sync_state()
+        self.sync_result()
 
+    def _submit_activities(self):
         previous_result = None
-        for i, a in enumerate(self.activities):
-            if send_result and i > 0:
+        if self.futures:
+            # Resume after the last submitted activity
+            future = self.futures[-1]
+            if not future.finished or self._has_failed:
+                return
+            if future.exception and self.break_on_failure:
+                self._has_failed = True
+                return
+            previous_result = future.result
+
+        for i in range(len(self.futures), len(self.activities)):
+            a = self.activities[i]
+            if self.send_result and i > 0:
                 if isinstance(a, ActivityTask):
                     # ActivityTask.args is ignored when building swf.ActivityTask (#247)
                     args = a.args + [previous_result]
@@ -241,23 +343,20 @@ class ChainFuture(GroupFuture):
                 else:
                     a.args.append(previous_result)
 
-            future = workflow.submit(a)
-            self.futures.append(future)
+            future = self.workflow.submit(a)
+            self._add_future(future)
             if not future.finished:
                 break
-            if future.exception and break_on_failure:
+            if future.exception and self.break_on_failure:
                 # End this chain
                 self._has_failed = True
                 break
             previous_result = future.result
 
-        self.sync_state()
-        self.sync_result()
-
     def sync_state(self):
-        if all(a.finished for a in self.futures) and (self._futures_contain_all_activities or self._has_failed):
+        if self.nb_finished == len(self.futures) and (self._futures_contain_all_activities or self._has_failed):
             self._state = futures.FINISHED
-        elif any(a.cancelled for a in self.futures):
+        elif self.nb_cancelled:
             self._state = futures.CANCELLED
-        elif any(a.running for a in self.futures):
+        elif self.nb_running:
             self._state = futures.RUNNING
@@ -146,6 +146,15 @@ def transform_input(wf_input):
     return wf_input
 
 
+@click.option('--local-pool',
+              type=click.Choice(['process', 'thread']),
+              default='process',
+              required=False,
+              help='Pool running the activities with --local-workers.')
+@click.option('--local-workers',
+              type=int,
+              required=False,
+              help='Run activities concurrently in a pool of this size with --local.')
 @click.option('--local', default=False, is_flag=True,
               required=False,
               help='Run the workflow locally without calling Amazon SWF.')
@@ -186,7 +195,9 @@ def start_workflow(workflow,
                    decision_tasks_timeout,
                    input,
                    input_file,
-                   local):
+                   local,
+                   local_workers=None,
+                   local_pool='process'):
     workflow_class = get_workflow(workflow)
 
     wf_input = get_or_load_input(input_file, input)
@@ -194,7 +205,7 @@ def start_workflow(workflow,
     if local:
         from .local import Executor
 
-        Executor(workflow_class).run(wf_input)
+        Executor(workflow_class, max_workers=local_workers, pool_type=local_pool).run(wf_input)
 
         return
 
@@ -373,6 +384,25 @@ def task_info(ctx, domain, workflow_id, task_id, details):
     print(with_format(ctx)(helpers.get_task)(domain, workflow_id, task_id, details))
 
 
+@click.option('--prefetch-decisions',
+              type=int,
+              required=False,
+              default=0,
+              help='Number of decision tasks to poll while deciding (default=0: poll sequentially).')
+@click.option('--max-worker-memory',
+              type=int,
+              required=False,
+              help='Recycle warm decider processes using more than this memory (MB).')
+@click.option('--max-decisions-per-worker',
+              type=int,
+              required=False,
+              default=100,
+              help='Recycle warm decider processes after this many decisions (default=100).')
+@click.option('--warm-workers',
+              type=int,
+              required=False,
+              default=0,
+              help='Number of long-lived decider processes per poller (default=0: fork for each decision).')
 @click.option('--nb-processes', '-N', type=int)
 @click.option('--log-level', '-l')
 @click.option('--task-list')
@@ -382,7 +412,8 @@ def task_info(ctx, domain, workflow_id, task_id, details):
               help='SWF Domain')
 @click.argument('workflows', nargs=-1, required=True)
 @cli.command('decider.start', help='Start a decider process to manage workflow executions.')
-def start_decider(workflows, domain, task_list, log_level, nb_processes):
+def start_decider(workflows, domain, task_list, log_level, nb_processes,
+                  warm_workers, max_decisions_per_worker, max_worker_memory, prefetch_decisions):
     if log_level:
         logger.warning(
             "Deprecated: --log-level will be removed, use LOG_LEVEL environment variable instead"
@@ -393,9 +424,35 @@ def start_decider(workflows, domain, task_list, log_level, nb_processes):
         task_list,
         None,
         nb_processes,
+        warm_workers=warm_workers,
+        max_decisions_per_worker=max_decisions_per_worker,
+        max_worker_memory=max_worker_memory,
+        prefetch_decisions=prefetch_decisions,
     )
 
 
+@click.option('--heartbeat-fraction',
+              type=float,
+              required=False,
+              help="Heartbeat at this fraction (between 0 and 1) of the activity type's heartbeat timeout, "
+                   "with some jitter (--heartbeat is used for activity types without timeout).")
+@click.option('--preload',
+              type=comma_separated_list,
+              required=False,
+              help='Modules to import before starting the worker processes (comma separated).')
+@click.option('--max-tasks-per-executor',
+              type=int,
+              required=False,
+              default=100,
+              help='Recycle warm executor processes after this many tasks (default=100).')
+@click.option('--warm-executors',
+              is_flag=True,
+              help='Run tasks in long-lived processes, one per slot, instead of forking for each task.')
+@click.option('--slots',
+              type=int,
+              required=False,
+              default=1,
+              help='Number of tasks each worker process runs at once (default=1).')
 @click.option('--poll-data',
               help='Provide a base64 encoded json dump of the SWF poll response, instead of polling SWF',
               )
@@ -420,7 +477,8 @@ def start_decider(workflows, domain, task_list, log_level, nb_processes):
               required=True,
               help='SWF Domain')
 @cli.command('worker.start', help='Start a worker process to handle activity tasks.')
-def start_worker(domain, task_list, log_level, nb_processes, heartbeat, one_task, process_mode, poll_data):
+def start_worker(domain, task_list, log_level, nb_processes, heartbeat, one_task, process_mode, poll_data,
+                 slots, warm_executors, max_tasks_per_executor, preload, heartbeat_fraction):
     if log_level:
         logger.warning(
             "Deprecated: --log-level will be removed, use LOG_LEVEL environment variable instead"
@@ -442,6 +500,11 @@ def start_worker(domain, task_list, log_level, nb_processes, heartbeat, one_task
         one_task,
         process_mode,
         poll_data,
+        nb_slots=slots,
+        warm_executors=warm_executors,
+        max_tasks_per_executor=max_tasks_per_executor,
+        preload=preload,
+        heartbeat_fraction=heartbeat_fraction,
     )
 
 
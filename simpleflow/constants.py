@@ -23,7 +23,14 @@ MAX_LOG_FIELD = 500 * 1024  # 500kB
 
 # Jumbo fields
 JUMBO_FIELDS_PREFIX = "simpleflow+s3://"
-JUMBO_FIELDS_MAX_SIZE = 5 * 1024 ** 2  # 5MB
+JUMBO_FIELDS_MAX_SIZE = 5 * 1024 ** 2  # 5MB, as stored on S3
+# Compressed jumbo fields are stored as e.g. "simpleflow+s3+zlib://..."
+JUMBO_FIELDS_COMPRESSIONS = ("zlib", "lzma")
+JUMBO_FIELDS_COMPRESSED_PREFIX = "simpleflow+s3+{}://"
+JUMBO_FIELDS_PREFIXES = (JUMBO_FIELDS_PREFIX,) + tuple(
+    JUMBO_FIELDS_COMPRESSED_PREFIX.format(compression) for compression in JUMBO_FIELDS_COMPRESSIONS
+)
+JUMBO_FIELDS_MAX_UNCOMPRESSED_SIZE = 50 * 1024 ** 2  # 50MB
 
 # Cache directory
 CACHE_DIR = "/tmp/simpleflow-cache"
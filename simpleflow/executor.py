@@ -135,6 +135,17 @@ class Executor(object):
         """
         pass
 
+    def defer(self, callback):
+        """
+        Call `callback` when the current decision is closed, e.g. to submit
+        tasks batched during the replay. Executors without decisions call
+        it right away.
+
+        :param callback:
+        :type callback: callable
+        """
+        callback()
+
     def before_replay(self):
         pass
 
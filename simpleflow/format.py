@@ -1,16 +1,111 @@
+import collections
 import os
+import threading
+import zlib
 from uuid import uuid4
 
+from concurrent.futures import ThreadPoolExecutor
 from diskcache import Cache
 import lazy_object_proxy
 from sqlite3 import OperationalError
 
 from simpleflow import constants, logger, storage
-from simpleflow.settings import SIMPLEFLOW_ENABLE_DISK_CACHE
+from simpleflow.settings import (
+    SIMPLEFLOW_ENABLE_DISK_CACHE,
+    SIMPLEFLOW_JUMBO_FIELDS_MEMORY_CACHE_SIZE_LIMIT,
+)
 from simpleflow.utils import json_dumps, json_loads_or_raw
 
-
-JUMBO_FIELDS_MEMORY_CACHE = {}
+try:
+    import lzma
+except ImportError:  # py2, unless backports.lzma is installed
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+
+class JumboFieldsMemoryCache(object):
+    """
+    In-process LRU cache of jumbo fields contents, bounded by their total size.
+
+    Jumbo fields are immutable (their paths contain a uuid), so entries are
+    never invalidated, only evicted when the size budget is exceeded.
+    """
+
+    def __init__(self, size_limit):
+        """
+        :param size_limit: max total size of the cached contents, in chars.
+        :type size_limit: int
+        """
+        self.size_limit = size_limit
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._contents = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, path):
+        return path in self._contents
+
+    def __len__(self):
+        return len(self._contents)
+
+    def get(self, path):
+        """
+        Get a content and mark it as recently used.
+        :type path: str
+        :return: content or None
+        :rtype: Optional[str]
+        """
+        with self._lock:
+            content = self._contents.pop(path, None)
+            if content is None:
+                self.misses += 1
+                return None
+            self._contents[path] = content
+            self.hits += 1
+            return content
+
+    def set(self, path, content):
+        """
+        Cache a content, evicting the least recently used ones if needed.
+        Contents larger than the whole budget aren't cached.
+        :type path: str
+        :type content: str
+        """
+        size = len(content)
+        if size > self.size_limit:
+            return
+        with self._lock:
+            previous = self._contents.pop(path, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._contents[path] = content
+            self.size += size
+            while self.size > self.size_limit:
+                _, evicted = self._contents.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._contents.clear()
+            self.size = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._contents),
+            'size': self.size,
+            'size_limit': self.size_limit,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+JUMBO_FIELDS_MEMORY_CACHE = JumboFieldsMemoryCache(SIMPLEFLOW_JUMBO_FIELDS_MEMORY_CACHE_SIZE_LIMIT)
 
 
 def _jumbo_fields_bucket():
@@ -24,10 +119,55 @@ def _jumbo_fields_bucket():
     return bucket
 
 
+def _jumbo_fields_compression():
+    # wrapped into a function so easier to override for tests
+    compression = os.getenv("SIMPLEFLOW_JUMBO_FIELDS_COMPRESSION")
+    if not compression:
+        return
+    if compression not in constants.JUMBO_FIELDS_COMPRESSIONS:
+        raise ValueError("Invalid jumbo fields compression {}, should be one of {}".format(
+            compression, constants.JUMBO_FIELDS_COMPRESSIONS))
+    return compression
+
+
+def _compress(content, compression):
+    data = content.encode("utf-8")
+    if compression == "zlib":
+        return zlib.compress(data)
+    if lzma is None:
+        raise ValueError("lzma compression isn't available")
+    return lzma.compress(data)
+
+
+def _decompress(data, compression):
+    if compression == "zlib":
+        data = zlib.decompress(data)
+    elif lzma is None:
+        raise ValueError("lzma compression isn't available")
+    else:
+        data = lzma.decompress(data)
+    return data.decode("utf-8")
+
+
+def _parse_jumbo_location(location):
+    """
+    Split a jumbo field location.
+
+    :param location: e.g. "simpleflow+s3+zlib://bucket/path"
+    :type location: str
+    :return: compression (None if uncompressed), bucket and path
+    :rtype: (Optional[str], str, str)
+    """
+    scheme, address = location.split("://", 1)
+    compression = scheme.split("+")[2] if scheme.count("+") == 2 else None
+    bucket, path = address.split("/", 1)
+    return compression, bucket, path
+
+
 def decode(content, parse_json=True, use_proxy=True):
     if content is None:
         return content
-    if content.startswith(constants.JUMBO_FIELDS_PREFIX):
+    if content.startswith(constants.JUMBO_FIELDS_PREFIXES):
 
         def unwrap():
             location, _size = content.split()
@@ -36,6 +176,10 @@ def decode(content, parse_json=True, use_proxy=True):
                 return json_loads_or_raw(value)
             return value
 
+        # keep track of the encoded field, e.g. for simpleflow.history caching
+        unwrap.content = content
+        unwrap.parse_json = parse_json
+
         if use_proxy:
             return lazy_object_proxy.Proxy(unwrap)
         return unwrap()
@@ -57,11 +201,13 @@ def encode(message, max_length, allow_jumbo_fields=True):
             _log_message_too_long(message)
             raise ValueError("Message too long ({} chars)".format(len(message)))
 
-        if len(message) > constants.JUMBO_FIELDS_MAX_SIZE:
+        compression = _jumbo_fields_compression()
+        max_size = constants.JUMBO_FIELDS_MAX_UNCOMPRESSED_SIZE if compression else constants.JUMBO_FIELDS_MAX_SIZE
+        if len(message) > max_size:
             _log_message_too_long(message)
             raise ValueError("Message too long even for a jumbo field ({} chars)".format(len(message)))
 
-        jumbo_signature = _push_jumbo_field(message)
+        jumbo_signature = _push_jumbo_field(message, compression)
         if len(jumbo_signature) > max_length:
             raise ValueError(
                 "Jumbo field signature is longer than the max allowed length "
@@ -74,8 +220,9 @@ def encode(message, max_length, allow_jumbo_fields=True):
 
 def _get_cached(path):
     # 1/ memory cache
-    if path in JUMBO_FIELDS_MEMORY_CACHE:
-        return JUMBO_FIELDS_MEMORY_CACHE[path]
+    content = JUMBO_FIELDS_MEMORY_CACHE.get(path)
+    if content is not None:
+        return content
 
     # 2/ disk cache
     if SIMPLEFLOW_ENABLE_DISK_CACHE:
@@ -100,7 +247,7 @@ def _get_cached(path):
 
 def _set_cached(path, content):
     # 1/ memory cache
-    JUMBO_FIELDS_MEMORY_CACHE[path] = content
+    JUMBO_FIELDS_MEMORY_CACHE.set(path, content)
 
     # 2/ disk cache
     if SIMPLEFLOW_ENABLE_DISK_CACHE:
@@ -113,7 +260,7 @@ def _set_cached(path, content):
             logger.warning("diskcache: got an OperationalError on write, skipping cache write")
 
 
-def _push_jumbo_field(message):
+def _push_jumbo_field(message, compression=None):
     size = len(message)
     uuid = str(uuid4())
     bucket_with_dir = _jumbo_fields_bucket()
@@ -124,25 +271,86 @@ def _push_jumbo_field(message):
         bucket = bucket_with_dir
         path = uuid
 
-    storage.push_content(bucket, path, message)
+    if compression:
+        data = _compress(message, compression)
+        if len(data) > constants.JUMBO_FIELDS_MAX_SIZE:
+            _log_message_too_long(message)
+            raise ValueError(
+                "Message too long even for a compressed jumbo field ({} chars, {} bytes compressed)".format(
+                    size, len(data)))
+        prefix = constants.JUMBO_FIELDS_COMPRESSED_PREFIX.format(compression)
+    else:
+        data = message
+        prefix = constants.JUMBO_FIELDS_PREFIX
+
+    storage.push_content(bucket, path, data)
     _set_cached(path, message)
 
-    return "{}{}/{} {}".format(constants.JUMBO_FIELDS_PREFIX, bucket, path, size)
+    return "{}{}/{} {}".format(prefix, bucket, path, size)
 
 
 def _pull_jumbo_field(location):
-    bucket, path = location.replace(constants.JUMBO_FIELDS_PREFIX, "").split("/", 1)
+    compression, bucket, path = _parse_jumbo_location(location)
 
     cached_value = _get_cached(path)
     if cached_value:
         return cached_value
 
-    content = storage.pull_content(bucket, path)
+    if compression:
+        content = _decompress(storage.pull_content(bucket, path, encoding=None), compression)
+    else:
+        content = storage.pull_content(bucket, path)
     _set_cached(path, content)
 
     return content
 
 
+def prefetch_jumbo_fields(fields, max_bytes, max_workers):
+    """
+    Pull jumbo fields concurrently into the memory cache, so that decoding
+    them later doesn't hit S3 one field at a time. Fields already cached are
+    skipped, as well as those which would exceed the byte budget. Failures
+    are only logged: the field will be pulled again when decoded.
+
+    :param fields: encoded jumbo fields, e.g. "simpleflow+s3://bucket/path 1234"
+    :type fields: Iterable[str]
+    :param max_bytes: max total size of the prefetched fields
+    :type max_bytes: int
+    :param max_workers: number of concurrent pulls
+    :type max_workers: int
+    :return: number of prefetched fields
+    :rtype: int
+    """
+    locations = []
+    seen = set()
+    total_size = 0
+    for field in fields:
+        location, size = field.split()
+        size = int(size)
+        if location in seen or size + total_size > max_bytes:
+            continue
+        seen.add(location)
+        _, _, path = _parse_jumbo_location(location)
+        if path in JUMBO_FIELDS_MEMORY_CACHE:
+            continue
+        locations.append(location)
+        total_size += size
+
+    if not locations:
+        return 0
+
+    def pull(location):
+        try:
+            _pull_jumbo_field(location)
+            return True
+        except Exception as err:
+            logger.warning("cannot prefetch jumbo field {}: {}".format(location, err))
+            return False
+
+    with ThreadPoolExecutor(min(max_workers, len(locations))) as pool:
+        return sum(pool.map(pull, locations))
+
+
 def _log_message_too_long(message):
     if len(message) > constants.MAX_LOG_FIELD:
         message = "{} <...truncated to {} chars>".format(
@@ -38,18 +38,20 @@ def get_result_or_raise(future):
     """Returns the ``result`` of *future* if it is available, otherwise
     raise."""
     if future.state == PENDING:
-        raise exceptions.ExecutionBlocked()
+        future.wait()
     return future.result
 
 
 def wait(*fs):
     """Returns a list of the results of futures if there are available.
 
-    Raises a ``exceptions.ExecutionBlocked`` otherwise.
+    Raises a ``exceptions.ExecutionBlocked`` otherwise, unless the futures
+    can block until they're done (see :py:meth:`Future.wait`).
 
     """
-    if any(future.state == PENDING for future in fs):
-        raise exceptions.ExecutionBlocked()
+    for future in fs:
+        if future.state == PENDING:
+            future.wait()
 
     return [future.result for future in fs]
 
@@ -72,6 +74,12 @@ class Future(object):
             _STATE_TO_DESCRIPTION_MAP[self._state])
 
     def wait(self):
+        """
+        Block until the future is done and return its result.
+
+        SWF futures can't be waited for: the decision ends here and the
+        workflow is replayed once the task is done.
+        """
         raise exceptions.ExecutionBlocked
 
     @property
@@ -110,7 +118,7 @@ class Future(object):
 
         """
         if self._state != FINISHED:
-            return self.wait()
+            self.wait()
 
         return self._exception
 
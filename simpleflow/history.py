@@ -1,5 +1,16 @@
 import collections
+import hashlib
 import logging
+import os
+import pickle
+from io import BytesIO
+from sqlite3 import OperationalError
+
+from diskcache import Cache
+import lazy_object_proxy
+
+from simpleflow import constants, format, settings
+from simpleflow.utils import json_dumps
 
 logger = logging.getLogger(__name__)
 
@@ -23,12 +34,39 @@ class History(object):
     :type _signals: collections.OrderedDict[str, dict[str, Any]]
     :ivar _markers: marker events
     :type _markers: collections.OrderedDict[str, list[dict[str, Any]]]
+    :ivar _recorded_markers: last recorded marker by (name, details)
+    :type _recorded_markers: dict[(str, str), dict[str, Any]]
+    :ivar _signaled_workflows_index: first signaled workflow by (signal name, workflow ID, run ID)
+        and (signal name, workflow ID, None)
+    :type _signaled_workflows_index: dict[(str, str, Optional[str]), dict[str, Any]]
     :ivar _timers: timer events
     :type _timers: dict[str, dict[str, Any]]]
     :ivar _tasks: ordered list of tasks/etc
     :type _tasks: list[dict[str, Any]]
+    :ivar last_event_id: ID of the last parsed event
+    :type last_event_id: int
     """
 
+    # Attributes making up the parsed state; see dump_state/load_state
+    STATE_ATTRIBUTES = (
+        '_activities',
+        '_child_workflows',
+        '_external_workflows_signaling',
+        '_external_workflows_canceling',
+        '_signals',
+        '_signaled_workflows',
+        '_signaled_workflows_index',
+        '_markers',
+        '_recorded_markers',
+        '_timers',
+        '_tasks',
+        '_cancel_requested',
+        '_cancel_failed',
+        'started_decision_id',
+        'completed_decision_id',
+        'last_event_id',
+    )
+
     def __init__(self, history):
         self._history = history
         self._activities = collections.OrderedDict()
@@ -38,12 +76,15 @@ class History(object):
         self._signals = collections.OrderedDict()
         self._signaled_workflows = collections.defaultdict(list)
         self._markers = collections.OrderedDict()
+        self._recorded_markers = {}
+        self._signaled_workflows_index = {}
         self._timers = {}
         self._tasks = []
         self._cancel_requested = None
         self._cancel_failed = None
         self.started_decision_id = None
         self.completed_decision_id = None
+        self.last_event_id = 0
 
     @property
     def swf_history(self):
@@ -135,6 +176,32 @@ class History(object):
         """
         return self._markers
 
+    def find_recorded_marker(self, name, details):
+        """
+        Get the last marker recorded with this name and these details.
+
+        :param name:
+        :type name: str
+        :param details: JSON-encoded details
+        :type details: Optional[str]
+        :rtype: Optional[dict[str, Any]]
+        """
+        return self._recorded_markers.get((name, details))
+
+    def find_signaled_workflow(self, signal_name, workflow_id, run_id=None):
+        """
+        Get the first workflow signaled with this signal.
+
+        :param signal_name:
+        :type signal_name: str
+        :param workflow_id:
+        :type workflow_id: str
+        :param run_id: any run if None
+        :type run_id: Optional[str]
+        :rtype: Optional[dict[str, Any]]
+        """
+        return self._signaled_workflows_index.get((signal_name, workflow_id, run_id))
+
     @property
     def timers(self):
         # type: () -> Dict[str, Dict[str, Any]]
@@ -480,6 +547,9 @@ class History(object):
             workflow['signaled_event_id'] = event.id
             workflow['signaled_timestamp'] = event.timestamp
             self._signaled_workflows[workflow['signal_name']].append(workflow)
+            index = self._signaled_workflows_index
+            index.setdefault((workflow['signal_name'], workflow['workflow_id'], workflow['run_id']), workflow)
+            index.setdefault((workflow['signal_name'], workflow['workflow_id'], None), workflow)
         elif event.state == 'request_cancel_execution_initiated':
             workflow = {
                 'type': 'external_workflow',
@@ -524,6 +594,7 @@ class History(object):
                 'timestamp': event.timestamp,
             }
             self._markers.setdefault(event.marker_name, []).append(marker)
+            self._recorded_markers[(marker['name'], marker['details'])] = marker
         elif event.state == 'record_failed':
             marker = {
                 'type': 'marker',
@@ -597,14 +668,222 @@ class History(object):
         'Timer': parse_timer_event,
     }
 
-    def parse(self):
+    # (type, state) of the events which don't change the state of any future
+    # beyond pending/running, hence don't change the outcome of a replay.
+    # NB: a timed out decision task isn't one of them since its decisions were
+    # lost.
+    INERT_EVENTS = frozenset([
+        ('DecisionTask', 'scheduled'),
+        ('DecisionTask', 'started'),
+        ('ActivityTask', 'scheduled'),
+        ('ActivityTask', 'started'),
+        ('Timer', 'started'),
+        ('ChildWorkflowExecution', 'start_initiated'),
+        ('ChildWorkflowExecution', 'started'),
+        ('ExternalWorkflowExecution', 'signal_execution_initiated'),
+        ('ExternalWorkflowExecution', 'request_cancel_execution_initiated'),
+    ])
+
+    # Event attributes which may be jumbo fields, see jumbo_fields()
+    JUMBO_FIELDS_ATTRIBUTES = ('result', 'input', 'details')
+
+    def jumbo_fields(self):
+        """
+        List the encoded jumbo fields referenced by the events' results,
+        inputs and details.
+
+        :rtype: list[str]
+        """
+        prefixes = constants.JUMBO_FIELDS_PREFIXES
+        fields = []
+        for event in self.events:
+            attributes = event.attributes
+            for name in self.JUMBO_FIELDS_ATTRIBUTES:
+                value = attributes.get(name)
+                if value and value.startswith(prefixes):
+                    fields.append(value)
+        return fields
+
+    def has_only_inert_new_events(self):
+        """
+        Check whether all the events since the last completed decision are
+        inert, e.g. ActivityTaskStarted; there must be such a decision.
+
+        :rtype: bool
+        """
+        if not self.completed_decision_id or self._cancel_requested:
+            return False
+        inert_events = self.INERT_EVENTS
+        return all(
+            (event.type, event.state) in inert_events
+            for event in self.events[self.completed_decision_id:]
+        )
+
+    def parse(self, cache=None, key=None):
         """
         Parse the events.
         Update the corresponding statuses.
-        """
 
+        If a cache and a key are passed, resume from the state saved by a
+        previous parse of the same execution and only parse the new events,
+        then save the new state.
+
+        :param cache: parsed state cache
+        :type cache: Optional[HistoryParseCache]
+        :param key: execution key, e.g. (workflow_id, run_id)
+        :type key: Optional[Tuple[str, str]]
+        """
         events = self.events
-        for event in events:
+        if cache is not None and key is not None and not self.last_event_id:
+            state = cache.get(key)
+            if state is not None and self._can_resume(events, state):
+                self.load_state(state)
+            elif state is not None:
+                logger.warning('history: cached state for {} does not match, doing a full parse'.format(key))
+
+        for event in events[self.last_event_id:]:
             parser = self.TYPE_TO_PARSER.get(event.type)
             if parser:
                 parser(self, events, event)
+        if events:
+            self.last_event_id = events[-1].id
+
+        if cache is not None and key is not None:
+            cache.set(key, self.dump_state())
+
+    def _can_resume(self, events, state):
+        """
+        Check that a saved state is a prefix of these events.
+
+        :param events:
+        :type events: list[swf.models.event.Event]
+        :param state:
+        :type state: dict[str, Any]
+        :rtype: bool
+        """
+        last_event_id = state.get('last_event_id')
+        if not last_event_id or last_event_id > len(events):
+            return False
+        last_event = events[last_event_id - 1]
+        return (
+            last_event.id == last_event_id and
+            _event_fingerprint(last_event) == state.get('last_event')
+        )
+
+    def dump_state(self):
+        """
+        Serialize the parsed state.
+
+        Lazy jumbo fields are saved as their encoded signature so they aren't
+        fetched just to be stored.
+
+        :rtype: bytes
+        """
+        state = {name: getattr(self, name) for name in self.STATE_ATTRIBUTES}
+        if self.last_event_id:
+            last_event = self.events[self.last_event_id - 1]
+            state['last_event'] = _event_fingerprint(last_event)
+        buf = BytesIO()
+        pickler = pickle.Pickler(buf, pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = _jumbo_field_persistent_id
+        pickler.dump(state)
+        return buf.getvalue()
+
+    @staticmethod
+    def unpickle_state(data):
+        """
+        Deserialize a state produced by dump_state.
+
+        :param data:
+        :type data: bytes
+        :rtype: dict[str, Any]
+        """
+        unpickler = pickle.Unpickler(BytesIO(data))
+        unpickler.persistent_load = _jumbo_field_persistent_load
+        return unpickler.load()
+
+    def load_state(self, state):
+        """
+        Restore a parsed state.
+
+        :param state:
+        :type state: dict[str, Any]
+        """
+        for name in self.STATE_ATTRIBUTES:
+            setattr(self, name, state[name])
+
+
+def _event_fingerprint(event):
+    return hashlib.md5(json_dumps(event.raw, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _jumbo_field_persistent_id(obj):
+    # NB: isinstance() would resolve the proxy
+    if type(obj) is lazy_object_proxy.Proxy:
+        factory = obj.__factory__
+        return 'jumbo_field:{}:{}'.format(int(factory.parse_json), factory.content)
+    return None
+
+
+def _jumbo_field_persistent_load(pid):
+    if isinstance(pid, bytes):
+        pid = pid.decode('utf-8')
+    _, parse_json, content = pid.split(':', 2)
+    return format.decode(content, parse_json=bool(int(parse_json)))
+
+
+class HistoryParseCache(object):
+    """
+    On-disk cache of parsed history states, by execution.
+
+    Entries are evicted on a least-recently-used basis once the cache
+    grows over `size_limit` bytes.
+    """
+
+    def __init__(self, directory=None, size_limit=None):
+        self.directory = directory or os.path.join(constants.CACHE_DIR, 'history')
+        self.size_limit = size_limit or settings.SIMPLEFLOW_HISTORY_CACHE_SIZE_LIMIT
+
+    def _open(self):
+        # NB: cache objects do not survive forks, see DiskCache docs.
+        return Cache(
+            self.directory,
+            size_limit=self.size_limit,
+            eviction_policy='least-recently-used',
+        )
+
+    @staticmethod
+    def _cache_key(key):
+        return 'history/{}'.format('/'.join(key))
+
+    def get(self, key):
+        """
+        :param key:
+        :type key: Tuple[str, str]
+        :return: parsed state, if any
+        :rtype: Optional[dict[str, Any]]
+        """
+        try:
+            data = self._open().get(self._cache_key(key))
+        except OperationalError:
+            logger.warning("diskcache: got an OperationalError, skipping history cache usage")
+            return None
+        if data is None:
+            return None
+        try:
+            return History.unpickle_state(data)
+        except Exception as err:
+            logger.warning('history: cannot load cached state for {}: {}'.format(key, err))
+            return None
+
+    def set(self, key, data):
+        """
+        :param key:
+        :type key: Tuple[str, str]
+        :param data: state from History.dump_state
+        :type data: bytes
+        """
+        try:
+            self._open().set(self._cache_key(key), data, expire=constants.DAY)
+        except OperationalError:
+            logger.warning("diskcache: got an OperationalError on write, skipping history cache write")
@@ -1,5 +1,9 @@
 import collections
+import copy
 import logging
+import time
+
+from concurrent import futures as pool_futures
 
 from simpleflow import (
     exceptions,
@@ -11,6 +15,7 @@ from simpleflow.marker import Marker
 from simpleflow.signal import WaitForSignal
 from simpleflow.task import ActivityTask, WorkflowTask, SignalTask, MarkerTask
 from simpleflow.activity import Activity
+from simpleflow.dispatch import dynamic_dispatcher
 from simpleflow.utils import format_exc
 from simpleflow.workflow import Workflow
 from swf.models.history import builder
@@ -20,18 +25,140 @@ from simpleflow.history import History
 logger = logging.getLogger(__name__)
 
 
+POOL_TYPES = ('process', 'thread')
+
+
+def execute_activity(activity, args, kwargs, context):
+    """
+    Execute an activity in a worker of the local executor pool.
+
+    :param activity: activity, or its name to cross a process boundary.
+    :type activity: Activity | str
+    :return: start and end timestamps, result and exception.
+    :rtype: (float, float, object, Exception)
+    """
+    if not isinstance(activity, Activity):
+        activity = dynamic_dispatcher.Dispatcher.dispatch_activity(activity)
+    task = ActivityTask(activity, context=context, *args, **kwargs)
+    started = time.time()
+    try:
+        result = task.execute()
+        exception = None
+    except Exception as err:
+        logger.exception('rescuing exception: {}'.format(err))
+        result = None
+        exception = err
+    return started, time.time(), result, exception
+
+
+class LocalFuture(futures.Future):
+    """
+    Future of an activity running in the local executor pool.
+
+    Its state follows the pool future, and waiting for it blocks until
+    the activity is done. The outcome is only recorded in the history,
+    and raised if needed, when waiting for the future.
+    """
+
+    def __init__(self, pool_future, callback):
+        """
+        :param pool_future:
+        :type pool_future: concurrent.futures.Future
+        :param callback: called with the future, start and end timestamps
+                         when the future is waited for.
+        :type callback: callable
+        """
+        self._pool_future = pool_future
+        self._callback = callback
+        self._timestamps = None
+        super(LocalFuture, self).__init__()
+
+    @property
+    def _state(self):
+        if self._pool_future is not None:
+            if self._pool_future.done():
+                return futures.FINISHED
+            if self._pool_future.running():
+                return futures.RUNNING
+        return self._local_state
+
+    @_state.setter
+    def _state(self, state):
+        self._local_state = state
+
+    def _fetch(self):
+        """
+        Get the outcome of the pool future, blocking until it's done.
+        """
+        if self._pool_future is None:
+            return
+        pool_future, self._pool_future = self._pool_future, None
+        try:
+            started, closed, self._result, self._exception = pool_future.result()
+        except Exception as err:
+            # The pool itself failed, e.g. unpicklable arguments
+            started = closed = time.time()
+            self._result, self._exception = None, err
+        self._timestamps = started, closed
+        self._local_state = futures.FINISHED
+
+    def wait(self):
+        self._fetch()
+        callback, self._callback = self._callback, None
+        if callback is not None:
+            callback(self, *self._timestamps)
+        return self._result
+
+    @property
+    def result(self):
+        if self._callback is not None:
+            return self.wait()
+        return super(LocalFuture, self).result
+
+    @property
+    def exception(self):
+        if self._callback is not None:
+            self.wait()
+        return super(LocalFuture, self).exception
+
+    def __deepcopy__(self, memo):
+        # Tasks deep-copy their arguments: copy the outcome, not the pool future.
+        self._fetch()
+        future = futures.Future()
+        future._state = self._state
+        future._result = copy.deepcopy(self._result, memo)
+        future._exception = copy.deepcopy(self._exception, memo)
+        return future
+
+
 class Executor(executor.Executor):
     """
     Executes all tasks synchronously in a single local process.
 
+    With `max_workers`, activities run concurrently in a process or thread
+    pool instead; other tasks (signals, markers, child workflows) still run
+    synchronously.
+
     """
 
-    def __init__(self, workflow_class):
+    def __init__(self, workflow_class, max_workers=None, pool_type='process'):
+        """
+        :param max_workers: size of the activities pool; None runs them synchronously.
+        :type max_workers: Optional[int]
+        :param pool_type: "process" or "thread".
+        :type pool_type: str
+        """
         super(Executor, self).__init__(workflow_class)
+        if pool_type not in POOL_TYPES:
+            raise ValueError('invalid pool type {}, should be one of {}'.format(pool_type, POOL_TYPES))
         self.update_workflow_class()
         self.nb_activities = 0
         self.signals_sent = set()
         self._markers = collections.OrderedDict()
+        self.max_workers = max_workers
+        self.pool_type = pool_type
+        self._pool = None
+        self._pool_futures = []
 
     def update_workflow_class(self):
         """
@@ -85,6 +212,9 @@ class Executor(executor.Executor):
             raise TypeError('invalid type {} for {}'.format(
                 type(func), func))
 
+        if self.max_workers and isinstance(task, ActivityTask):
+            return self.submit_to_pool(task, context["activity_id"], {'args': args, 'kwargs': kwargs})
+
         try:
             future._result = task.execute()
             if hasattr(task, 'post_execute'):
@@ -110,6 +240,67 @@ class Executor(executor.Executor):
                 result=future.result)
         return future
 
+    @property
+    def pool(self):
+        if self._pool is None:
+            if self.pool_type == 'thread':
+                self._pool = pool_futures.ThreadPoolExecutor(self.max_workers)
+            else:
+                self._pool = pool_futures.ProcessPoolExecutor(self.max_workers)
+        return self._pool
+
+    def submit_to_pool(self, task, activity_id, input):
+        """
+        Run an activity task in the pool.
+
+        :type task: ActivityTask
+        :type activity_id: str
+        :param input: activity input, for the history.
+        :type input: dict
+        :rtype: LocalFuture
+        """
+        scheduled = time.time()
+        activity = task.activity
+        pool_future = self.pool.submit(
+            execute_activity,
+            activity if self.pool_type == 'thread' else activity.name,
+            task.args,
+            task.kwargs,
+            task.context,
+        )
+
+        def on_done(future, started, closed):
+            exception = future._exception
+            self._history.add_activity_task(
+                activity,
+                decision_id=None,
+                last_state='failed' if exception is not None else 'completed',
+                activity_id=activity_id,
+                input=input,
+                result=future._result,
+                timestamps=(scheduled, started, closed),
+            )
+            if exception is not None and activity.raises_on_failure:
+                raise exceptions.TaskFailed(activity.name, format_exc(exception))
+
+        future = LocalFuture(pool_future, on_done)
+        self._pool_futures.append(future)
+        return future
+
+    def wait_pool(self):
+        """
+        Wait for all the activities submitted to the pool.
+        """
+        for future in self._pool_futures:
+            future.wait()
+        self._pool_futures = []
+
+    def shutdown_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._pool_futures = []
+
     def run(self, input=None):
         if input is None:
             input = {}
@@ -120,7 +311,11 @@ class Executor(executor.Executor):
         self.initialize_history(input)
 
         self.before_replay()
-        result = self.run_workflow(*args, **kwargs)
+        try:
+            result = self.run_workflow(*args, **kwargs)
+            self.wait_pool()
+        finally:
+            self.shutdown_pool()
 
         # Hack: self._history must be available to the callback as a
         # simpleflow.history.History, not a swf.models.history.builder.History
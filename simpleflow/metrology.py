@@ -2,8 +2,11 @@ import abc
 import json
 import os
 import re
+import tempfile
 import time
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
+
+from concurrent.futures import ThreadPoolExecutor
 try:
     from urllib.parse import quote_plus  # py 3.x
 except ImportError:
@@ -154,26 +157,36 @@ class MetrologyWorkflow(Workflow):
         """
         Fetch workflow history and merge it with metrology
         """
-        activity_keys = [obj for obj in storage.list_keys(
-            settings.METROLOGY_BUCKET,
-            self.metrology_path)]
+        activity_prefix = os.path.join(self.metrology_path, 'activity.')
+        activity_keys = [
+            key for key in storage.list_keys(settings.METROLOGY_BUCKET, self.metrology_path)
+            if key.key.startswith(activity_prefix)
+        ]
         history_dumped = dump_history_to_json(history)
         history = json.loads(history_dumped)
 
-        for key in activity_keys:
-            if not key.key.startswith(os.path.join(self.metrology_path, 'activity.')):
-                continue
-            contents = key.get_contents_as_string(encoding='utf-8')
-            result = json.loads(contents)
-            search = ACTIVITY_KEY_RE.search(key.name)
-            name = search.group(1)
-            for h in history:
-                if h[0] == name:
-                    h[1]["metrology"] = result
-
-        storage.push_content(
-            settings.METROLOGY_BUCKET,
-            os.path.join(self.metrology_path, 'metrology.json'),
-            json.dumps(history, indent=2),
-            content_type="application/json"
-        )
+        tasks_by_name = defaultdict(list)
+        for name, task in history:
+            tasks_by_name[name].append(task)
+
+        def fetch(key):
+            return key, json.loads(key.get_contents_as_string(encoding='utf-8'))
+
+        with ThreadPoolExecutor(max_workers=settings.METROLOGY_FETCH_CONCURRENCY) as pool:
+            for key, result in pool.map(fetch, activity_keys):
+                name = ACTIVITY_KEY_RE.search(key.name).group(1)
+                for task in tasks_by_name.get(name, []):
+                    task["metrology"] = result
+
+        fd, filename = tempfile.mkstemp(suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                json.dump(history, fp, indent=2)
+            storage.push(
+                settings.METROLOGY_BUCKET,
+                os.path.join(self.metrology_path, 'metrology.json'),
+                filename,
+                content_type="application/json"
+            )
+        finally:
+            os.remove(filename)
@@ -1,13 +1,14 @@
+import errno
+import fcntl
 import functools
 import logging
 import multiprocessing
 import os
+import select
 import signal
 import time
 import types
 
-import psutil
-
 from .named_mixin import NamedMixin, with_state
 
 logger = logging.getLogger(__name__)
@@ -25,6 +26,7 @@ def reset_signal_handlers(func):
         signal.signal(signal.SIGTERM, signal.SIG_DFL)
         signal.signal(signal.SIGINT, signal.SIG_DFL)
         signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.set_wakeup_fd(-1)
         return func(*args, **kwargs)
 
     wrapped.__wrapped__ = func
@@ -36,17 +38,17 @@ def _void_handle_sigchld(signum, frame):
     Default action for a SIGCHLD signal handling is to ignore it
     which in practice has no effect on the running program. Having
     a handler that does nothing is a bit different, in the sense
-    it will interrupt the execution of any "time.sleep()" routing.
-    From "time" module docs:
-
-        The actual suspension time may be less than that requested
-        because any caught signal will terminate the sleep()
-        following execution of that signal's catching routine.
-
+    that the signal is then written to the wakeup fd (see
+    `signal.set_wakeup_fd()`), which wakes up the supervision loop.
     """
     pass
 
 
+def _set_non_blocking(fd):
+    flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+    fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
+
 class Supervisor(NamedMixin):
     """
     The `Supervisor` class is responsible for managing one or many worker processes
@@ -58,7 +60,18 @@ class Supervisor(NamedMixin):
     It also has its roots in the former simpleflow process manager and some of Botify
     private code which wasn't really well tested, and was re-written in a TDD-y
     style.
+
+    Ended processes are reaped and replaced as soon as a SIGCHLD is received.
+    Processes exiting less than `min_uptime` seconds after their start are
+    considered crashing: their replacement is delayed, with an exponential
+    backoff from `min_backoff` to `max_backoff` seconds.
+
+    :ivar nb_crashes: # of processes which exited before `min_uptime`
+    :type nb_crashes: int
     """
+    min_uptime = 10
+    min_backoff = 1
+    max_backoff = 60
 
     def __init__(self, payload, arguments=None, nb_children=None, background=False):
         """
@@ -88,10 +101,25 @@ class Supervisor(NamedMixin):
         self._background = background
 
         self._processes = {}
+        self._start_times = {}
         self._terminating = False
+        self._wakeup_fd = None
+        self._backoff = 0
+        self._next_start = 0
+        self._nb_started = 0
+        self.nb_crashes = 0
 
         super(Supervisor, self).__init__()
 
+    @property
+    def nb_restarts(self):
+        """
+        # of processes started to replace ended ones.
+
+        :rtype: int
+        """
+        return max(0, self._nb_started - self._nb_children)
+
     @with_state("running")
     def start(self):
         """
@@ -106,31 +134,39 @@ class Supervisor(NamedMixin):
             self.target()
 
     def _cleanup_worker_processes(self):
-        # cleanup children
-        to_remove = []
-        for pid, child in self._processes.items():
-            try:
-                name, status = child.name(), child.status()
-            except psutil.NoSuchProcess:  # May be untimely deceased
-                name, status = "unknown", "unknown"
-            logger.debug("  child: name=%s pid=%d status=%s" % (name, child.pid, status))
-            if status in (psutil.STATUS_ZOMBIE, "unknown"):
-                logger.debug("  process {} is zombie, will cleanup".format(child.pid))
-                # join process to clean it up
-                child.wait()
-                # set the process to be removed from self._processes
-                to_remove.append(pid)
-
-        # cleanup our internal state (self._processes)
-        for pid in to_remove:
+        """
+        Reap ended worker processes and compute when their replacements may
+        start.
+        """
+        now = time.time()
+        for pid, child in list(self._processes.items()):
+            # NB: exitcode calls waitpid(pid, WNOHANG), reaping the process
+            exitcode = child.exitcode
+            if exitcode is None:
+                continue
             del self._processes[pid]
+            uptime = now - self._start_times.pop(pid)
+            if self._terminating:
+                continue
+            if uptime < self.min_uptime:
+                self.nb_crashes += 1
+                self._backoff = min(max(self._backoff * 2, self.min_backoff), self.max_backoff)
+                self._next_start = now + self._backoff
+                logger.warning(
+                    "process: pid={} exited after {:.1f}s with exit code {}, restarting in {}s "
+                    "(restarts={} crashes={})".format(
+                        pid, uptime, exitcode, self._backoff, self.nb_restarts, self.nb_crashes))
+            else:
+                self._backoff = 0
+                logger.info("process: pid={} exited with exit code {}, restarting (restarts={} crashes={})".format(
+                    pid, exitcode, self.nb_restarts, self.nb_crashes))
 
     def _start_worker_processes(self):
         """
         Start missing worker processes depending on self._nb_children and the current
         processes stored in self._processes.
         """
-        if self._terminating:
+        if self._terminating or time.time() < self._next_start:
             return
         for _ in range(len(self._processes), self._nb_children):
             child = multiprocessing.Process(
@@ -146,7 +182,31 @@ class Supervisor(NamedMixin):
             # fork. So no big risk, but I add an assertion just in case anyway.
             pid = child.pid
             assert pid, "Cannot add process with pid={}: {}".format(pid, child)
-            self._processes[pid] = psutil.Process(pid)
+            self._processes[pid] = child
+            self._start_times[pid] = time.time()
+            self._nb_started += 1
+
+    def _wait_for_event(self):
+        """
+        Wait for a signal, or for the end of the restart backoff if some
+        processes are missing.
+        """
+        timeout = None
+        if not self._terminating and len(self._processes) < self._nb_children:
+            timeout = max(0, self._next_start - time.time())
+        try:
+            select.select([self._wakeup_fd], [], [], timeout)
+        except (select.error, OSError) as err:
+            # Python 2 doesn't retry on EINTR; the loop does it anyway
+            if err.args[0] != errno.EINTR:
+                raise
+        # Drain the wakeup fd
+        try:
+            while os.read(self._wakeup_fd, 4096):
+                pass
+        except OSError as err:
+            if err.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise
 
     def target(self):
         """
@@ -167,21 +227,16 @@ class Supervisor(NamedMixin):
             if self._terminating:
                 for proc in self._processes.values():
                     logger.info("process: waiting for proces={} to finish.".format(proc))
-                    proc.wait()
+                    proc.join()
                 break
 
             # start worker processes
             self._cleanup_worker_processes()
             self._start_worker_processes()
 
-            # re-evaluate state at least every 5 seconds ; if a SIGCHLD happens during
-            # the "time.sleep()" below, it will be interrupted, making the code above
-            # run nearly immediately ; but if a SIGCHLD happens during the two calls
-            # above, the "time.sleep()" here won't be stopped, so better have it
-            # relatively short, but not too short since the above methods involve
-            # scanning a bunch of entries in /proc so that could become slow if we do
-            # it every 0.1s.
-            time.sleep(5)
+            # sleep until something happens: signals are written to the wakeup
+            # fd, so a SIGCHLD received during the two calls above isn't lost
+            self._wait_for_event()
 
     def bind_signal_handlers(self):
         """
@@ -189,7 +244,13 @@ class Supervisor(NamedMixin):
         - SIGTERM and SIGINT lead to a graceful shutdown
         - SIGCHLD is intentionally left to a void handler, see comment
         - other signals are not modified for now
+        All of them wake up the supervision loop through a non-blocking pipe.
         """
+        read_fd, write_fd = os.pipe()
+        _set_non_blocking(read_fd)
+        _set_non_blocking(write_fd)
+        self._wakeup_fd = read_fd
+        signal.set_wakeup_fd(write_fd)
 
         # NB: Function is nested to have a reference to *self*.
         def _handle_graceful_shutdown(signum, frame):
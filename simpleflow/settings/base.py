@@ -70,15 +70,24 @@ ACTIVITY_START_TO_CLOSE_TIMEOUT = str
 ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT = str
 ACTIVITY_SCHEDULE_TO_START_TIMEOUT = str
 ACTIVITY_HEARTBEAT_TIMEOUT = str
+ACTIVITY_HEARTBEAT_JITTER = float
 
 LOGGING = dict
 
 SIMPLEFLOW_S3_HOST = str
+SIMPLEFLOW_S3_PART_SIZE = int
+SIMPLEFLOW_S3_TRANSFER_CONCURRENCY = int
 
 STEP_BUCKET = str
 
 METROLOGY_BUCKET = str
 METROLOGY_PATH_PREFIX = str_or_none
+METROLOGY_FETCH_CONCURRENCY = int
 
 SIMPLEFLOW_ENABLE_DISK_CACHE = bool
+SIMPLEFLOW_ENABLE_HISTORY_CACHE = bool
+SIMPLEFLOW_HISTORY_CACHE_SIZE_LIMIT = int
+SIMPLEFLOW_JUMBO_FIELDS_MEMORY_CACHE_SIZE_LIMIT = int
+SIMPLEFLOW_JUMBO_FIELDS_MEMORY_CACHE_PERSISTENT = bool
+SIMPLEFLOW_JUMBO_FIELDS_PREFETCH_WORKERS = int
 SIMPLEFLOW_BINARIES_DIRECTORY = str
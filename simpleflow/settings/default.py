@@ -16,13 +16,20 @@ ACTIVITY_START_TO_CLOSE_TIMEOUT = ACTIVITY_DEFAULT_TIMEOUT
 ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT = ACTIVITY_DEFAULT_TIMEOUT
 ACTIVITY_SCHEDULE_TO_START_TIMEOUT = ACTIVITY_DEFAULT_TIMEOUT
 ACTIVITY_HEARTBEAT_TIMEOUT = ACTIVITY_DEFAULT_TIMEOUT
+# Relative jitter of heartbeat intervals computed from heartbeat timeouts
+ACTIVITY_HEARTBEAT_JITTER = 0.1
 
 SIMPLEFLOW_S3_HOST = 's3.amazonaws.com'
+# Files larger than a part are transferred in parallel parts (min 5MB)
+SIMPLEFLOW_S3_PART_SIZE = 64 * 1024 ** 2
+SIMPLEFLOW_S3_TRANSFER_CONCURRENCY = 8
 
 STEP_BUCKET = 'step_bucket'
 
 METROLOGY_BUCKET = 'metrology_bucket'
 METROLOGY_PATH_PREFIX = None
+# Activity metrology files downloaded in parallel by MetrologyWorkflow
+METROLOGY_FETCH_CONCURRENCY = 16
 
 LOGGING = {
     'version': 1,
@@ -53,4 +60,9 @@ LOGGING = {
 }
 
 SIMPLEFLOW_ENABLE_DISK_CACHE = False
+SIMPLEFLOW_ENABLE_HISTORY_CACHE = False
+SIMPLEFLOW_HISTORY_CACHE_SIZE_LIMIT = 512 * 1024 ** 2  # 512MB
+SIMPLEFLOW_JUMBO_FIELDS_MEMORY_CACHE_SIZE_LIMIT = 256 * 1024 ** 2  # 256MB
+SIMPLEFLOW_JUMBO_FIELDS_MEMORY_CACHE_PERSISTENT = True  # keep jumbo fields across tasks
+SIMPLEFLOW_JUMBO_FIELDS_PREFETCH_WORKERS = 8
 SIMPLEFLOW_BINARIES_DIRECTORY = '/tmp/simpleflow-binaries'
@@ -21,3 +21,6 @@ UNKNOWN_CONTEXT = {
     "workflow_id": "unknown",
     "version": "unknown"
 }
+
+# Marker recording the steps marked as done by the same MarkStepsDoneTask
+STEPS_DONE_BATCH_MARKER = 'log.step.batch'
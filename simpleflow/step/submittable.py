@@ -2,7 +2,7 @@ import copy
 from .tasks import MarkStepDoneTask
 
 from simpleflow.base import SubmittableContainer
-from simpleflow import activity
+from simpleflow import activity, exceptions, futures
 from simpleflow.canvas import Chain, FuncGroup
 from .utils import (
     get_step_force_reasons,
@@ -45,37 +45,37 @@ class Step(SubmittableContainer):
                 "reasons": []
             }
             chain = Chain()
-            forced_steps = workflow.get_forced_steps()
-            skipped_steps = workflow.get_skipped_steps()
+            forced_steps = workflow.get_forced_steps_trie()
+            skipped_steps = workflow.get_skipped_steps_trie()
             if step_will_run(self.step_name, forced_steps, skipped_steps, steps_done, self.force):
                 if step_is_forced(self.step_name, forced_steps, self.force):
                     marker["forced"] = True
-                    marker["reasons"] = get_step_force_reasons(
-                        self.step_name,
-                        getattr(workflow, 'steps_forced_reasons', {})
-                    )
+                    marker["reasons"] = get_step_force_reasons(self.step_name, forced_steps)
 
                 marker_done = copy.copy(marker)
                 marker_done["status"] = "completed"
 
+                if getattr(workflow, 'batch_steps_done', False):
+                    mark_step_done = StepDone(self.step_name)
+                else:
+                    mark_step_done = (
+                        activity.Activity(MarkStepDoneTask, **workflow._get_step_activity_params()),
+                        workflow.get_step_bucket(),
+                        workflow.get_step_path_prefix(),
+                        self.step_name)
+
                 workflow.add_forced_steps(self.force_steps_if_executed, 'Dep of {}'.format(self.step_name))
                 chain += (
                     workflow.record_marker('log.step', marker),
                     self.activities,
-                    (activity.Activity(MarkStepDoneTask, **workflow._get_step_activity_params()),
-                     workflow.get_step_bucket(),
-                     workflow.get_step_path_prefix(),
-                     self.step_name),
+                    mark_step_done,
                     workflow.record_marker('log.step', marker_done)
                 )
             else:
                 marker["status"] = "skipped"
                 if step_is_skipped_by_force(self.step_name, skipped_steps):
                     marker["forced"] = True
-                    marker["reasons"] = get_step_skip_reasons(
-                        self.step_name,
-                        getattr(workflow, 'steps_skipped_reasons', {})
-                    )
+                    marker["reasons"] = get_step_skip_reasons(self.step_name, skipped_steps)
                 else:
                     marker["reasons"] = ["Step was already played"]
 
@@ -91,7 +91,7 @@ class Step(SubmittableContainer):
             return chain
 
         return workflow.submit(Chain(
-            workflow.get_steps_done_activity(),
+            StepsDone(),
             FuncGroup(fn_steps_done),
             send_result=True))
 
@@ -100,3 +100,75 @@ class Step(SubmittableContainer):
         Propagate the attribute to the related activities.
         """
         self.activities.propagate_attribute(attr, val)
+
+
+class StepsDone(SubmittableContainer):
+    """
+    List of the steps already done, looked up once and shared by all the
+    steps of the workflow.
+    """
+    def submit(self, executor):
+        return executor.workflow.get_steps_done_future()
+
+
+class StepDone(SubmittableContainer):
+    """
+    Mark a step as done along with the other steps completed in the same
+    decision (see `WorkflowStepMixin.batch_steps_done`).
+    """
+    def __init__(self, step_name):
+        self.step_name = step_name
+
+    def submit(self, executor):
+        return executor.workflow.get_step_done_future(self.step_name)
+
+
+class StepsDoneBatchFuture(futures.Future):
+    """
+    Future shared by the steps marked as done in the same decision.
+
+    The MarkStepsDoneTask activity is submitted when the decision is closed
+    (see `Executor.defer`), with all the steps added until then; the future
+    then follows the activity's state.
+    """
+    def __init__(self, workflow):
+        super(StepsDoneBatchFuture, self).__init__()
+        self.workflow = workflow
+        self.step_names = []
+        self.future = None
+
+    def add(self, step_name):
+        self.step_names.append(step_name)
+
+    def submit(self):
+        self.future = self.workflow.submit_steps_done_batch(self.step_names)
+
+    @property
+    def _state(self):
+        if self.future is not None:
+            return self.future.state
+        return self._local_state
+
+    @_state.setter
+    def _state(self, state):
+        self._local_state = state
+
+    @property
+    def result(self):
+        if self.future is not None:
+            return self.future.result
+        return super(StepsDoneBatchFuture, self).result
+
+    @property
+    def exception(self):
+        if self.future is not None:
+            return self.future.exception
+        return super(StepsDoneBatchFuture, self).exception
+
+    def wait(self):
+        if self.future is None:
+            # Not submitted until the decision is closed
+            raise exceptions.ExecutionBlocked()
+        if self.future.done:
+            return self.future.result
+        return self.future.wait()
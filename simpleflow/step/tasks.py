@@ -44,3 +44,21 @@ class MarkStepDoneTask(object):
         else:
             content = UNKNOWN_CONTEXT
         storage.push_content(self.bucket, path, json.dumps(content))
+
+
+class MarkStepsDoneTask(object):
+    """
+    Push a file for each step of `step_names` into bucket/path
+    """
+
+    def __init__(self, bucket, path, step_names):
+        self.bucket = bucket
+        self.path = path
+        self.step_names = step_names
+
+    def execute(self):
+        for step_name in self.step_names:
+            task = MarkStepDoneTask(self.bucket, self.path, step_name)
+            if hasattr(self, 'context'):
+                task.context = self.context
+            task.execute()
@@ -1,3 +1,72 @@
+if False:
+    from typing import Iterable, Optional  # NOQA
+
+
+class StepsTrie(object):
+    """
+    Step names indexed by dotted segment, with their reasons: "a.b" matches
+    the steps "a.b" and "a.b.c" but not "a.bc"; "*" matches every step.
+    Lookups are proportional to the depth of the step.
+    """
+
+    def __init__(self, steps=None):
+        # Nodes are [reasons, children by segment]; reasons is None for the
+        # intermediate segments that aren't steps by themselves.
+        self.root = {}
+        self.wildcard = None  # type: Optional[set]
+        for step in steps or []:
+            self.add(step)
+
+    def add(self, step, reasons=None):
+        """
+        Add a step, or extend its reasons.
+        :param step: step name or prefix, or "*"
+        :type step: str
+        :param reasons:
+        :type reasons: Optional[Iterable[str]]
+        """
+        if step == "*":
+            if self.wildcard is None:
+                self.wildcard = set()
+            node_reasons = self.wildcard
+        else:
+            node = None
+            children = self.root
+            for segment in step.split("."):
+                node = children.setdefault(segment, [None, {}])
+                children = node[1]
+            if node[0] is None:
+                node[0] = set()
+            node_reasons = node[0]
+        node_reasons.update(reasons or [])
+
+    def _iter_matches(self, step_name):
+        """
+        Yield the reasons of each step matching step_name.
+        """
+        if self.wildcard is not None:
+            yield self.wildcard
+        children = self.root
+        for segment in step_name.split("."):
+            node = children.get(segment)
+            if node is None:
+                return
+            if node[0] is not None:
+                yield node[0]
+            children = node[1]
+
+    def matches(self, step_name):
+        for _ in self._iter_matches(step_name):
+            return True
+        return False
+
+    def get_reasons(self, step_name):
+        reasons = []
+        for node_reasons in self._iter_matches(step_name):
+            reasons += sorted(node_reasons)
+        return reasons
+
+
 def should_force_step(step_name, force_steps):
     """
     Check if step_name is in force_steps
@@ -5,6 +74,8 @@ def should_force_step(step_name, force_steps):
     we allow : "a", "a.b", "a.b.c"
     If one of force_steps is a wildcard (*), it will also force the step
     """
+    if isinstance(force_steps, StepsTrie):
+        return force_steps.matches(step_name)
     for step in force_steps:
         if step == "*" or step == step_name or step_name.startswith(step + "."):
             return True
@@ -39,6 +110,8 @@ def step_is_forced(step_name, force_steps, force):
 
 
 def _get_step_reasons(step_name, step_reasons):
+    if isinstance(step_reasons, StepsTrie):
+        return step_reasons.get_reasons(step_name)
     reasons = []
     for step, sreasons in step_reasons.items():
         if step == "*" or step == step_name or step_name.startswith(step + "."):
@@ -2,14 +2,19 @@ import os
 import copy
 from collections import defaultdict
 
-from .constants import STEP_ACTIVITY_PARAMS_DEFAULT
-from .submittable import Step
-from .tasks import GetStepsDoneTask
+from .constants import STEP_ACTIVITY_PARAMS_DEFAULT, STEPS_DONE_BATCH_MARKER
+from .submittable import Step, StepsDoneBatchFuture
+from .tasks import GetStepsDoneTask, MarkStepsDoneTask
+from .utils import StepsTrie
 from simpleflow import activity, settings, task
 
 
 class WorkflowStepMixin(object):
 
+    # Mark the steps completed in the same decision as done with a single
+    # MarkStepsDoneTask activity instead of one MarkStepDoneTask per step.
+    batch_steps_done = False
+
     def get_step_bucket(self):
         """
         Return the S3 bucket where to store the steps files
@@ -41,10 +46,17 @@ class WorkflowStepMixin(object):
         if reason:
             for step in steps:
                 self.steps_forced_reasons[step].add(reason)
+        self._steps_version = getattr(self, '_steps_version', 0) + 1
 
     def get_forced_steps(self):
         return list(getattr(self, 'steps_forced', []))
 
+    def get_forced_steps_trie(self):
+        """
+        Return get_forced_steps() and their reasons, indexed for lookups
+        """
+        return self._get_steps_trie('forced', 'get_forced_steps', 'steps_forced')
+
     def add_skipped_steps(self, steps, reason=None):
         """
         Add steps to skip
@@ -57,10 +69,45 @@ class WorkflowStepMixin(object):
         if reason:
             for step in steps:
                 self.steps_skipped_reasons[step].add(reason)
+        self._steps_version = getattr(self, '_steps_version', 0) + 1
 
     def get_skipped_steps(self):
         return list(getattr(self, 'steps_skipped', []))
 
+    def get_skipped_steps_trie(self):
+        """
+        Return get_skipped_steps() and their reasons, indexed for lookups
+        """
+        return self._get_steps_trie('skipped', 'get_skipped_steps', 'steps_skipped')
+
+    def _get_steps_trie(self, kind, getter, attribute):
+        """
+        Return a trie of the steps and their reasons, rebuilt only when they
+        changed since the last call: after add_*_steps() or a new value of
+        their attributes. If the getter is overridden, its result is compared
+        to the steps of the cached trie instead.
+        """
+        steps = getattr(self, attribute, None)
+        reasons = getattr(self, attribute + '_reasons', {})
+        method = getattr(type(self), getter)
+        if getattr(method, '__func__', method) is WorkflowStepMixin.__dict__[getter]:
+            # The cached trie keeps a reference to the steps and reasons: their
+            # ids can't be reused by new objects.
+            key = (getattr(self, '_steps_version', 0), len(steps or ()), id(steps), id(reasons))
+        else:
+            steps = frozenset(getattr(self, getter)())
+            key = (steps, {step: set(r) for step, r in reasons.items()})
+        tries = getattr(self, '_steps_tries', None)
+        if tries is None:
+            tries = self._steps_tries = {}
+        cached = tries.get(kind)
+        if cached is None or cached[0] != key:
+            trie = StepsTrie()
+            for step in steps or ():
+                trie.add(step, reasons.get(step))
+            cached = tries[kind] = (key, steps, reasons, trie)
+        return cached[3]
+
     def _get_step_activity_params(self):
         """
         Returns the merged version between self.get_step_activity_params()
@@ -84,6 +131,88 @@ class WorkflowStepMixin(object):
             self.get_step_bucket(),
             self.get_step_path_prefix())
 
+    def _get_steps_cache(self):
+        """
+        Return the steps state of the current replay: the workflow may be kept
+        across replays, with a new history each time.
+        """
+        history = getattr(self.executor, '_history', None)
+        cache = getattr(self, '_steps_cache', None)
+        if cache is None or cache['history'] is not history:
+            cache = self._steps_cache = {
+                'history': history,
+                'steps_done': {},
+                'batches': None,
+                'batch_futures': {},
+                'batch': None,
+            }
+        return cache
+
+    def get_steps_done_future(self):
+        """
+        Return the future of the GetStepsDoneTask activity, submitted once
+        and shared by all the steps.
+        """
+        steps_done = self._get_steps_cache()['steps_done']
+        key = (self.get_step_bucket(), self.get_step_path_prefix())
+        if key not in steps_done:
+            steps_done[key] = self.submit(self.get_steps_done_activity())
+        return steps_done[key]
+
     def get_steps_done(self):
-        return self.submit(
-            self.get_steps_done_activity()).result
+        return self.get_steps_done_future().result
+
+    def _get_steps_done_batches(self):
+        """
+        Return the batches recorded by the previous decisions, by step name.
+        """
+        cache = self._get_steps_cache()
+        if cache['batches'] is None:
+            cache['batches'] = {}
+            for marker in self.list_markers(all=True):
+                if marker.name == STEPS_DONE_BATCH_MARKER:
+                    for step_name in marker.details['steps']:
+                        cache['batches'][step_name] = marker.details['steps']
+        return cache['batches']
+
+    def get_step_done_future(self, step_name):
+        """
+        Return the future marking the step as done: the batch it was recorded
+        in if any, else the batch of the current decision.
+        """
+        batches = self._get_steps_done_batches()
+        cache = self._get_steps_cache()
+        if step_name in batches:
+            # Submitted once per batch: the task ID may not be a hash of it
+            key = tuple(batches[step_name])
+            batch_futures = cache['batch_futures']
+            if key not in batch_futures:
+                batch_futures[key] = self.submit(self.get_mark_steps_done_activity(batches[step_name]))
+            return batch_futures[key]
+        batch = cache['batch']
+        if batch is not None and batch.future is None:
+            batch.add(step_name)
+            return batch
+        batch = cache['batch'] = StepsDoneBatchFuture(self)
+        batch.add(step_name)
+        self.executor.defer(batch.submit)
+        return batch
+
+    def submit_steps_done_batch(self, step_names):
+        """
+        Record the batch then mark its steps as done.
+        """
+        for step_name in step_names:
+            self._get_steps_done_batches()[step_name] = step_names
+        self.submit(self.record_marker(STEPS_DONE_BATCH_MARKER, {'steps': step_names}))
+        future = self.submit(self.get_mark_steps_done_activity(step_names))
+        self._get_steps_cache()['batch_futures'][tuple(step_names)] = future
+        return future
+
+    def get_mark_steps_done_activity(self, step_names):
+        return task.ActivityTask(activity.Activity(
+            MarkStepsDoneTask,
+            **self._get_step_activity_params()),
+            self.get_step_bucket(),
+            self.get_step_path_prefix(),
+            step_names)
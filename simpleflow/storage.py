@@ -1,5 +1,9 @@
+import codecs
 import logging
+import os
+import threading
 
+from concurrent.futures import ThreadPoolExecutor
 from boto.s3 import connect_to_region, connection
 from boto.s3.key import Key
 from boto.exception import S3ResponseError
@@ -12,8 +16,39 @@ logger = logging.getLogger(__name__)
 BUCKET_CACHE = {}
 BUCKET_LOCATIONS_CACHE = {}
 
+# S3 connections by host or region; boto keeps their HTTP connections alive.
+# They're reset in forked processes, see _check_pid().
+CONNECTIONS = {}
+CONNECTIONS_PID = os.getpid()
+CONNECTIONS_STATS = {
+    'created': 0,
+    'reused': 0,
+    'resets': 0,
+}
+_connections_lock = threading.Lock()
 
-def get_connection(host_or_region):
+# S3 rejects smaller parts in a multipart upload (but the last one)
+MIN_PART_SIZE = 5 * 1024 ** 2
+
+
+def _check_pid():
+    """
+    Drop the connections and buckets inherited from a parent process: their
+    sockets are shared with it.
+    """
+    global CONNECTIONS_PID
+    pid = os.getpid()
+    if pid == CONNECTIONS_PID:
+        return
+    with _connections_lock:
+        if pid != CONNECTIONS_PID:
+            CONNECTIONS.clear()
+            BUCKET_CACHE.clear()
+            CONNECTIONS_PID = pid
+            CONNECTIONS_STATS['resets'] += 1
+
+
+def _new_connection(host_or_region):
     # first case: we got a valid DNS (host)
     if "." in host_or_region:
         return connection.S3Connection(host=host_or_region)
@@ -22,6 +57,39 @@ def get_connection(host_or_region):
     return connect_to_region(host_or_region)
 
 
+def get_connection(host_or_region):
+    """
+    Get the S3 connection of this process for a host or region.
+
+    :param host_or_region:
+    :type host_or_region: str
+    :rtype: boto.s3.connection.S3Connection
+    """
+    _check_pid()
+    conn = CONNECTIONS.get(host_or_region)
+    if conn is not None:
+        CONNECTIONS_STATS['reused'] += 1
+        return conn
+    with _connections_lock:
+        conn = CONNECTIONS.get(host_or_region)
+        if conn is None:
+            conn = _new_connection(host_or_region)
+            CONNECTIONS[host_or_region] = conn
+            CONNECTIONS_STATS['created'] += 1
+        else:
+            CONNECTIONS_STATS['reused'] += 1
+    return conn
+
+
+def get_connections_stats():
+    """
+    Counters of created, reused and reset (after a fork) connections.
+
+    :rtype: dict[str, int]
+    """
+    return dict(CONNECTIONS_STATS, connections=len(CONNECTIONS))
+
+
 def sanitize_bucket_and_host(bucket):
     """
     if bucket is in following format : 'xxx.amazonaws.com/bucket_name',
@@ -43,7 +111,7 @@ def sanitize_bucket_and_host(bucket):
 
     # second case: we got a bucket name, we need to figure out which region it's in
     try:
-        conn0 = connection.S3Connection()
+        conn0 = get_connection(connection.S3Connection.DefaultHost)
         bucket_obj = conn0.get_bucket(bucket, validate=False)
 
         # get_location() returns a region or an empty string for us-east-1,
@@ -70,33 +138,145 @@ def sanitize_bucket_and_host(bucket):
 
 
 def get_bucket(bucket_name):
+    _check_pid()
     bucket_name, location = sanitize_bucket_and_host(bucket_name)
-    conn = get_connection(location)
-    if bucket_name not in BUCKET_CACHE:
-        bucket = conn.get_bucket(bucket_name, validate=False)
+    bucket = BUCKET_CACHE.get(bucket_name)
+    if bucket is None:
+        bucket = get_connection(location).get_bucket(bucket_name, validate=False)
         BUCKET_CACHE[bucket_name] = bucket
-    return BUCKET_CACHE[bucket_name]
+    return bucket
+
+
+def _parts(size, part_size):
+    """
+    Split a size into (offset, length) parts.
+    """
+    return [(offset, min(part_size, size - offset)) for offset in range(0, size, part_size)]
+
+
+def pull(bucket, path, dest_file, part_size=None, concurrency=None):
+    """
+    Download an object to a file. Objects larger than a part are downloaded
+    with parallel ranged GETs.
+
+    :param part_size: defaults to settings.SIMPLEFLOW_S3_PART_SIZE
+    :type part_size: Optional[int]
+    :param concurrency: defaults to settings.SIMPLEFLOW_S3_TRANSFER_CONCURRENCY
+    :type concurrency: Optional[int]
+    """
+    part_size = part_size or settings.SIMPLEFLOW_S3_PART_SIZE
+    bucket = get_bucket(bucket)
+    key = bucket.get_key(path)
+    if key.size <= part_size:
+        key.get_contents_to_filename(dest_file)
+        return
+    _ranged_download(key, dest_file, part_size, concurrency or settings.SIMPLEFLOW_S3_TRANSFER_CONCURRENCY)
+
+
+def _ranged_download(key, dest_file, part_size, concurrency):
+    with open(dest_file, 'wb') as fp:
+        fp.truncate(key.size)
 
+    def download_part(part):
+        offset, length = part
+        headers = {
+            'Range': 'bytes={}-{}'.format(offset, offset + length - 1),
+            # fail rather than mix parts of different versions
+            'If-Match': key.etag,
+        }
+        data = Key(key.bucket, key.name).get_contents_as_string(headers=headers)
+        with open(dest_file, 'r+b') as fp:
+            fp.seek(offset)
+            fp.write(data)
 
-def pull(bucket, path, dest_file):
+    try:
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(download_part, _parts(key.size, part_size)))
+    except Exception:
+        os.remove(dest_file)
+        raise
+
+
+def pull_content(bucket, path, encoding='utf-8'):
+    """
+    :param encoding: None to get bytes
+    """
     bucket = get_bucket(bucket)
     key = bucket.get_key(path)
-    key.get_contents_to_filename(dest_file)
+    return key.get_contents_as_string(encoding=encoding)
 
 
-def pull_content(bucket, path):
+def iter_content(bucket, path, chunk_size=1024 ** 2, encoding=None):
+    """
+    Iterate over the content of an object by chunks, without holding it
+    whole in memory.
+
+    :param chunk_size: size of the chunks read, in bytes
+    :type chunk_size: int
+    :param encoding: decode the chunks, e.g. "utf-8"; None to get bytes
+    :type encoding: Optional[str]
+    :rtype: Iterator[bytes | str]
+    """
     bucket = get_bucket(bucket)
     key = bucket.get_key(path)
-    return key.get_contents_as_string(encoding='utf-8')
+    decoder = codecs.getincrementaldecoder(encoding)() if encoding else None
+    try:
+        while True:
+            chunk = key.read(chunk_size)
+            if not chunk:
+                break
+            yield decoder.decode(chunk) if decoder else chunk
+        if decoder:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+    finally:
+        key.close()
 
 
-def push(bucket, path, src_file, content_type=None):
+def push(bucket, path, src_file, content_type=None, part_size=None, concurrency=None):
+    """
+    Upload a file. Files larger than a part are sent with a parallel
+    multipart upload.
+
+    :param part_size: defaults to settings.SIMPLEFLOW_S3_PART_SIZE; at least
+        MIN_PART_SIZE
+    :type part_size: Optional[int]
+    :param concurrency: defaults to settings.SIMPLEFLOW_S3_TRANSFER_CONCURRENCY
+    :type concurrency: Optional[int]
+    """
+    part_size = max(part_size or settings.SIMPLEFLOW_S3_PART_SIZE, MIN_PART_SIZE)
     bucket = get_bucket(bucket)
-    key = Key(bucket, path)
     headers = {}
     if content_type:
         headers["content_type"] = content_type
-    key.set_contents_from_filename(src_file, headers=headers)
+    size = os.path.getsize(src_file)
+    if size <= part_size:
+        key = Key(bucket, path)
+        key.set_contents_from_filename(src_file, headers=headers)
+        return
+    _multipart_upload(
+        bucket, path, src_file, size, headers, part_size,
+        concurrency or settings.SIMPLEFLOW_S3_TRANSFER_CONCURRENCY,
+    )
+
+
+def _multipart_upload(bucket, path, src_file, size, headers, part_size, concurrency):
+    upload = bucket.initiate_multipart_upload(path, headers=headers)
+
+    def upload_part(numbered_part):
+        part_num, (offset, length) = numbered_part
+        with open(src_file, 'rb') as fp:
+            fp.seek(offset)
+            upload.upload_part_from_file(fp, part_num, size=length)
+
+    try:
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(upload_part, enumerate(_parts(size, part_size), 1)))
+    except Exception:
+        upload.cancel_upload()
+        raise
+    upload.complete_upload()
 
 
 def push_content(bucket, path, content, content_type=None):
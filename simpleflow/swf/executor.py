@@ -3,11 +3,14 @@ from __future__ import absolute_import
 import copy
 import inspect
 import hashlib
-import json
+import itertools
 import logging
 import multiprocessing
+import pickle
 import re
+import time
 import traceback
+import zlib
 
 import simpleflow.task as base_task
 import swf.exceptions
@@ -18,11 +21,12 @@ from simpleflow import (
     executor,
     format,
     futures,
+    settings,
     task,
 )
 from simpleflow.activity import Activity, PRIORITY_NOT_SET
 from simpleflow.base import Submittable
-from simpleflow.history import History
+from simpleflow.history import History, HistoryParseCache
 from simpleflow.marker import Marker
 from simpleflow.signal import WaitForSignal
 from simpleflow.swf import constants
@@ -51,6 +55,55 @@ logger = logging.getLogger(__name__)
 
 __all__ = ['Executor']
 
+# Idempotent task IDs made with the md5 hash, see Executor._get_task_id_hash
+LEGACY_TASK_ID_RE = re.compile(r'-[0-9a-f]{32}$')
+
+# Idempotent task ID suffixes by (hash, task name, arguments fingerprint),
+# kept across replays; emptied when full
+_task_id_cache = {}
+TASK_ID_CACHE_SIZE = 100000
+
+
+def fast_hash(data):
+    """
+    Non-cryptographic 64-bit hash, prefixed so it can't be mistaken for a
+    md5 one.
+
+    :type data: bytes
+    :rtype: str
+    """
+    return 'f{:08x}{:08x}'.format(zlib.crc32(data) & 0xffffffff, zlib.adler32(data) & 0xffffffff)
+
+
+def hash_task_arguments(hash_name, args, kwargs):
+    """
+    Hash the arguments of an idempotent task.
+
+    :param hash_name: "md5" or "fast"
+    :type hash_name: str
+    :type args: tuple
+    :type kwargs: dict
+    :rtype: str
+    """
+    arguments = json_dumps({"args": args, "kwargs": kwargs}).encode('utf-8')
+    if hash_name == 'fast':
+        return fast_hash(arguments)
+    return hashlib.md5(arguments).hexdigest()
+
+
+def _arguments_fingerprint(args, kwargs):
+    """
+    Cheap structural fingerprint of task arguments: equal pickles mean equal
+    JSON serializations (the contrary is not true, e.g. with a different
+    dict order, but that's only a cache miss).
+
+    :rtype: Optional[bytes]
+    """
+    try:
+        return hashlib.md5(pickle.dumps((args, kwargs), 2)).digest()
+    except Exception:
+        return None
+
 
 # if "poll_for_activity_task" doesn't contain a "taskToken"
 # key, then retry ; it happens (not often) that the decider
@@ -166,6 +219,10 @@ class Executor(executor.Executor):
     :type _repair_workflow_id: Optional[str]
     :ivar repair_run_id: run ID to repair, if any
     :type _repair_run_id: Optional[str]
+    :ivar nb_replays: # of decision tasks handled by this executor
+    :type nb_replays: int
+    :ivar nb_skipped_replays: # of them which didn't need a replay, see Workflow.skip_inert_replays
+    :type nb_skipped_replays: int
 
     """
 
@@ -188,10 +245,14 @@ class Executor(executor.Executor):
         self._open_activity_count = 0
         self._decisions_and_context = DecisionsAndContext()
         self._append_timer = False  # Append an immediate timer decision
+        self._deferred = []  # Callbacks run when the decision is closed
         self._tasks = TaskRegistry()
         self._idempotent_tasks_to_submit = set()
         self._execution = None
         self.current_priority = None
+        self._task_id_hash = None
+        self.nb_replays = 0
+        self.nb_skipped_replays = 0
 
     def reset(self):
         """
@@ -204,10 +265,12 @@ class Executor(executor.Executor):
         self._open_activity_count = 0
         self._decisions_and_context = DecisionsAndContext()
         self._append_timer = False  # Append an immediate timer decision
+        self._deferred = []  # Callbacks run when the decision is closed
         self._tasks = TaskRegistry()
         self._idempotent_tasks_to_submit = set()
         self._execution = None
         self.current_priority = None
+        self._task_id_hash = None
         self.create_workflow()
 
     def _make_task_id(self, a_task, workflow_id, run_id, *args, **kwargs):
@@ -233,8 +296,7 @@ class Executor(executor.Executor):
             # If a_task is idempotent, we can do better and hash arguments.
             # It makes the workflow resistant to retries or variations on the
             # same task name (see #11).
-            arguments = json_dumps({"args": args, "kwargs": kwargs})
-            suffix = hashlib.md5(arguments.encode('utf-8')).hexdigest()
+            suffix = self._hash_task_arguments(a_task, args, kwargs)
 
         if isinstance(a_task, (WorkflowTask,)):
             # Some task types must have globally unique names.
@@ -242,10 +304,64 @@ class Executor(executor.Executor):
 
         task_id = '{name}-{suffix}'.format(name=a_task.name, suffix=suffix)
         if len(task_id) > 256:  # Better safe than sorry...
-            task_id = task_id[0:223] + "-" + hashlib.md5(task_id.encode('utf-8')).hexdigest()
+            if self._get_task_id_hash() == 'fast':
+                task_id = task_id[0:238] + "-" + fast_hash(task_id.encode('utf-8'))
+            else:
+                task_id = task_id[0:223] + "-" + hashlib.md5(task_id.encode('utf-8')).hexdigest()
 
         return task_id
 
+    def _hash_task_arguments(self, a_task, args, kwargs):
+        """
+        Hash the arguments of an idempotent task, memoized across replays.
+
+        :type a_task: ActivityTask | WorkflowTask
+        :type args: tuple
+        :type kwargs: dict
+        :rtype: str
+        """
+        hash_name = self._get_task_id_hash()
+        fingerprint = _arguments_fingerprint(args, kwargs)
+        if fingerprint is None:
+            return hash_task_arguments(hash_name, args, kwargs)
+        key = (hash_name, a_task.name, fingerprint)
+        suffix = _task_id_cache.get(key)
+        if suffix is None:
+            suffix = hash_task_arguments(hash_name, args, kwargs)
+            if len(_task_id_cache) >= TASK_ID_CACHE_SIZE:
+                _task_id_cache.clear()
+            _task_id_cache[key] = suffix
+        return suffix
+
+    def _get_task_id_hash(self):
+        """
+        Hash used for idempotent task IDs in this execution: the workflow's
+        `task_id_hash`, unless the history already has md5-based IDs, so
+        running executions keep matching their tasks.
+
+        :rtype: str
+        """
+        if self._task_id_hash is None:
+            hash_name = getattr(self.workflow_class, 'task_id_hash', 'md5')
+            if hash_name != 'md5':
+                for history in (self._history, self.repair_with):
+                    if history is not None and self._has_legacy_task_ids(history):
+                        hash_name = 'md5'
+                        break
+            self._task_id_hash = hash_name
+        return self._task_id_hash
+
+    @staticmethod
+    def _has_legacy_task_ids(history):
+        """
+        :type history: simpleflow.history.History
+        :rtype: bool
+        """
+        for task_id in itertools.chain(history.activities, history.child_workflows):
+            if LEGACY_TASK_ID_RE.search(task_id):
+                return True
+        return False
+
     def _get_future_from_activity_event(self, event):
         """Maps an activity event to a Future with the corresponding state.
 
@@ -508,16 +624,11 @@ class Executor(executor.Executor):
         :return:
         :rtype: Optional[dict]
         """
-        # FIXME could look directly in signaled_workflows?
         event = history.signals.get(a_task.name)
         if not event:
             if a_task.workflow_id is None:  # Broadcast, should be in signals
                 return None
-            signaled_workflows = history.signaled_workflows.get(a_task.name, [])
-            for w in signaled_workflows:
-                if w['workflow_id'] == a_task.workflow_id and (a_task.run_id is None or w['run_id'] == a_task.run_id):
-                    event = w
-                    break
+            event = history.find_signaled_workflow(a_task.name, a_task.workflow_id, a_task.run_id)
         return event
 
     def find_marker_event(self, a_task, history):
@@ -531,17 +642,7 @@ class Executor(executor.Executor):
         :return:
         :rtype: Optional[dict[str, Any]]
         """
-        json_details = a_task.get_json_details()
-        marker_list = history.markers.get(a_task.name)
-        if not marker_list:
-            return None
-        marker_list = list(
-            filter(
-                lambda m: m['state'] == 'recorded' and m['details'] == json_details,
-                marker_list
-            )
-        )
-        return marker_list[-1] if marker_list else None
+        return history.find_recorded_marker(a_task.name, a_task.get_json_details())
 
     def find_timer_event(self, a_task, history):
         """
@@ -675,9 +776,10 @@ class Executor(executor.Executor):
         # schedule the requested task and block execution instead, with a timer
         # to wake up the workflow immediately after completing these decisions.
         # See: http://docs.aws.amazon.com/amazonswf/latest/developerguide/swf-dg-limits.html
-        # NB: here we use json.dumps, not json_dumps, since the serialization will
-        # happen inside boto.swf and is out of our control.
-        request_size = len(json.dumps(self._decisions_and_context.decisions + decisions))
+        # NB: the size of the already scheduled decisions is maintained by
+        # DecisionsAndContext, so only the new ones are serialized here.
+        decisions_size = sum(DecisionsAndContext.encoded_size(decision) for decision in decisions)
+        request_size = self._decisions_and_context.request_size(decisions_size, len(decisions))
         # We keep a 5kB of error margin for headers, json structure, and the
         # timer decision, and 32kB for the context, even if we don't use it now.
         if request_size > constants.MAX_REQUEST_SIZE - 5000 - 32000:
@@ -687,7 +789,7 @@ class Executor(executor.Executor):
             self._append_timer = True
             raise exceptions.ExecutionBlocked()
 
-        self._decisions_and_context.extend_decision(decisions)
+        self._decisions_and_context.extend_decision(decisions, decisions_size)
 
         # Check if we won't exceed max decisions -1
         # TODO: if we had exactly MAX_DECISIONS - 1 to take, this will wake up
@@ -903,11 +1005,20 @@ class Executor(executor.Executor):
         # noinspection PyUnresolvedReferences
         history = decision_response.history
         self._history = History(history)
-        self._history.parse()
+        self.parse_history(decision_response)
         self.build_run_context(decision_response)
         # noinspection PyUnresolvedReferences
         self._execution = decision_response.execution
 
+        self.nb_replays += 1
+        if self.can_skip_replay():
+            self.nb_skipped_replays += 1
+            logger.info('no new event changing the workflow state, skipping replay '
+                        '({}/{} replays skipped)'.format(self.nb_skipped_replays, self.nb_replays))
+            return DecisionsAndContext()
+
+        self.prefetch_jumbo_fields()
+
         workflow_started_event = history[0]
         input = workflow_started_event.input
         if input is None:
@@ -929,6 +1040,7 @@ class Executor(executor.Executor):
             self.propagate_signals()
             result = self.run_workflow(*args, **kwargs)
         except exceptions.ExecutionBlocked:
+            self.close_decision()
             logger.info('{} open activities ({} decisions)'.format(
                 self._open_activity_count,
                 len(self._decisions_and_context.decisions),
@@ -1000,6 +1112,61 @@ class Executor(executor.Executor):
             self.decref_workflow()
         return DecisionsAndContext([decision])
 
+    def defer(self, callback):
+        self._deferred.append(callback)
+
+    def close_decision(self):
+        """
+        Run the callbacks deferred until the decision is closed; they may
+        add decisions. If they're blocked, the next replay retries them.
+        """
+        deferred, self._deferred = self._deferred, []
+        for callback in deferred:
+            try:
+                callback()
+            except exceptions.ExecutionBlocked:
+                break
+
+    def can_skip_replay(self):
+        """
+        Check whether the workflow opted in for skipping replays and the new
+        events since the last decision can't change any future.
+
+        :rtype: bool
+        """
+        return self.workflow_class.skip_inert_replays and self._history.has_only_inert_new_events()
+
+    def parse_history(self, decision_response):
+        """
+        Parse the history, resuming from the history cache if enabled.
+
+        :param decision_response:
+        :type  decision_response: swf.responses.Response
+        """
+        # noinspection PyUnresolvedReferences
+        execution = decision_response.execution
+        if not settings.SIMPLEFLOW_ENABLE_HISTORY_CACHE or not execution:
+            self._history.parse()
+            return
+        cache = HistoryParseCache(size_limit=settings.SIMPLEFLOW_HISTORY_CACHE_SIZE_LIMIT)
+        self._history.parse(cache=cache, key=(execution.workflow_id, execution.run_id))
+
+    def prefetch_jumbo_fields(self):
+        """
+        Pull the jumbo fields of the history into the memory cache if the
+        workflow opted in.
+        """
+        if not self.workflow_class.prefetch_jumbo_fields:
+            return
+        start = time.time()
+        nb_fields = format.prefetch_jumbo_fields(
+            self._history.jumbo_fields(),
+            max_bytes=self.workflow_class.prefetch_jumbo_fields_max_bytes,
+            max_workers=settings.SIMPLEFLOW_JUMBO_FIELDS_PREFETCH_WORKERS,
+        )
+        if nb_fields:
+            logger.info('prefetched {} jumbo fields in {:.3f}s'.format(nb_fields, time.time() - start))
+
     def maybe_clear_execution_context(self):
         """
         Replace a null execution_context with an empty string if the preceding one was set.
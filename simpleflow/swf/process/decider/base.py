@@ -3,11 +3,19 @@ from __future__ import absolute_import
 import logging
 import multiprocessing
 import os
+import select
+import time
 
-from simpleflow import format
+import psutil
+from future.moves.queue import Empty
+
+from simpleflow import format, settings, utils
 import swf.actors
 import swf.exceptions
 import swf.models.decision
+from swf.models.history import History
+from swf.models.workflow import WorkflowExecution, WorkflowType
+from swf.responses import Response
 
 from simpleflow.process import Supervisor, with_state
 from simpleflow.swf.process import Poller
@@ -48,6 +56,14 @@ class DeciderPoller(Poller, swf.actors.Decider):
     :type _workflow_executors: Dict[str, Executor]
     :ivar nb_retries: # of retries allowed
     :type nb_retries: int
+    :ivar warm_workers: # of long-lived decider processes (0 to fork for each decision)
+    :type warm_workers: int
+    :ivar max_decisions_per_worker: # of decisions after which a long-lived process is recycled
+    :type max_decisions_per_worker: Optional[int]
+    :ivar max_worker_memory: RSS (MB) over which a long-lived process is recycled
+    :type max_worker_memory: Optional[int]
+    :ivar prefetch_decisions: # of decision tasks polled in advance (0 to poll sequentially)
+    :type prefetch_decisions: int
     """
     def __init__(self,
                  workflow_executors,  # type: List[Executor]
@@ -55,6 +71,10 @@ class DeciderPoller(Poller, swf.actors.Decider):
                  task_list,  # type: str
                  is_standalone,  # type: bool
                  nb_retries=3,  # type: int
+                 warm_workers=0,  # type: int
+                 max_decisions_per_worker=None,  # type: Optional[int]
+                 max_worker_memory=None,  # type: Optional[int]
+                 prefetch_decisions=0,  # type: int
                  *args,
                  **kwargs
                  ):
@@ -75,6 +95,17 @@ class DeciderPoller(Poller, swf.actors.Decider):
         behind this is to limit operational burden by having a single service
         handling multiple workflows.
 
+        By default, each decision is taken in a forked process. With
+        `warm_workers`, decisions are dispatched to a pool of long-lived
+        processes instead, which keep their loaded workflows and connections
+        and are recycled after `max_decisions_per_worker` decisions or when
+        their memory grows over `max_worker_memory`.
+
+        With `prefetch_decisions`, a child process polls decision tasks while the
+        current one is being decided, keeping at most `prefetch_decisions`
+        of them waiting. Tasks which waited past their start-to-close
+        timeout are dropped: SWF will schedule them again.
+
         :param workflow_executors: executors handling workflow executions.
         :type  workflow_executors: list[simpleflow.swf.executor.Executor]
 
@@ -101,6 +132,12 @@ class DeciderPoller(Poller, swf.actors.Decider):
         self.nb_retries = nb_retries
         self.domain = domain
         self.is_standalone = is_standalone
+        self.warm_workers = warm_workers or 0
+        self.max_decisions_per_worker = max_decisions_per_worker
+        self.max_worker_memory = max_worker_memory
+        self._worker_pool = None
+        self.prefetch_decisions = prefetch_decisions or 0
+        self._decision_duration = None
 
         # All executors must have the same domain.
         self._check_all_domains_identical()
@@ -144,6 +181,104 @@ class DeciderPoller(Poller, swf.actors.Decider):
             suffix = ''
         return '{}{}'.format(self.__class__.__name__, suffix)
 
+    def start(self):
+        try:
+            if self.prefetch_decisions:
+                self.start_pipelined()
+            else:
+                super(DeciderPoller, self).start()
+        finally:
+            if self._worker_pool:
+                self._worker_pool.stop()
+
+    @with_state('running')
+    def start_pipelined(self):
+        """
+        Same as Poller.start(), but a DecisionPrefetcher child process polls
+        decision tasks in advance while decisions are taken.
+        """
+        logger.info("starting %s on domain %s (prefetching %d decision tasks)",
+                    self.name, self.domain.name, self.prefetch_decisions)
+        self.bind_signal_handlers()
+        self.is_alive = True
+        self.set_process_name()
+        prefetcher = DecisionPrefetcher(self, self.prefetch_decisions)
+        prefetcher.start()
+        nb_expired = 0
+        try:
+            while True:
+                if not self.is_alive:
+                    prefetcher.stop()
+                try:
+                    item = prefetcher.get(timeout=1)
+                except Empty:
+                    if not prefetcher.is_alive():
+                        break
+                    continue
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                decision_response, deadline = item
+                if not self.process_prefetched(decision_response, deadline):
+                    nb_expired += 1
+        finally:
+            prefetcher.terminate()
+        logger.info("%s: polled %d decision tasks, dropped %d expired ones",
+                    self.name, prefetcher.nb_polled, nb_expired)
+
+    def process_prefetched(self, decision_response, deadline):
+        """
+        Process a prefetched decision task, unless it cannot be completed in
+        time anymore.
+
+        :param decision_response:
+        :type decision_response: swf.responses.Response
+        :param deadline: time before which the task must be completed
+        :type deadline: Optional[float]
+        :return: whether the task was processed
+        :rtype: bool
+        """
+        if deadline is not None and time.time() + (self._decision_duration or 0) > deadline:
+            logger.warning(
+                "dropping decision task for workflow_id={} run_id={}: expired while queued".format(
+                    decision_response.execution.workflow_id,
+                    decision_response.execution.run_id,
+                ))
+            return False
+        self.process(decision_response)
+        return True
+
+    def record_decision_duration(self, duration):
+        """
+        Account for the duration of a decision, as measured by the process
+        which took it, in the moving average used to drop expired tasks.
+
+        :param duration: seconds
+        :type duration: float
+        """
+        if self._decision_duration is None:
+            self._decision_duration = duration
+        else:
+            self._decision_duration = 0.8 * self._decision_duration + 0.2 * duration
+
+    @property
+    def worker_pool(self):
+        """
+        Pool of long-lived decider processes, created lazily in the poller
+        process.
+
+        :rtype: Optional[DeciderWorkerPool]
+        """
+        if self.warm_workers and self._worker_pool is None:
+            self._worker_pool = DeciderWorkerPool(
+                self,
+                self.warm_workers,
+                max_decisions=self.max_decisions_per_worker,
+                max_memory=self.max_worker_memory,
+            )
+        return self._worker_pool
+
     @with_state('polling')
     def poll(self, task_list=None, identity=None, **kwargs):
         return swf.actors.Decider.poll(self, task_list, identity, **kwargs)
@@ -168,12 +303,18 @@ class DeciderPoller(Poller, swf.actors.Decider):
         Take a PollForDecisionTask response object and try to complete the
         decision task, by calling self._complete() with the response token and
         a set of decisions. We fork so it protects us reliably against memory
-        leaks on long-running deciders.
+        leaks on long-running deciders; with warm workers, the decision is
+        handed over to a long-lived process, recycled regularly instead.
 
         :param decision_response: an object wrapping the PollForDecisionTask response.
         :type  decision_response: swf.responses.Response
         """
-        spawn(self, decision_response)
+        if self.worker_pool:
+            self.worker_pool.submit(decision_response)
+        else:
+            start = time.time()
+            spawn(self, decision_response)
+            self.record_decision_duration(time.time() - start)
 
     @with_state('deciding')
     def decide(self, decision_response):
@@ -249,7 +390,8 @@ def process_decision(poller, decision_response):
     workflow_str = "workflow {} ({})".format(workflow_id, poller.workflow_name)
     logger.debug("process_decision() pid={}".format(os.getpid()))
     logger.info("taking decision for {}".format(workflow_str))
-    format.JUMBO_FIELDS_MEMORY_CACHE.clear()
+    if not settings.SIMPLEFLOW_JUMBO_FIELDS_MEMORY_CACHE_PERSISTENT:
+        format.JUMBO_FIELDS_MEMORY_CACHE.clear()
     decisions = poller.decide(decision_response)
     try:
         logger.info("completing decision for {}".format(workflow_str))
@@ -266,3 +408,333 @@ def spawn(poller, decision_response):
     )
     worker.start()
     worker.join()
+
+
+def dump_decision_response(decision_response):
+    """
+    Convert a decision response to a picklable dict.
+
+    :param decision_response:
+    :type decision_response: swf.responses.Response
+    :rtype: dict[str, Any]
+    """
+    execution = decision_response.execution
+    return {
+        'token': decision_response.token,
+        'events': [event.raw for event in decision_response.history.events],
+        'workflow_id': execution.workflow_id,
+        'run_id': execution.run_id,
+        'workflow_type': {
+            'name': execution.workflow_type.name,
+            'version': execution.workflow_type.version,
+        },
+    }
+
+
+def load_decision_response(domain, data):
+    """
+    Build a decision response from dump_decision_response's output.
+
+    :param domain:
+    :type domain: swf.models.Domain
+    :param data:
+    :type data: dict[str, Any]
+    :rtype: swf.responses.Response
+    """
+    workflow_type = WorkflowType(
+        domain=domain,
+        name=data['workflow_type']['name'],
+        version=data['workflow_type']['version'],
+    )
+    execution = WorkflowExecution(
+        domain=domain,
+        workflow_id=data['workflow_id'],
+        run_id=data['run_id'],
+        workflow_type=workflow_type,
+    )
+    history = History.from_event_list(data['events'])
+    return Response(token=data['token'], history=history, execution=execution)
+
+
+def run_warm_worker(poller, conn, parent_pid, max_decisions=None, max_memory=None):
+    """
+    Main loop of a long-lived decider process: take decisions sent by the
+    poller until asked to stop or recycling is needed.
+
+    :param poller:
+    :type poller: DeciderPoller
+    :param conn: pipe to the poller process
+    :type conn: multiprocessing.connection.Connection
+    :param parent_pid: poller pid; we exit if it goes away
+    :type parent_pid: int
+    :param max_decisions: # of decisions before recycling
+    :type max_decisions: Optional[int]
+    :param max_memory: RSS (MB) over which we recycle
+    :type max_memory: Optional[int]
+    """
+    logger.debug("run_warm_worker() pid={}".format(os.getpid()))
+    process = psutil.Process()
+    nb_decisions = 0
+    while True:
+        if not conn.poll(1):
+            if os.getppid() != parent_pid:
+                logger.warning("poller process {} is gone, exiting".format(parent_pid))
+                return
+            continue
+        try:
+            data = conn.recv()
+        except EOFError:
+            return
+        if data is None:
+            return
+        start = time.time()
+        process_decision(poller, load_decision_response(poller.domain, data))
+        duration = time.time() - start
+        nb_decisions += 1
+
+        recycle = bool(max_decisions and nb_decisions >= max_decisions)
+        if max_memory:
+            rss = process.memory_info().rss
+            if rss > max_memory * 1024 ** 2:
+                logger.info("warm worker pid={} uses {} bytes, recycling".format(os.getpid(), rss))
+                recycle = True
+        conn.send((recycle, duration))
+        if recycle:
+            return
+
+
+class WarmWorker(object):
+    """
+    Handle on a long-lived decider process, from the poller side.
+
+    :ivar busy: whether a decision is in progress
+    :type busy: bool
+    """
+    def __init__(self, poller, max_decisions=None, max_memory=None):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=run_warm_worker,
+            args=(poller, child_conn, os.getpid(), max_decisions, max_memory),
+        )
+        self.process.start()
+        child_conn.close()
+        self.busy = False
+        self.alive = True
+
+    def send(self, data):
+        self.busy = True
+        self.conn.send(data)
+
+    def wait_done(self):
+        """
+        Collect the result of the current decision; the process may exit
+        afterwards (recycling) or may have died during the decision.
+
+        :return: duration of the decision, None if the process died
+        :rtype: Optional[float]
+        """
+        self.busy = False
+        try:
+            recycle, duration = self.conn.recv()
+        except EOFError:
+            logger.error("warm worker pid={} died while deciding".format(self.process.pid))
+            recycle, duration = True, None
+        if recycle:
+            self.alive = False
+            self.conn.close()
+            self.process.join()
+        return duration
+
+    def stop(self):
+        if self.busy:
+            self.wait_done()
+        if self.alive:
+            self.alive = False
+            try:
+                self.conn.send(None)
+            except (IOError, OSError):
+                pass
+            self.conn.close()
+            self.process.join()
+
+
+class DeciderWorkerPool(object):
+    """
+    Pool of long-lived decider processes, belonging to a poller process.
+
+    :ivar _workers: worker handles
+    :type _workers: list[WarmWorker]
+    """
+    def __init__(self, poller, size, max_decisions=None, max_memory=None):
+        self._poller = poller
+        self._size = size
+        self._max_decisions = max_decisions
+        self._max_memory = max_memory
+        self._workers = []
+
+    @property
+    def pids(self):
+        return [worker.process.pid for worker in self._workers]
+
+    def _start_worker(self):
+        worker = WarmWorker(self._poller, self._max_decisions, self._max_memory)
+        logger.debug("started warm worker pid={}".format(worker.process.pid))
+        self._workers.append(worker)
+        return worker
+
+    def _reap(self, worker):
+        duration = worker.wait_done()
+        if duration is not None:
+            self._poller.record_decision_duration(duration)
+        if not worker.alive:
+            self._workers.remove(worker)
+
+    def _get_idle_worker(self):
+        """
+        Get an idle worker, waiting for a decision to finish if needed.
+
+        :rtype: WarmWorker
+        """
+        while True:
+            for worker in self._workers:
+                if not worker.busy:
+                    return worker
+            if len(self._workers) < self._size:
+                return self._start_worker()
+            ready, _, _ = select.select([worker.conn for worker in self._workers], [], [])
+            for worker in list(self._workers):
+                if worker.conn in ready:
+                    self._reap(worker)
+
+    def submit(self, decision_response):
+        """
+        Send a decision to an idle worker; doesn't wait for the decision to
+        be taken.
+
+        :param decision_response:
+        :type decision_response: swf.responses.Response
+        """
+        worker = self._get_idle_worker()
+        worker.send(dump_decision_response(decision_response))
+
+    def stop(self):
+        """
+        Wait for in-progress decisions and stop the workers.
+        """
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+
+
+def get_decision_deadline(decision_response, polled_at):
+    """
+    Compute the time before which a decision task must be completed, from the
+    start-to-close timeout of its DecisionTaskScheduled event.
+
+    :param decision_response:
+    :type decision_response: swf.responses.Response
+    :param polled_at: time the task was polled at
+    :type polled_at: float
+    :return: deadline, or None if no timeout
+    :rtype: Optional[float]
+    """
+    for event in reversed(decision_response.history.events):
+        if event.type == 'DecisionTask' and event.state == 'scheduled':
+            timeout = getattr(event, 'start_to_close_timeout', None)
+            if timeout and timeout != 'NONE':
+                return polled_at + int(timeout)
+            break
+    return None
+
+
+class DecisionPrefetcher(object):
+    """
+    Process polling decision tasks in advance for a DeciderPoller.
+
+    Polling runs in a child process rather than in a thread, so the poller
+    process stays single-threaded while it forks the deciding processes. The
+    child uses its own SWF connection.
+
+    Backpressure: a slot is taken before polling and only released when a
+    task is taken out of the queue, so no more than `size` tokens are held
+    waiting for a decision.
+
+    :ivar nb_polled: # of decision tasks received
+    :type nb_polled: int
+    """
+    def __init__(self, poller, size, decider=None):
+        self._poller = poller
+        self._decider = decider
+        self._slots = multiprocessing.Semaphore(size)
+        self._queue = multiprocessing.Queue()
+        self._stopping = multiprocessing.Event()
+        self._process = None
+        self.nb_polled = 0
+
+    def start(self):
+        self._process = multiprocessing.Process(target=self.run, args=(os.getpid(),))
+        self._process.daemon = True
+        self._process.start()
+
+    def run(self, parent_pid):
+        """
+        Main loop of the child process; it ends with a None item.
+        """
+        decider = self._decider or swf.actors.Decider(self._poller.domain, self._poller.task_list)
+        poll = utils.retry.with_delay(
+            nb_times=self._poller.nb_retries,
+            delay=utils.retry.exponential,
+            log_with=logger.exception,
+            on_exceptions=swf.exceptions.ResponseError,
+        )(decider.poll)
+        try:
+            while self._poller.is_alive and not self._stopping.is_set():
+                if os.getppid() != parent_pid:
+                    logger.warning("poller process {} is gone, exiting".format(parent_pid))
+                    return
+                if not self._slots.acquire(timeout=1):
+                    continue
+                try:
+                    decision_response = poll(self._poller.task_list, identity=self._poller.identity)
+                except swf.exceptions.PollTimeout:
+                    self._slots.release()
+                    continue
+                except Exception as err:
+                    self._queue.put(err)
+                    return
+                deadline = get_decision_deadline(decision_response, time.time())
+                self._queue.put((dump_decision_response(decision_response), deadline))
+        finally:
+            self._queue.put(None)
+
+    def get(self, timeout=None):
+        """
+        Get the next polled item: a (response, deadline) tuple, the exception
+        which stopped polling, or None once polling is over.
+
+        :raise Empty: nothing polled in `timeout` seconds.
+        """
+        item = self._queue.get(timeout=timeout)
+        if isinstance(item, tuple):
+            self._slots.release()
+            self.nb_polled += 1
+            data, deadline = item
+            item = load_decision_response(self._poller.domain, data), deadline
+        return item
+
+    def is_alive(self):
+        return self._process.is_alive()
+
+    def join(self, timeout=None):
+        self._process.join(timeout)
+
+    def stop(self):
+        """
+        Stop polling once the current poll is over.
+        """
+        self._stopping.set()
+
+    def terminate(self):
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process.join()
@@ -10,6 +10,8 @@ logger = logging.getLogger(__name__)
 def start(workflows, domain, task_list, log_level=None, nb_processes=None,
           repair_with=None, force_activities=None, is_standalone=False,
           repair_workflow_id=None, repair_run_id=None,
+          warm_workers=0, max_decisions_per_worker=None, max_worker_memory=None,
+          prefetch_decisions=0,
           ):
     """
     Start a decider.
@@ -33,6 +35,14 @@ def start(workflows, domain, task_list, log_level=None, nb_processes=None,
     :type repair_workflow_id: Optional[str]
     :param repair_run_id: run ID to repair
     :type repair_run_id: Optional[str]
+    :param warm_workers: # of long-lived decider processes per poller (0 to fork for each decision)
+    :type warm_workers: int
+    :param max_decisions_per_worker: # of decisions after which a long-lived process is recycled
+    :type max_decisions_per_worker: Optional[int]
+    :param max_worker_memory: RSS (MB) over which a long-lived process is recycled
+    :type max_worker_memory: Optional[int]
+    :param prefetch_decisions: # of decision tasks polled in advance (0 to poll sequentially)
+    :type prefetch_decisions: int
     """
     if log_level:
         logger.warning(
@@ -45,6 +55,10 @@ def start(workflows, domain, task_list, log_level=None, nb_processes=None,
         is_standalone=is_standalone,
         repair_workflow_id=repair_workflow_id,
         repair_run_id=repair_run_id,
+        warm_workers=warm_workers,
+        max_decisions_per_worker=max_decisions_per_worker,
+        max_worker_memory=max_worker_memory,
+        prefetch_decisions=prefetch_decisions,
     )
     decider.is_alive = True
     decider.start()
@@ -58,6 +58,8 @@ def make_decider_poller(workflows, domain, task_list, repair_with=None,
                         force_activities=None,
                         is_standalone=False,
                         repair_workflow_id=None, repair_run_id=None,
+                        warm_workers=0, max_decisions_per_worker=None, max_worker_memory=None,
+                        prefetch_decisions=0,
                         ):
     """
     Factory building a decider poller.
@@ -77,6 +79,14 @@ def make_decider_poller(workflows, domain, task_list, repair_with=None,
     :type repair_workflow_id: Optional[str]
     :param repair_run_id: run ID to repair
     :type repair_run_id: Optional[str]
+    :param warm_workers: # of long-lived decider processes (0 to fork for each decision)
+    :type warm_workers: int
+    :param max_decisions_per_worker: # of decisions after which a long-lived process is recycled
+    :type max_decisions_per_worker: Optional[int]
+    :param max_worker_memory: RSS (MB) over which a long-lived process is recycled
+    :type max_worker_memory: Optional[int]
+    :param prefetch_decisions: # of decision tasks polled in advance (0 to poll sequentially)
+    :type prefetch_decisions: int
     :return:
     :rtype: DeciderPoller
     """
@@ -97,13 +107,21 @@ def make_decider_poller(workflows, domain, task_list, repair_with=None,
         for workflow in workflows
         ]
     domain = swf.models.Domain(domain)
-    return DeciderPoller(executors, domain, task_list, is_standalone)
+    return DeciderPoller(
+        executors, domain, task_list, is_standalone,
+        warm_workers=warm_workers,
+        max_decisions_per_worker=max_decisions_per_worker,
+        max_worker_memory=max_worker_memory,
+        prefetch_decisions=prefetch_decisions,
+    )
 
 
 def make_decider(workflows, domain, task_list, nb_children=None,
                  repair_with=None, force_activities=None,
                  is_standalone=False,
                  repair_workflow_id=None, repair_run_id=None,
+                 warm_workers=0, max_decisions_per_worker=None, max_worker_memory=None,
+                 prefetch_decisions=0,
                  ):
     """
     Instantiate a Decider.
@@ -125,6 +143,14 @@ def make_decider(workflows, domain, task_list, nb_children=None,
     :type repair_workflow_id: Optional[str]
     :param repair_run_id: run ID to repair
     :type repair_run_id: Optional[str]
+    :param warm_workers: # of long-lived decider processes per poller
+    :type warm_workers: int
+    :param max_decisions_per_worker: # of decisions after which a long-lived process is recycled
+    :type max_decisions_per_worker: Optional[int]
+    :param max_worker_memory: RSS (MB) over which a long-lived process is recycled
+    :type max_worker_memory: Optional[int]
+    :param prefetch_decisions: # of decision tasks polled in advance (0 to poll sequentially)
+    :type prefetch_decisions: int
     :return:
     :rtype: Decider
     """
@@ -134,5 +160,9 @@ def make_decider(workflows, domain, task_list, nb_children=None,
                                  is_standalone=is_standalone,
                                  repair_workflow_id=repair_workflow_id,
                                  repair_run_id=repair_run_id,
+                                 warm_workers=warm_workers,
+                                 max_decisions_per_worker=max_decisions_per_worker,
+                                 max_worker_memory=max_worker_memory,
+                                 prefetch_decisions=prefetch_decisions,
                                  )
     return Decider(poller, nb_children=nb_children)
@@ -1,21 +1,30 @@
 from base64 import b64decode
+from contextlib import contextmanager
 import errno
+import heapq
+import importlib
+import itertools
 import logging
 import json
 import multiprocessing
 import os
+import random
+import select
 import signal
 import sys
+import threading
+import time
 import traceback
 import uuid
 
 import psutil
 
-from simpleflow import format
+from simpleflow import format, settings, utils
 from simpleflow.exceptions import ExecutionError
 import swf.actors
 import swf.exceptions
 from swf.models import ActivityTask as BaseActivityTask
+from swf.querysets import ActivityTypeQuerySet
 from swf.responses import Response
 from simpleflow.dispatch import dynamic_dispatcher
 from simpleflow.download import download_binaries
@@ -23,12 +32,18 @@ from simpleflow.job import KubernetesJob
 from simpleflow.process import Supervisor, with_state
 from simpleflow.swf.constants import VALID_PROCESS_MODES
 from simpleflow.swf.process import Poller
+from simpleflow.swf.process.worker import progress
+from simpleflow.swf.process.worker.progress import ProgressChannel
 
 from simpleflow.swf.task import ActivityTask
 from simpleflow.swf.utils import sanitize_activity_context
 from simpleflow.utils import format_exc, json_dumps, to_k8s_identifier
 
 
+if False:
+    from typing import Iterable, List  # NOQA
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,7 +61,8 @@ class ActivityPoller(Poller, swf.actors.ActivityWorker):
     Polls an activity and handles it in the worker.
 
     """
-    def __init__(self, domain, task_list, heartbeat=60, process_mode=None, poll_data=None):
+    def __init__(self, domain, task_list, heartbeat=60, process_mode=None, poll_data=None, nb_slots=1,
+                 warm_executors=False, max_tasks_per_executor=None, heartbeat_fraction=None):
         """
 
         :param domain:
@@ -57,6 +73,15 @@ class ActivityPoller(Poller, swf.actors.ActivityWorker):
         :type heartbeat:
         :param process_mode: Whether to process locally (default) or spawn a Kubernetes job.
         :type process_mode: Optional[str]
+        :param nb_slots: # of tasks processed at once (local mode only).
+        :type nb_slots: int
+        :param warm_executors: Execute tasks in long-lived processes, one per slot, instead of forking for each task.
+        :type warm_executors: bool
+        :param max_tasks_per_executor: # of tasks after which a long-lived process is recycled
+        :type max_tasks_per_executor: Optional[int]
+        :param heartbeat_fraction: Heartbeat at this fraction of the heartbeat timeout of the task's activity type,
+            `heartbeat` being used for activity types without one.
+        :type heartbeat_fraction: Optional[float]
         """
         self.nb_retries = 3
         # heartbeat=0 is a special value to disable heartbeating. We want to
@@ -69,6 +94,13 @@ class ActivityPoller(Poller, swf.actors.ActivityWorker):
 
         self.poll_data = poll_data
         super(ActivityPoller, self).__init__(domain, task_list)
+        self.heartbeat_schedule = HeartbeatSchedule(domain, self._heartbeat, fraction=heartbeat_fraction)
+
+        self.nb_slots = nb_slots
+        self._slots = None  # Created when starting, see start_with_slots()
+        self.warm_executors = warm_executors
+        self.max_tasks_per_executor = max_tasks_per_executor
+        self._executor_pool = None
 
     @property
     def name(self):
@@ -77,6 +109,59 @@ class ActivityPoller(Poller, swf.actors.ActivityWorker):
             self.task_list,
         )
 
+    def start(self):
+        try:
+            if self.nb_slots > 1 and self.process_mode == 'local':
+                self.start_with_slots()
+            else:
+                super(ActivityPoller, self).start()
+        finally:
+            if self._executor_pool:
+                self._executor_pool.stop()
+
+    @with_state('running')
+    def start_with_slots(self):
+        """
+        Same as Poller.start(), but poll as long as a slot is free and let the
+        tasks run in the background.
+        """
+        self._slots = ActivitySlots(self, self.nb_slots, self._heartbeat, executor_pool=self.executor_pool)
+        logger.info("starting %s on domain %s with %d slots", self.name, self.domain.name, self._slots.nb_slots)
+        self.bind_signal_handlers()
+        self.is_alive = True
+        self.set_process_name()
+        self._slots.start()
+        try:
+            while self.is_alive and self._slots.acquire():
+                try:
+                    response = self.poll_with_retry()
+                except swf.exceptions.PollTimeout:
+                    self._slots.release()
+                    continue
+                except Exception:
+                    self._slots.release()
+                    raise
+                self.process(response)
+        finally:
+            self._slots.stop()
+            self._slots.join()
+
+    @property
+    def executor_pool(self):
+        """
+        Pool of long-lived processes executing the tasks, created lazily in
+        the poller process.
+
+        :rtype: Optional[ActivityExecutorPool]
+        """
+        if self.warm_executors and self._executor_pool is None and self.process_mode == 'local':
+            self._executor_pool = ActivityExecutorPool(
+                self,
+                max(self.nb_slots, 1),
+                max_tasks=self.max_tasks_per_executor,
+            )
+        return self._executor_pool
+
     @with_state('polling')
     def poll(self, task_list=None, identity=None):
         if self.poll_data:
@@ -108,6 +193,7 @@ class ActivityPoller(Poller, swf.actors.ActivityWorker):
         """
         token = response.task_token
         task = response.activity_task
+        heartbeat = self.heartbeat_schedule.get_interval(task) if self.process_mode == 'local' else None
         if self.process_mode == "kubernetes":
             try:
                 spawn_kubernetes_job(self, response.raw_response)
@@ -119,8 +205,12 @@ class ActivityPoller(Poller, swf.actors.ActivityWorker):
                     err,
                 )
                 self.fail_with_retry(token, task, reason)
+        elif self._slots is not None:
+            self._slots.launch(response, heartbeat)
+        elif self.executor_pool:
+            spawn_warm(self, response, heartbeat)
         else:
-            spawn(self, token, task, self._heartbeat)
+            spawn(self, token, task, heartbeat)
 
     @with_state('completing')
     def complete(self, token, result=None):
@@ -240,7 +330,7 @@ class ActivityWorker(object):
             poller.fail_with_retry(token, task, reason)
 
 
-def process_task(poller, token, task):
+def process_task(poller, token, task, progress_channel=None):
     """
 
     :param poller:
@@ -249,13 +339,100 @@ def process_task(poller, token, task):
     :type token: str
     :param task:
     :type task: swf.models.ActivityTask
+    :param progress_channel: where report_progress() writes to
+    :type progress_channel: Optional[ProgressChannel]
     """
     logger.debug('process_task() pid={}'.format(os.getpid()))
-    format.JUMBO_FIELDS_MEMORY_CACHE.clear()
+    progress.channel = progress_channel
+    if not settings.SIMPLEFLOW_JUMBO_FIELDS_MEMORY_CACHE_PERSISTENT:
+        format.JUMBO_FIELDS_MEMORY_CACHE.clear()
     worker = ActivityWorker()
     worker.process(poller, token, task)
 
 
+def preload_modules(modules):
+    """
+    Import modules in the current process, so that the processes forked
+    afterwards find them already loaded.
+    :param modules: module names
+    :type modules: Iterable[str]
+    """
+    for name in modules:
+        start = time.time()
+        importlib.import_module(name)
+        logger.info('preloaded module {} in {:.3f}s'.format(name, time.time() - start))
+
+
+class HeartbeatSchedule(object):
+    """
+    Heartbeat interval of the tasks: a fixed one, or with a `fraction`, this
+    fraction of the heartbeat timeout of their activity type give or take
+    `jitter`. Activity types are described once per process.
+    """
+    # Intervals are capped to this fraction of the heartbeat timeout, leaving
+    # some time for the heartbeat request itself
+    max_fraction = 0.9
+
+    def __init__(self, domain, interval, fraction=None, jitter=None):
+        """
+        :param domain:
+        :type domain: swf.models.Domain
+        :param interval: fixed interval (seconds), None to disable heartbeats
+        :type interval: Optional[float]
+        :param fraction: of the heartbeat timeout
+        :type fraction: Optional[float]
+        :param jitter: relative, defaults to settings.ACTIVITY_HEARTBEAT_JITTER
+        :type jitter: Optional[float]
+        :raise ValueError: if the intervals could reach the heartbeat timeout
+        """
+        self.domain = domain
+        self.interval = interval
+        self.fraction = fraction
+        self.jitter = settings.ACTIVITY_HEARTBEAT_JITTER if jitter is None else jitter
+        if not 0 <= self.jitter < 1:
+            raise ValueError('heartbeat jitter must be in [0, 1): {}'.format(self.jitter))
+        if fraction is not None and not 0 < fraction * (1 + self.jitter) < 1:
+            raise ValueError('heartbeat fraction {} with a jitter of {} is not in (0, 1)'.format(
+                fraction, self.jitter))
+        self._timeouts = {}
+
+    def get_timeout(self, activity_type):
+        """
+        Default heartbeat timeout of an activity type.
+        :param activity_type:
+        :type activity_type: swf.models.ActivityType
+        :return: seconds, None if no timeout
+        :rtype: Optional[int]
+        """
+        key = (activity_type.name, activity_type.version)
+        if key not in self._timeouts:
+            try:
+                model = ActivityTypeQuerySet(self.domain).get(*key)
+            except Exception as err:
+                # Not cached: we'll try again with the next task
+                logger.warning('cannot get heartbeat timeout of activity type {} {}: {}'.format(
+                    key[0], key[1], err))
+                return None
+            timeout = model.task_heartbeat_timeout
+            self._timeouts[key] = int(timeout) if timeout and timeout != 'NONE' else None
+        return self._timeouts[key]
+
+    def get_interval(self, task):
+        """
+        :param task:
+        :type task: swf.models.ActivityTask
+        :return: heartbeat interval (seconds), None if disabled
+        :rtype: Optional[float]
+        """
+        if not self.interval or not self.fraction:
+            return self.interval
+        timeout = self.get_timeout(task.activity_type)
+        if not timeout:
+            return self.interval
+        interval = timeout * self.fraction * random.uniform(1 - self.jitter, 1 + self.jitter)
+        return min(interval, timeout * self.max_fraction)
+
+
 def spawn_kubernetes_job(poller, swf_response):
     job = KubernetesJob(poller.job_name, poller.domain.name, swf_response)
     job.schedule()
@@ -274,9 +451,10 @@ def spawn(poller, token, task, heartbeat=60):
     :type heartbeat: int
     """
     logger.debug('spawn() pid={} heartbeat={}'.format(os.getpid(), heartbeat))
+    progress_channel = ProgressChannel()
     worker = multiprocessing.Process(
         target=process_task,
-        args=(poller, token, task),
+        args=(poller, token, task, progress_channel),
     )
     worker.start()
 
@@ -303,46 +481,596 @@ def spawn(poller, token, task, heartbeat=60):
                         worker.exitcode)
                 )
             return
-        try:
-            logger.debug(
-                'heartbeating for pid={} (token={})'.format(worker.pid, token)
-            )
-            response = poller.heartbeat(token)
-        except swf.exceptions.DoesNotExistError as error:
-            # Either the task or the workflow execution no longer exists,
-            # let's kill the worker process.
-            logger.warning('heartbeat failed: {}'.format(error))
-            logger.warning('killing (KILL) worker with pid={}'.format(worker.pid))
-            try:
-                # The try/except protects us from a race condition: by the
-                # time we issue the os.kill() call, we're not 100% sure
-                # that the worker process is still alive.
-                os.kill(worker.pid, signal.SIGKILL)
-            except OSError as e:
-                # Compare errno to the errno for "No such process"
-                if e.errno != errno.ESRCH:
-                    # re-raise if we get an OSError for another reason
-                    raise
-                logger.warning('process was not here anymore, got OSError: {}'.format(e.strerror))
+        if not send_heartbeat(poller, token, task, worker, details=progress_channel.read()):
             return
-        except swf.exceptions.RateLimitExceededError as error:
-            # ignore rate limit errors: high chances the next heartbeat will be
-            # ok anyway, so it would be stupid to break the task for that
-            logger.warning(
-                'got a "ThrottlingException / Rate exceeded" when heartbeating for task {}: {}'.format(
-                    task.activity_type.name,
-                    error))
+
+
+def spawn_warm(poller, response, heartbeat=60):
+    """
+    Execute a task in the poller's pool of long-lived processes and wait for
+    it to end, sending heartbeats to SWF.
+    :param poller:
+    :type poller: ActivityPoller
+    :param response: activity task poll response
+    :type response: swf.responses.Response
+    :param heartbeat: heartbeat delay (seconds)
+    :type heartbeat: int
+    """
+    token = response.task_token
+    task = response.activity_task
+    worker = poller.executor_pool.submit(response)
+    logger.debug('spawn_warm() pid={} heartbeat={}'.format(worker.pid, heartbeat))
+    while True:
+        worker.join(timeout=heartbeat)
+        if not worker.is_alive():
+            if worker.exitcode != 0:
+                poller.fail_with_retry(
+                    token,
+                    task,
+                    reason='process {} died: exit code {}'.format(
+                        worker.pid,
+                        worker.exitcode)
+                )
+            return
+        if not send_heartbeat(poller, token, task, worker, details=worker.progress.read()):
+            return
+
+
+def run_warm_executor(poller, conn, parent_pid, max_tasks=None, progress_channel=None):
+    """
+    Main loop of a long-lived activity process: execute the tasks sent by
+    the poller until asked to stop or recycling is needed.
+
+    :param poller:
+    :type poller: ActivityPoller
+    :param conn: pipe to the poller process
+    :type conn: multiprocessing.connection.Connection
+    :param parent_pid: poller pid; we exit if it goes away
+    :type parent_pid: int
+    :param max_tasks: # of tasks before recycling
+    :type max_tasks: Optional[int]
+    :param progress_channel: where report_progress() writes to
+    :type progress_channel: Optional[ProgressChannel]
+    """
+    logger.debug('run_warm_executor() pid={}'.format(os.getpid()))
+    nb_tasks = 0
+    while True:
+        if not conn.poll(1):
+            if os.getppid() != parent_pid:
+                logger.warning('poller process {} is gone, exiting'.format(parent_pid))
+                return
             continue
-        except Exception as error:
-            # Let's crash if it cannot notify the heartbeat failed.  The
-            # subprocess will become orphan and the heartbeat timeout may
-            # eventually trigger on Amazon SWF side.
-            logger.error('cannot send heartbeat for task {}: {}'.format(
+        try:
+            data = conn.recv()
+        except EOFError:
+            return
+        if data is None:
+            return
+        task = BaseActivityTask.from_poll(poller.domain, poller.task_list, data)
+        process_task(poller, task.task_token, task, progress_channel)
+        nb_tasks += 1
+
+        # SIGTERM (see Poller.bind_signal_handlers) lets the task end, then
+        # stops the process.
+        recycle = bool(max_tasks and nb_tasks >= max_tasks) or not poller.is_alive
+        conn.send(recycle)
+        if recycle:
+            return
+
+
+class WarmExecutor(object):
+    """
+    Handle on a long-lived activity process, from the poller side. It
+    quacks like the multiprocessing.Process a task would run in otherwise:
+    is_alive(), join() and exitcode are about the current task.
+
+    :ivar busy: whether a task is in progress
+    :type busy: bool
+    :ivar exitcode: None while the task runs, 0 once done, or the exit code
+    of the process if it died during the task
+    :type exitcode: Optional[int]
+    :ivar progress: progress details of the current task
+    :type progress: ProgressChannel
+    """
+    def __init__(self, poller, max_tasks=None):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.progress = ProgressChannel()
+        self.process = multiprocessing.Process(
+            target=run_warm_executor,
+            args=(poller, child_conn, os.getpid(), max_tasks, self.progress),
+        )
+        self.process.start()
+        child_conn.close()
+        self.busy = False
+        self.alive = True
+        self.exitcode = None
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def send(self, data):
+        self.busy = True
+        self.exitcode = None
+        self.progress.clear()
+        self.conn.send(data)
+
+    def join(self, timeout=None):
+        """
+        Wait for the current task to end.
+        :param timeout: seconds, None to wait until it ends
+        :type timeout: Optional[float]
+        """
+        if self.busy and self.conn.poll(timeout):
+            self._collect()
+
+    def is_alive(self):
+        self.join(0)
+        return self.busy
+
+    def terminate(self):
+        self.process.terminate()
+
+    def _collect(self):
+        """
+        Collect the end of the current task; the process may exit afterwards
+        (recycling) or may have died during the task.
+        """
+        self.busy = False
+        try:
+            recycle = self.conn.recv()
+            self.exitcode = 0
+        except EOFError:
+            self.process.join()
+            self.exitcode = self.process.exitcode
+            logger.error('warm executor pid={} died while executing a task: exit code {}'.format(
+                self.pid, self.exitcode))
+            recycle = True
+        if recycle:
+            self.alive = False
+            self.conn.close()
+            self.process.join()
+
+    def stop(self):
+        self.join()
+        if self.alive:
+            self.alive = False
+            try:
+                self.conn.send(None)
+            except (IOError, OSError):
+                pass
+            self.conn.close()
+            self.process.join()
+
+
+class ActivityExecutorPool(object):
+    """
+    Pool of long-lived processes executing activity tasks, belonging to a
+    poller process. The modules loaded by a task stay loaded for the next
+    ones; processes are recycled after `max_tasks` tasks.
+
+    :ivar _executors: executor handles
+    :type _executors: list[WarmExecutor]
+    """
+    def __init__(self, poller, size, max_tasks=None):
+        self._poller = poller
+        self._size = size
+        self._max_tasks = max_tasks
+        self._executors = []
+
+    @property
+    def pids(self):
+        return [executor.pid for executor in self._executors]
+
+    def _start_executor(self):
+        executor = WarmExecutor(self._poller, self._max_tasks)
+        logger.debug('started warm executor pid={}'.format(executor.pid))
+        self._executors.append(executor)
+        return executor
+
+    def _get_idle_executor(self):
+        """
+        Get an idle executor, waiting for a task to end if needed.
+
+        :rtype: WarmExecutor
+        """
+        while True:
+            self._executors = [executor for executor in self._executors if executor.alive]
+            for executor in self._executors:
+                if not executor.busy:
+                    return executor
+            if len(self._executors) < self._size:
+                return self._start_executor()
+            ready, _, _ = select.select([executor.conn for executor in self._executors], [], [])
+            for executor in self._executors:
+                if executor.conn in ready:
+                    executor.join()
+
+    def submit(self, response):
+        """
+        Send a task to an idle executor; doesn't wait for it to end.
+
+        :param response: activity task poll response
+        :type response: swf.responses.Response
+        :return: executor running the task
+        :rtype: WarmExecutor
+        """
+        executor = self._get_idle_executor()
+        executor.send(response.raw_response)
+        return executor
+
+    def stop(self):
+        """
+        Wait for in-progress tasks and stop the executors.
+        """
+        for executor in self._executors:
+            executor.stop()
+        self._executors = []
+
+
+def send_heartbeat(actor, token, task, worker, ignore_rate_limit=True, details=None):
+    """
+    Heartbeat for a task, killing its process if SWF doesn't know it anymore
+    or terminating it if it was cancelled.
+    :param actor: object used to send the heartbeat
+    :type actor: swf.actors.ActivityWorker
+    :param token:
+    :type token: str
+    :param task:
+    :type task: swf.models.ActivityTask
+    :param worker: process executing the task
+    :type worker: multiprocessing.Process | WarmExecutor
+    :param ignore_rate_limit: if False, let RateLimitExceededError through
+    :type ignore_rate_limit: bool
+    :param details: progress details
+    :type details: Optional[str]
+    :return: whether the process is still running the task
+    :rtype: bool
+    """
+    try:
+        logger.debug(
+            'heartbeating for pid={} (token={})'.format(worker.pid, token)
+        )
+        response = actor.heartbeat(token, details=details)
+    except swf.exceptions.DoesNotExistError as error:
+        # Either the task or the workflow execution no longer exists,
+        # let's kill the worker process.
+        logger.warning('heartbeat failed: {}'.format(error))
+        logger.warning('killing (KILL) worker with pid={}'.format(worker.pid))
+        try:
+            # The try/except protects us from a race condition: by the
+            # time we issue the os.kill() call, we're not 100% sure
+            # that the worker process is still alive.
+            os.kill(worker.pid, signal.SIGKILL)
+        except OSError as e:
+            # Compare errno to the errno for "No such process"
+            if e.errno != errno.ESRCH:
+                # re-raise if we get an OSError for another reason
+                raise
+            logger.warning('process was not here anymore, got OSError: {}'.format(e.strerror))
+        return False
+    except swf.exceptions.RateLimitExceededError as error:
+        if not ignore_rate_limit:
+            raise
+        # ignore rate limit errors: high chances the next heartbeat will be
+        # ok anyway, so it would be stupid to break the task for that
+        logger.warning(
+            'got a "ThrottlingException / Rate exceeded" when heartbeating for task {}: {}'.format(
                 task.activity_type.name,
                 error))
-            raise
+        return True
+    except Exception as error:
+        # Let's crash if it cannot notify the heartbeat failed.  The
+        # subprocess will become orphan and the heartbeat timeout may
+        # eventually trigger on Amazon SWF side.
+        logger.error('cannot send heartbeat for task {}: {}'.format(
+            task.activity_type.name,
+            error))
+        raise
+
+    if response and response.get('cancelRequested'):
+        # Task cancelled.
+        worker.terminate()  # SIGTERM
+        return False
+    return True
+
+
+class RunningTask(object):
+    """
+    Activity task executed by a process of an ActivitySlots.
+    """
+    def __init__(self, token, task, worker, heartbeat, progress_channel=None):
+        self.token = token
+        self.task = task
+        self.worker = worker
+        self.heartbeat = heartbeat
+        self.progress = progress_channel
+        # Killed or terminated after a heartbeat: not to be failed
+        self.stopped = False
+
+
+class HeartbeatService(threading.Thread):
+    """
+    Thread heartbeating for all the tasks in flight of a worker process.
+
+    The first heartbeat of a task happens at a random point of its interval,
+    so tasks started together don't heartbeat together. When SWF throttles
+    us, all the heartbeats are delayed, with an exponential backoff. A
+    cancelled task's process is terminated as soon as the heartbeat response
+    is received.
+
+    :ivar nb_heartbeats: # of heartbeats sent
+    :type nb_heartbeats: int
+    """
+    # Backoff delays (seconds) after a RateLimitExceededError
+    min_backoff = 1
+    max_backoff = 60
+
+    def __init__(self, poller, actor=None):
+        super(HeartbeatService, self).__init__(name='HeartbeatService')
+        self.daemon = True
+        self._actor = actor or swf.actors.ActivityWorker(poller.domain, poller.task_list)
+        self._condition = threading.Condition()
+        self._schedule = []  # heap of (time, seq, RunningTask)
+        self._seq = itertools.count()
+        self._tasks = set()
+        self._sending = None  # task whose heartbeat is in progress
+        self._backoff = 0
+        self._paused_until = 0
+        self._stopping = False
+        self.nb_heartbeats = 0
+
+    def add(self, running):
+        """
+        Start heartbeating for a task, unless heartbeats are disabled.
+        :param running:
+        :type running: RunningTask
+        """
+        if not running.heartbeat:
+            return
+        with self._condition:
+            self._tasks.add(running)
+            self._push(time.time() + running.heartbeat * random.random(), running)
+
+    def remove(self, running):
+        """
+        Stop heartbeating for a task; wait for its heartbeat in progress if
+        any, so that `running.stopped` is up to date.
+        :param running:
+        :type running: RunningTask
+        """
+        with self._condition:
+            self._tasks.discard(running)
+            while self._sending is running:
+                self._condition.wait()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+    def _push(self, when, running):
+        heapq.heappush(self._schedule, (when, next(self._seq), running))
+        self._condition.notify_all()
+
+    def _next(self):
+        """
+        Wait for the next heartbeat to send.
+        :return: task and time it was scheduled at, or None if stopping
+        :rtype: Optional[(RunningTask, float)]
+        """
+        with self._condition:
+            while not self._stopping:
+                now = time.time()
+                if self._schedule:
+                    when, _, running = self._schedule[0]
+                    if running not in self._tasks:
+                        heapq.heappop(self._schedule)
+                        continue
+                    delay = max(when, self._paused_until) - now
+                    if delay <= 0:
+                        heapq.heappop(self._schedule)
+                        self._sending = running
+                        return running, when
+                else:
+                    delay = None
+                self._condition.wait(delay)
+        return None
+
+    def run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            self._send(*item)
 
-        if response and response.get('cancelRequested'):
-            # Task cancelled.
-            worker.terminate()  # SIGTERM
+    def _send(self, running, scheduled_at):
+        try:
+            is_running = send_heartbeat(
+                self._actor, running.token, running.task, running.worker,
+                ignore_rate_limit=False,
+                details=running.progress.read() if running.progress else None,
+            )
+        except swf.exceptions.RateLimitExceededError as error:
+            with self._condition:
+                self._sending = None
+                self._backoff = min(max(self._backoff * 2, self.min_backoff), self.max_backoff)
+                self._paused_until = time.time() + self._backoff
+                logger.warning('heartbeats throttled, pausing them for {}s: {}'.format(self._backoff, error))
+                self._push(self._paused_until, running)
             return
+        except Exception:
+            # Don't stop heartbeating for the other tasks; SWF may time this
+            # one out.
+            is_running = True
+        with self._condition:
+            self._sending = None
+            self.nb_heartbeats += 1
+            self._backoff = 0
+            if not is_running:
+                running.stopped = True
+                self._tasks.discard(running)
+            elif running in self._tasks:
+                # Keep the task's phase, unless we're late
+                self._push(max(scheduled_at + running.heartbeat, time.time()), running)
+            self._condition.notify_all()
+
+
+@contextmanager
+def logging_locked():
+    """
+    Hold the locks of the logging module and of its handlers, e.g. while
+    forking: the child process would otherwise inherit a lock held by
+    another thread in the middle of a log call (on Python 2, they aren't
+    reinitialized after a fork).
+    """
+    logging._acquireLock()
+    try:
+        handlers = [ref() for ref in logging._handlerList]
+        handlers = [handler for handler in handlers if handler is not None]
+        for handler in handlers:
+            handler.acquire()
+        try:
+            yield
+        finally:
+            for handler in reversed(handlers):
+                handler.release()
+    finally:
+        logging._releaseLock()
+
+
+class ActivitySlots(threading.Thread):
+    """
+    Thread running up to `nb_slots` activity tasks at once for an
+    ActivityPoller, each one in its own process, and heartbeating for all of
+    them.
+
+    A slot is taken before polling and released when the task's process
+    ends. It uses its own SWF connection since the poller's one is used for
+    polling; heartbeats are sent by a HeartbeatService. With an
+    `executor_pool`, tasks are executed by its long-lived processes instead
+    of forked ones.
+
+    Processes are forked while holding the logging locks, see
+    logging_locked().
+    """
+    # Delay (seconds) between checks for ended processes
+    tick = 1
+
+    def __init__(self, poller, nb_slots, heartbeat=60, worker=None, executor_pool=None):
+        super(ActivitySlots, self).__init__(name='ActivitySlots')
+        self.daemon = True
+        self._poller = poller
+        self._executor_pool = executor_pool
+        self._worker = worker or swf.actors.ActivityWorker(poller.domain, poller.task_list)
+        self._heartbeater = HeartbeatService(poller, actor=worker)
+        self.nb_slots = nb_slots
+        self._heartbeat = heartbeat or None
+        self._condition = threading.Condition()
+        self._nb_free = nb_slots
+        self._tasks = []  # type: List[RunningTask]
+        self._stopping = False
+
+    @property
+    def nb_running(self):
+        return len(self._tasks)
+
+    def acquire(self):
+        """
+        Take a slot, waiting for a task to end if there is no free one.
+        :return: False if the poller stopped meanwhile
+        :rtype: bool
+        """
+        with self._condition:
+            while not self._nb_free:
+                if not self._poller.is_alive:
+                    return False
+                self._condition.wait(self.tick)
+            self._nb_free -= 1
+            return True
+
+    def release(self):
+        with self._condition:
+            self._nb_free += 1
+            self._condition.notify_all()
+
+    def launch(self, response, heartbeat=None):
+        """
+        Execute a task in the background; its slot must have been acquired.
+        :param response: activity task poll response
+        :type response: swf.responses.Response
+        :param heartbeat: heartbeat delay (seconds) of this task, defaults to the slots' one
+        :type heartbeat: Optional[float]
+        """
+        token = response.task_token
+        task = response.activity_task
+        with logging_locked():
+            if self._executor_pool:
+                # A slot is free, so is an executor: this doesn't block.
+                worker = self._executor_pool.submit(response)
+                progress_channel = worker.progress
+            else:
+                progress_channel = ProgressChannel()
+                worker = multiprocessing.Process(
+                    target=process_task,
+                    args=(self._poller, token, task, progress_channel),
+                )
+                worker.start()
+        logger.debug('launched pid={} for task {} ({}/{} slots)'.format(
+            worker.pid, task.activity_id, self.nb_running + 1, self.nb_slots))
+        running = RunningTask(token, task, worker, heartbeat or self._heartbeat, progress_channel)
+        with self._condition:
+            self._tasks.append(running)
+        self._heartbeater.add(running)
+
+    def stop(self):
+        """
+        Let the running tasks end, then exit the thread.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+    def run(self):
+        self._heartbeater.start()
+        try:
+            while True:
+                with self._condition:
+                    if self._stopping and not self._tasks:
+                        return
+                    tasks = list(self._tasks)
+                for running in tasks:
+                    if not running.worker.is_alive():
+                        self._end(running)
+                with self._condition:
+                    self._condition.wait(self.tick)
+        finally:
+            self._heartbeater.stop()
+            self._heartbeater.join()
+
+    def _end(self, running):
+        self._heartbeater.remove(running)
+        worker = running.worker
+        worker.join()
+        if worker.exitcode != 0 and not running.stopped:
+            self._fail(
+                running.token,
+                running.task,
+                reason='process {} died: exit code {}'.format(worker.pid, worker.exitcode),
+            )
+        with self._condition:
+            self._tasks.remove(running)
+            self._nb_free += 1
+            self._condition.notify_all()
+
+    def _fail(self, token, task, reason):
+        fail = utils.retry.with_delay(
+            nb_times=self._poller.nb_retries,
+            delay=utils.retry.exponential,
+            log_with=logger.exception,
+            on_exceptions=swf.exceptions.ResponseError,
+        )(self._worker.fail)
+        try:
+            fail(token, reason=reason)
+        except Exception as err:
+            logger.error('cannot fail task {}: {}'.format(task.activity_type.name, err))
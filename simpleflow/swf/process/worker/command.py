@@ -5,10 +5,12 @@ import swf.models
 from .base import (
     Worker,
     ActivityPoller,
+    preload_modules,
 )
 
 
-def make_worker_poller(domain, task_list, heartbeat, process_mode, poll_data):
+def make_worker_poller(domain, task_list, heartbeat, process_mode, poll_data, nb_slots=1,
+                       warm_executors=False, max_tasks_per_executor=None, heartbeat_fraction=None):
     """
     Make a worker poller for the domain and task list.
     :param domain:
@@ -21,15 +23,30 @@ def make_worker_poller(domain, task_list, heartbeat, process_mode, poll_data):
     :type process_mode: str
     :param poll_data: Base64 encoded poll data from SWF, in case you don't want to poll directly.
     :type poll_data: str
+    :param nb_slots: # of tasks processed at once by each poller process.
+    :type nb_slots: int
+    :param warm_executors: Execute tasks in long-lived processes instead of forking for each task.
+    :type warm_executors: bool
+    :param max_tasks_per_executor: # of tasks after which a long-lived process is recycled
+    :type max_tasks_per_executor: Optional[int]
+    :param heartbeat_fraction: Heartbeat at this fraction of the activity types' heartbeat timeout.
+    :type heartbeat_fraction: Optional[float]
     :return:
     :rtype: ActivityPoller
     """
     domain = swf.models.Domain(domain)
-    return ActivityPoller(domain, task_list, heartbeat, process_mode, poll_data)
+    return ActivityPoller(
+        domain, task_list, heartbeat, process_mode, poll_data,
+        nb_slots=nb_slots,
+        warm_executors=warm_executors,
+        max_tasks_per_executor=max_tasks_per_executor,
+        heartbeat_fraction=heartbeat_fraction,
+    )
 
 
 def start(domain, task_list, nb_processes=None, heartbeat=60, one_task=False,
-          process_mode=None, poll_data=None):
+          process_mode=None, poll_data=None, nb_slots=1,
+          warm_executors=False, max_tasks_per_executor=None, preload=None, heartbeat_fraction=None):
     """
     Start a worker for the given domain and task_list.
     :param domain:
@@ -46,13 +63,34 @@ def start(domain, task_list, nb_processes=None, heartbeat=60, one_task=False,
     :type process_mode: Optional[str]
     :param poll_data: Base64 encoded poll data from SWF, in case you don't want to poll directly.
     :type poll_data: Optional[str]
+    :param nb_slots: # of tasks processed at once by each poller process (ignored with one_task)
+    :type nb_slots: int
+    :param warm_executors: Execute tasks in long-lived processes instead of forking for each task
+        (ignored with one_task)
+    :type warm_executors: bool
+    :param max_tasks_per_executor: # of tasks after which a long-lived process is recycled
+    :type max_tasks_per_executor: Optional[int]
+    :param preload: modules to import before starting the pollers
+    :type preload: Optional[list[str]]
+    :param heartbeat_fraction: Heartbeat at this fraction of the activity types' heartbeat timeout,
+        `heartbeat` being used for activity types without one
+    :type heartbeat_fraction: Optional[float]
     """
-    poller = make_worker_poller(domain, task_list, heartbeat, process_mode, poll_data)
-
     if poll_data:
         # if "poll_data" is provided, no need to process it multiple times
         one_task = True
 
+    if preload:
+        preload_modules(preload)
+
+    poller = make_worker_poller(
+        domain, task_list, heartbeat, process_mode, poll_data,
+        nb_slots=nb_slots,
+        warm_executors=warm_executors and not one_task,
+        max_tasks_per_executor=max_tasks_per_executor,
+        heartbeat_fraction=heartbeat_fraction,
+    )
+
     if one_task:
         poller.run_once()
     else:
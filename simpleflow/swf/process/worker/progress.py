@@ -0,0 +1,79 @@
+import multiprocessing
+
+from simpleflow import compat, constants
+from simpleflow.utils import json_dumps
+
+
+__all__ = ['ProgressChannel', 'report_progress']
+
+
+# Channel of the task executed by the current process, see process_task()
+channel = None
+
+
+class ProgressChannel(object):
+    """
+    Latest progress details of a task, written by the process executing it
+    and read by the one heartbeating for it.
+
+    It lives in shared memory and doesn't take any lock: writing is cheap and
+    never blocks, and killing the writer can't deadlock the reader. A
+    sequence number, odd while writing, lets the reader detect torn reads;
+    it then keeps the previous details until the next heartbeat.
+    """
+    def __init__(self, size=constants.MAX_HEARTBEAT_DETAILS_LENGTH):
+        self._seq = multiprocessing.RawValue('L', 0)
+        self._length = multiprocessing.RawValue('i', 0)
+        self._buffer = multiprocessing.RawArray('c', size)
+        self._read_seq = 0
+        self._details = None
+
+    def write(self, details):
+        """
+        :param details:
+        :type details: str
+        :raise ValueError: if the details don't fit
+        """
+        data = details.encode('utf-8')
+        if len(data) > len(self._buffer):
+            raise ValueError('progress details are longer than {} bytes'.format(len(self._buffer)))
+        self._seq.value += 1
+        self._buffer[:len(data)] = data
+        self._length.value = len(data)
+        self._seq.value += 1
+
+    def read(self):
+        """
+        Get the latest details: successive writes are coalesced.
+        :return: details, None if none were written
+        :rtype: Optional[str]
+        """
+        seq = self._seq.value
+        if seq != self._read_seq and not seq % 2:
+            data = self._buffer[:self._length.value]
+            if self._seq.value == seq:
+                self._read_seq = seq
+                self._details = data.decode('utf-8')
+        return self._details
+
+    def clear(self):
+        """
+        Forget the details of the previous task; the writer must be idle.
+        """
+        self._read_seq = self._seq.value
+        self._details = None
+
+
+def report_progress(details):
+    """
+    Report the progress of the current activity task; the details are sent to
+    SWF with the next heartbeat. Does nothing outside of an activity worker.
+
+    :param details: string, or object to dump as JSON
+    :type details: Any
+    """
+    if channel is None:
+        return
+    if not isinstance(details, compat.string_types):
+        details = json_dumps(details)
+    channel.write(details)
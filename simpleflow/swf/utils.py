@@ -1,5 +1,7 @@
 from __future__ import absolute_import
 
+import json
+
 import swf.exceptions
 import swf.models
 import swf.querysets
@@ -7,7 +9,7 @@ from simpleflow.history import History
 
 
 if False:
-    from typing import Any, List, Dict  # NOQA
+    from typing import Any, List, Dict, Optional  # NOQA
     from swf.models.decision.base import Decision  # NOQA
 
 
@@ -60,29 +62,61 @@ class DecisionsAndContext(object):
     """
     Encapsulate decisions and execution context.
     The execution context contains keys with either plain values, lists or sets.
+
+    The serialized size of the decisions is maintained as they are added, so
+    checking the request size doesn't re-serialize them; decisions must be
+    added with append_decision or extend_decision for it to stay accurate.
     """
     def __init__(self, decisions=None, execution_context=None):
         self.decisions = decisions or []  # type: List[Decision]
         self.execution_context = execution_context  # type: Dict[str, Any]
+        self._decisions_size = sum(self.encoded_size(decision) for decision in self.decisions)
 
     def __repr__(self):
         return '<{} decisions={}, execution_context={}>'.format(
             self.__class__.__name__, self.decisions, self.execution_context
         )
 
-    def append_decision(self, decision):
-        # type: (Decision) -> None
+    @staticmethod
+    def encoded_size(decision):
+        # type: (Decision) -> int
+        """
+        Size of a serialized decision.
+        NB: we use json.dumps, not json_dumps, since the serialization will
+        happen inside boto.swf.
+        """
+        return len(json.dumps(decision))
+
+    def request_size(self, decisions_size=0, nb_decisions=0):
+        # type: (int, int) -> int
+        """
+        Size of the serialized decisions, i.e. `len(json.dumps(self.decisions))`,
+        optionally with `nb_decisions` more decisions weighting `decisions_size`.
+        """
+        nb_decisions += len(self.decisions)
+        separators_size = 2 * (nb_decisions - 1) if nb_decisions else 0
+        return 2 + self._decisions_size + decisions_size + separators_size
+
+    def append_decision(self, decision, encoded_size=None):
+        # type: (Decision, Optional[int]) -> None
         """
         Append a decision.
         """
+        if encoded_size is None:
+            encoded_size = self.encoded_size(decision)
         self.decisions.append(decision)
+        self._decisions_size += encoded_size
 
-    def extend_decision(self, decisions):
-        # type: (List[Decision]) -> None
+    def extend_decision(self, decisions, encoded_size=None):
+        # type: (List[Decision], Optional[int]) -> None
         """
         Append a list of decisions.
+        :param encoded_size: total size of the serialized decisions, if known
         """
+        if encoded_size is None:
+            encoded_size = sum(self.encoded_size(decision) for decision in decisions)
         self.decisions += decisions
+        self._decisions_size += encoded_size
 
     def append_kv_to_context(self, key, value):
         # type: (str, Any) -> None
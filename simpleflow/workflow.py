@@ -32,6 +32,20 @@ class Workflow(Submittable):
     task_list = None
     task_priority = None
 
+    # Don't replay the workflow when the only new events can't change any
+    # future (e.g. ActivityTaskStarted): the workflow mustn't depend on
+    # whether a future is pending or running.
+    skip_inert_replays = False
+
+    # Hash of the arguments in idempotent task IDs: "md5", or "fast" for a
+    # cheaper non-cryptographic one. Executions which already used md5 keep it.
+    task_id_hash = 'md5'
+
+    # Pull the jumbo fields referenced by the history concurrently before
+    # replaying, up to this many bytes, instead of one by one when decoded.
+    prefetch_jumbo_fields = False
+    prefetch_jumbo_fields_max_bytes = 64 * 1024 ** 2
+
     INHERIT_TAG_LIST = 'INHERIT_TAG_LIST'
 
     def __init__(self, executor):
@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
+import itertools
+import threading
+import time
+
 import boto.exception
+from future.moves.queue import Full, Queue
 
-from simpleflow import compat, format
+from simpleflow import compat, format, logger
 from simpleflow.utils import json_dumps
 from swf.actors.core import Actor
 from swf.exceptions import PollTimeout, ResponseError, DoesNotExistError
@@ -77,47 +82,37 @@ class Decider(Actor):
 
         """
         task_list = task_list or self.task_list
+        identity = format.identity(identity)
 
+        start = time.time()
         task = self.connection.poll_for_decision_task(
             self.domain.name,
             task_list=task_list,
-            identity=format.identity(identity),
+            identity=identity,
             **kwargs
         )
         token = task.get('taskToken')
         if token is None:
             raise PollTimeout("Decider poll timed out")
 
-        events = task['events']
-
-        next_page = task.get('nextPageToken')
-        while next_page:
-            try:
-                task = self.connection.poll_for_decision_task(
-                    self.domain.name,
-                    task_list=task_list,
-                    identity=format.identity(identity),
-                    next_page_token=next_page,
-                    **kwargs
-                )
-            except boto.exception.SWFResponseError as e:
-                message = self.get_error_message(e)
-                if e.error_code == 'UnknownResourceFault':
-                    raise DoesNotExistError(
-                        "Unable to poll decision task",
-                        message,
-                    )
-
-                raise ResponseError(message)
-
-            token = task.get('taskToken')
-            if token is None:
-                raise PollTimeout("Decider poll timed out")
-
-            events.extend(task['events'])
-            next_page = task.get('nextPageToken')
-
-        history = History.from_event_list(events)
+        page_timings = []
+        pages = self.iter_history_pages(
+            task,
+            time.time() - start,
+            page_timings,
+            task_list=task_list,
+            identity=identity,
+            **kwargs
+        )
+        history = History.from_event_pages(pages)
+        if len(page_timings) > 1:
+            logger.debug(
+                "decision task history: {} pages, {} events, fetch={:.3f}s, build={:.3f}s".format(
+                    len(page_timings),
+                    len(history),
+                    sum(timing['fetch'] for timing in page_timings),
+                    sum(timing['build'] for timing in page_timings),
+                ))
 
         workflow_type = WorkflowType(
             domain=self.domain,
@@ -132,4 +127,127 @@ class Decider(Actor):
         )
 
         # TODO: move history into execution (needs refactoring on WorkflowExecution.history())
-        return Response(token=token, history=history, execution=execution)
+        return Response(token=token, history=history, execution=execution,
+                        page_timings=page_timings)
+
+    def fetch_history_page(self, next_page_token, task_list, identity, **kwargs):
+        """
+        Fetch a page of a decision task history.
+
+        :param next_page_token: token of the page to fetch
+        :type next_page_token: str
+        :return: the poll_for_decision_task response
+        :rtype: dict[str, Any]
+        """
+        try:
+            task = self.connection.poll_for_decision_task(
+                self.domain.name,
+                task_list=task_list,
+                identity=identity,
+                next_page_token=next_page_token,
+                **kwargs
+            )
+        except boto.exception.SWFResponseError as e:
+            message = self.get_error_message(e)
+            if e.error_code == 'UnknownResourceFault':
+                raise DoesNotExistError(
+                    "Unable to poll decision task",
+                    message,
+                )
+
+            raise ResponseError(message)
+
+        if task.get('taskToken') is None:
+            raise PollTimeout("Decider poll timed out")
+        return task
+
+    def iter_history_pages(self, task, fetch_time, page_timings, task_list, identity, **kwargs):
+        """
+        Yield the event pages of a decision task. The next pages are fetched
+        in a background thread, so the network round-trip of page N+1
+        overlaps with the processing of page N.
+
+        :param task: first poll_for_decision_task response
+        :type task: dict[str, Any]
+        :param fetch_time: time spent fetching the first page
+        :type fetch_time: float
+        :param page_timings: filled with a {"events", "fetch", "build"} dict per page
+        :type page_timings: list[dict[str, Any]]
+        :rtype: collections.Iterator[list[dict[str, Any]]]
+        """
+        fetcher = None
+        next_page = task.get('nextPageToken')
+        if next_page:
+            fetcher = HistoryPageFetcher(
+                lambda token: self.fetch_history_page(token, task_list, identity, **kwargs),
+                next_page,
+            )
+            fetcher.start()
+        try:
+            pages = [(task, fetch_time)]
+            if fetcher:
+                pages = itertools.chain(pages, fetcher)
+            for page, fetch_time in pages:
+                timing = {'events': len(page['events']), 'fetch': fetch_time}
+                start = time.time()
+                yield page['events']
+                timing['build'] = time.time() - start
+                page_timings.append(timing)
+        finally:
+            if fetcher:
+                fetcher.stop()
+
+
+class HistoryPageFetcher(threading.Thread):
+    """
+    Thread following nextPageToken's, reading at most `read_ahead` pages
+    ahead of the consumer.
+
+    Iterating over it yields (page, fetch time) tuples; errors are re-raised
+    in the consumer thread.
+    """
+    def __init__(self, fetch, next_page_token, read_ahead=2):
+        super(HistoryPageFetcher, self).__init__(name='HistoryPageFetcher')
+        self.daemon = True
+        self._fetch = fetch
+        self._next_page_token = next_page_token
+        self._queue = Queue(maxsize=read_ahead)
+        self._stopped = False
+
+    def run(self):
+        next_page = self._next_page_token
+        while next_page and not self._stopped:
+            start = time.time()
+            try:
+                task = self._fetch(next_page)
+            except Exception as err:
+                self._put(err)
+                return
+            self._put((task, time.time() - start))
+            next_page = task.get('nextPageToken')
+        self._put(None)
+
+    def _put(self, item):
+        while not self._stopped:
+            try:
+                self._queue.put(item, timeout=1)
+                return
+            except Full:
+                pass
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def stop(self):
+        """
+        Stop following pages and wait for the thread, so it doesn't use the
+        connection anymore.
+        """
+        self._stopped = True
+        self.join()
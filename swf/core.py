@@ -4,8 +4,10 @@
 # Copyright (c) 2013, Greg Leclercq
 #
 # See the file LICENSE for copying permission.
+import copy
 import os
 
+from boto.connection import ConnectionPool
 from boto.exception import NoAuthHandlerFound
 import boto.swf
 
@@ -29,13 +31,15 @@ class ConnectedSWFObject(object):
 
     :ivar region: name of the AWS region
     :type region: str
-    :ivar connection: connection to the SWF endpoint
+    :ivar connection: connection to the SWF endpoint; in a forked process,
+        it doesn't reuse the sockets opened by the parent process
     :type connection: boto.swf.layer1.Layer1
 
     """
     __slots__ = [
         'region',
-        'connection'
+        '_connection',
+        '_connection_pid',
     ]
 
     @retry.with_delay(nb_times=RETRIES,
@@ -56,3 +60,19 @@ class ConnectedSWFObject(object):
             raise ValueError('invalid region: {}'.format(self.region))
 
         logger.debug("initiated connection to region={}".format(self.region))
+
+    @property
+    def connection(self):
+        pid = os.getpid()
+        if self._connection_pid != pid and self._connection is not None:
+            # boto pools keep-alive sockets regardless of the pid: parent and
+            # child processes would send requests on the same socket.
+            connection = copy.copy(self._connection)
+            connection._pool = ConnectionPool()
+            self.connection = connection
+        return self._connection
+
+    @connection.setter
+    def connection(self, connection):
+        self._connection = connection
+        self._connection_pid = os.getpid()
@@ -11,7 +11,7 @@ import pytz
 from future.utils import iteritems
 
 from simpleflow import format
-from swf.utils import camel_to_underscore, cached_property
+from swf.utils import camel_to_underscore, cached_property, decapitalize
 
 
 class Event(object):
@@ -43,10 +43,19 @@ class Event(object):
     :param  raw_data: raw_event representation provided by amazon service
     :type   raw_data: dict
     """
+    __slots__ = (
+        '_id',
+        '_state',
+        '_timestamp',
+        '_timestamp_cache',
+        '_input',
+        '_name',
+        '_attributes_key',
+        'raw',
+        '__dict__',  # attributes set explicitly, not from raw_data
+    )
+
     _type = None
-    _name = None
-    _attributes_key = None
-    _attributes = None
 
     excluded_attributes = (
         'eventId',
@@ -54,20 +63,54 @@ class Event(object):
         'eventTimestamp'
     )
 
-    def __init__(self, id, state, timestamp, raw_data):
+    def __init__(self, id, state, timestamp, raw_data, name=None, attributes_key=None):
         """
+        Attributes are read from `raw_data` on first access, and the input
+        is only decoded when read.
         """
         self._id = id
         self._state = state
         self._timestamp = timestamp
-        self._input = {}
+        self._input = _UNDECODED
         self.raw = raw_data or {}
-
-        self.process_attributes()
+        self._name = name or self.raw.get('eventType')
+        if attributes_key is None and self._name:
+            # amazon swf format is not very normalized and event attributes
+            # response field is non-capitalized...
+            attributes_key = decapitalize(self._name) + 'EventAttributes'
+        self._attributes_key = attributes_key
 
     def __repr__(self):
         return '<Event %s %s : %s >' % (self.id, self.type, self.state)
 
+    def __getattr__(self, name):
+        """
+        Look up raw_data attributes, e.g. `event.activity_id` for
+        `activityId`.
+        """
+        # private and special attributes (e.g. unset slots) never come from raw_data
+        if name.startswith('_') or name == 'raw':
+            raise AttributeError(name)
+        attributes = self.attributes
+        key = _ATTRIBUTE_KEYS.get(name)
+        if key in attributes:
+            return attributes[key]
+        for key in attributes:
+            if attribute_name(key) == name:
+                return attributes[key]
+        raise AttributeError("{!r} object has no attribute {!r}".format(
+            self.__class__.__name__, name))
+
+    @property
+    def attributes(self):
+        """
+        Raw attributes of the event, e.g. the `activityTaskScheduledEventAttributes`
+        value for an `ActivityTaskScheduled` event.
+
+        :rtype: dict[str, Any]
+        """
+        return self.raw.get(self._attributes_key) or {}
+
     @property
     def id(self):
         return self._id
@@ -90,6 +133,9 @@ class Event(object):
 
     @property
     def input(self):
+        if self._input is _UNDECODED:
+            attributes = self.attributes
+            self._input = format.decode(attributes['input']) if 'input' in attributes else {}
         return self._input
 
     @input.setter
@@ -97,7 +143,98 @@ class Event(object):
         self._input = format.decode(value)
 
     def process_attributes(self):
-        """Processes the event raw_data attributes_key elements
-        and sets current instance attributes accordingly"""
-        for key, value in iteritems(self.raw[self._attributes_key]):
-            setattr(self, camel_to_underscore(key), value)
+        """Sets every raw_data attribute on the instance. Not needed anymore
+        since they are looked up on access; kept for compatibility."""
+        for key, value in iteritems(self.attributes):
+            setattr(self, attribute_name(key), value)
+
+    def copy_state(self, event):
+        """
+        Copy the state of another event, e.g. for compiled events.
+
+        :param event:
+        :type event: Event
+        """
+        for slot in Event.__slots__:
+            if slot == '__dict__':
+                continue
+            try:
+                setattr(self, slot, getattr(event, slot))
+            except AttributeError:
+                pass
+        self.__dict__ = event.__dict__.copy()
+
+
+class _Undecoded(object):
+    def __repr__(self):
+        return '<undecoded>'
+
+
+_UNDECODED = _Undecoded()
+
+# camelCase raw attribute key -> snake_case attribute name, and reverse;
+# completed by attribute_name() with keys not listed here
+_ATTRIBUTE_NAMES = {}
+_ATTRIBUTE_KEYS = {}
+
+
+def attribute_name(key):
+    """
+    Snake case attribute name for a raw_data attribute key, memoized.
+
+    :param key: e.g. "activityId"
+    :type key: str
+    :return: e.g. "activity_id"
+    :rtype: str
+    """
+    name = _ATTRIBUTE_NAMES.get(key)
+    if name is None:
+        name = camel_to_underscore(key)
+        _ATTRIBUTE_NAMES[key] = name
+        _ATTRIBUTE_KEYS[name] = key
+    return name
+
+
+for _key in (
+    'activityId',
+    'activityType',
+    'cause',
+    'childPolicy',
+    'continuedExecutionRunId',
+    'control',
+    'decisionTaskCompletedEventId',
+    'details',
+    'executionContext',
+    'executionStartToCloseTimeout',
+    'externalInitiatedEventId',
+    'externalWorkflowExecution',
+    'heartbeatTimeout',
+    'identity',
+    'initiatedEventId',
+    'input',
+    'latestCancelRequestedEventId',
+    'markerName',
+    'newExecutionRunId',
+    'parentInitiatedEventId',
+    'parentWorkflowExecution',
+    'reason',
+    'result',
+    'runId',
+    'scheduleToCloseTimeout',
+    'scheduleToStartTimeout',
+    'scheduledEventId',
+    'signalName',
+    'startToCloseTimeout',
+    'startToFireTimeout',
+    'startedEventId',
+    'tagList',
+    'taskList',
+    'taskPriority',
+    'taskStartToCloseTimeout',
+    'timeoutType',
+    'timerId',
+    'workflowExecution',
+    'workflowId',
+    'workflowType',
+):
+    attribute_name(_key)
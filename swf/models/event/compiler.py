@@ -18,6 +18,7 @@ class TransitionError(Exception):
 
 class Stateful(object):
     """Base stateful object implementation"""
+    __slots__ = ()
     states = ()
     transitions = {}
 
@@ -52,6 +53,8 @@ class CompiledEvent(Event, Stateful):
 
     """
 
+    __slots__ = ()
+
     initial_state = None
 
     def __init__(self, event):
@@ -67,7 +70,7 @@ class CompiledEvent(Event, Stateful):
             raise InconsistentStateError("Provided event is in {0} state "
                                          "when attended intial state is {1}"
                                          .format(event.state, self.initial_state))
-        self.__dict__ = event.__dict__.copy()
+        self.copy_state(event)
 
     def __repr__(self):
         return '<CompiledEvent %s %s>' % (self.type, self.state)
@@ -91,4 +94,4 @@ class CompiledEvent(Event, Stateful):
         if event.state not in self.transitions[self.state]:
             raise TransitionError("Transition to state %s not allowed")
 
-        self.__dict__ = event.__dict__.copy()
+        self.copy_state(event)
@@ -69,6 +69,59 @@ EVENTS = collections.OrderedDict([
 ])
 
 
+# Every eventType documented in the SWF API reference, see
+# http://docs.aws.amazon.com/amazonswf/latest/apireference/API_HistoryEvent.html
+EVENT_TYPES = (
+    'WorkflowExecutionStarted',
+    'WorkflowExecutionCancelRequested',
+    'WorkflowExecutionCompleted',
+    'CompleteWorkflowExecutionFailed',
+    'WorkflowExecutionFailed',
+    'FailWorkflowExecutionFailed',
+    'WorkflowExecutionTimedOut',
+    'WorkflowExecutionCanceled',
+    'CancelWorkflowExecutionFailed',
+    'WorkflowExecutionContinuedAsNew',
+    'ContinueAsNewWorkflowExecutionFailed',
+    'WorkflowExecutionTerminated',
+    'DecisionTaskScheduled',
+    'DecisionTaskStarted',
+    'DecisionTaskCompleted',
+    'DecisionTaskTimedOut',
+    'ActivityTaskScheduled',
+    'ScheduleActivityTaskFailed',
+    'ActivityTaskStarted',
+    'ActivityTaskCompleted',
+    'ActivityTaskFailed',
+    'ActivityTaskTimedOut',
+    'ActivityTaskCanceled',
+    'ActivityTaskCancelRequested',
+    'RequestCancelActivityTaskFailed',
+    'WorkflowExecutionSignaled',
+    'MarkerRecorded',
+    'RecordMarkerFailed',
+    'TimerStarted',
+    'StartTimerFailed',
+    'TimerFired',
+    'TimerCanceled',
+    'CancelTimerFailed',
+    'StartChildWorkflowExecutionInitiated',
+    'StartChildWorkflowExecutionFailed',
+    'ChildWorkflowExecutionStarted',
+    'ChildWorkflowExecutionCompleted',
+    'ChildWorkflowExecutionFailed',
+    'ChildWorkflowExecutionTimedOut',
+    'ChildWorkflowExecutionCanceled',
+    'ChildWorkflowExecutionTerminated',
+    'SignalExternalWorkflowExecutionInitiated',
+    'SignalExternalWorkflowExecutionFailed',
+    'ExternalWorkflowExecutionSignaled',
+    'RequestCancelExternalWorkflowExecutionInitiated',
+    'RequestCancelExternalWorkflowExecutionFailed',
+    'ExternalWorkflowExecutionCancelRequested',
+)
+
+
 class EventFactory(object):
     """Processes an input json event representation, and instantiates
     an ``swf.models.event.Event`` subclass instance accordingly.
@@ -102,29 +155,79 @@ class EventFactory(object):
     # eventType to Event subclass bindings
     events = EVENTS
 
+    # eventType -> (Event subclass, state, attributes key), see _build_dispatch_table()
+    dispatch_table = {}
+
     def __new__(klass, raw_event):
-        event_id = raw_event['eventId']
         event_name = raw_event['eventType']
-        event_timestamp = raw_event['eventTimestamp']
+        try:
+            event_class, event_state, event_attributes_key = klass.dispatch_table[event_name]
+        except KeyError:
+            event_class, event_state, event_attributes_key = klass._dispatch(event_name)
+
+        return event_class(
+            raw_event['eventId'],
+            event_state,
+            raw_event['eventTimestamp'],
+            raw_event,
+            event_name,
+            event_attributes_key,
+        )
 
+    @classmethod
+    def from_event_list(klass, raw_events):
+        """Builds events in bulk; same as ``[EventFactory(e) for e in raw_events]``.
+
+        :param  raw_events: input json event representations
+        :type   raw_events: collections.Iterable[dict]
+
+        :rtype: list[swf.models.event.Event]
+        """
+        dispatch_table = klass.dispatch_table
+        events = []
+        append = events.append
+        for raw_event in raw_events:
+            event_name = raw_event['eventType']
+            dispatch = dispatch_table.get(event_name)
+            if dispatch is None:
+                append(klass(raw_event))
+                continue
+            event_class, event_state, event_attributes_key = dispatch
+            append(event_class(
+                raw_event['eventId'],
+                event_state,
+                raw_event['eventTimestamp'],
+                raw_event,
+                event_name,
+                event_attributes_key,
+            ))
+        return events
+
+    @classmethod
+    def _dispatch(klass, event_name):
+        """Finds the Event subclass, state and attributes key of an
+        eventType, from its name.
+
+        :param  event_name: e.g. 'ActivityTaskScheduled'
+        :type   event_name: str
+
+        :returns: e.g. (ActivityTaskEvent, 'scheduled', 'activityTaskScheduledEventAttributes')
+        :rtype: (type, str, str)
+        """
         event_type = klass._extract_event_type(event_name)
         event_state = klass._extract_event_state(event_type, event_name)
         # amazon swf format is not very normalized and event attributes
         # response field is non-capitalized...
         event_attributes_key = decapitalize(event_name) + 'EventAttributes'
 
-        klass = EventFactory.events[event_type]['event']
-        klass._name = event_name
-        klass._attributes_key = event_attributes_key
-
-        instance = klass(
-            id=event_id,
-            state=event_state,
-            timestamp=event_timestamp,
-            raw_data=raw_event
-        )
+        return klass.events[event_type]['event'], event_state, event_attributes_key
 
-        return instance
+    @classmethod
+    def _build_dispatch_table(klass):
+        klass.dispatch_table = {
+            event_name: klass._dispatch(event_name)
+            for event_name in EVENT_TYPES
+        }
 
     @classmethod
     def _extract_event_type(klass, event_name):
@@ -165,6 +268,9 @@ class EventFactory(object):
         return camel_to_underscore(left + right)
 
 
+EventFactory._build_dispatch_table()
+
+
 class CompiledEventFactory(object):
     """
     Process an Event object and instantiates the corresponding
@@ -10,10 +10,12 @@ from swf.models.event.compiler import CompiledEvent
 
 
 class MarkerEvent(Event):
+    __slots__ = ()
     _type = 'Marker'
 
 
 class CompiledMarkerEvent(CompiledEvent):
+    __slots__ = ()
     _type = 'Marker'
     states = (
         'recorded',
@@ -10,10 +10,12 @@ from swf.models.event.compiler import CompiledEvent
 
 
 class ActivityTaskEvent(Event):
+    __slots__ = ()
     _type = 'ActivityTask'
 
 
 class CompiledActivityTaskEvent(CompiledEvent):
+    __slots__ = ()
     _type = 'ActivityTask'
     states = (
         'scheduled',  # An activity task was scheduled for execution
@@ -42,10 +44,12 @@ class CompiledActivityTaskEvent(CompiledEvent):
 
 
 class DecisionTaskEvent(Event):
+    __slots__ = ()
     _type = 'DecisionTask'
 
 
 class CompiledDecisionTaskEvent(CompiledEvent):
+    __slots__ = ()
     _type = 'DecisionTask'
     states = (
         'scheduled',  # A decision task was scheduled for the workflow execution
@@ -10,10 +10,12 @@ from swf.models.event.compiler import CompiledEvent
 
 
 class TimerEvent(Event):
+    __slots__ = ()
     _type = 'Timer'
 
 
 class CompiledTimerEvent(CompiledEvent):
+    __slots__ = ()
     _type = 'Timer'
 
     states = (
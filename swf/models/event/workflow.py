@@ -10,10 +10,12 @@ from swf.models.event.compiler import CompiledEvent
 
 
 class WorkflowExecutionEvent(Event):
+    __slots__ = ()
     _type = 'WorkflowExecution'
 
 
 class CompiledWorkflowExecutionEvent(CompiledEvent):
+    __slots__ = ()
     _type = 'WorkflowExecution'
     states = (
         'started',  # The workflow execution was started
@@ -52,10 +54,12 @@ class CompiledWorkflowExecutionEvent(CompiledEvent):
 
 
 class ChildWorkflowExecutionEvent(Event):
+    __slots__ = ()
     _type = 'ChildWorkflowExecution'
 
 
 class CompiledChildWorkflowExecutionEvent(CompiledEvent):
+    __slots__ = ()
     _type = 'ChildWorkflowExecution'
 
     states = (
@@ -79,10 +83,12 @@ class CompiledChildWorkflowExecutionEvent(CompiledEvent):
 
 
 class ExternalWorkflowExecutionEvent(Event):
+    __slots__ = ()
     _type = 'ExternalWorkflowExecution'
 
 
 class CompiledExternalWorkflowExecutionEvent(CompiledEvent):
+    __slots__ = ()
     _type = 'ExternalWorkflowExecution'
 
     states = (
@@ -268,10 +268,26 @@ class History(object):
         :returns: History model instance built upon data description
         :rtype: swf.model.history.History
         """
+        events_history = EventFactory.from_event_list(data)
+
+        return cls(events=events_history, raw=data)
+
+    @classmethod
+    def from_event_pages(cls, pages):
+        """Same as ``from_event_list``, but from an iterable of event pages,
+        so events can be built while the next pages are being fetched.
+
+        :param  pages: pages of event descriptions
+        :type   pages: collections.Iterable[list[dict[str, Any]]]
+
+        :returns: History model instance built upon data description
+        :rtype: swf.model.history.History
+        """
+        data = []
         events_history = []
 
-        for index, d in enumerate(data):
-            event = EventFactory(d)
-            events_history.append(event)
+        for page in pages:
+            data.extend(page)
+            events_history.extend(EventFactory.from_event_list(page))
 
         return cls(events=events_history, raw=data)
@@ -203,14 +203,15 @@ class History(swf.models.History):
     def add_activity_task_scheduled(self, activity, decision_id,
                                     activity_id=None,
                                     input=None,
-                                    control=None):
+                                    control=None,
+                                    timestamp=None):
         if control is None:
             control = {}
 
         self.events.append(EventFactory({
             "eventId": len(self.events) + 1,
             "eventType": "ActivityTaskScheduled",
-            "eventTimestamp": new_timestamp_string(),
+            "eventTimestamp": timestamp or new_timestamp_string(),
             "activityTaskScheduledEventAttributes": {
                 'control': (json_dumps(control) if
                             control is not None else None),
@@ -235,11 +236,11 @@ class History(swf.models.History):
 
         return self
 
-    def add_activity_task_started(self, scheduled):
+    def add_activity_task_started(self, scheduled, timestamp=None):
         self.events.append(EventFactory({
             "eventId": len(self.events) + 1,
             "eventType": "ActivityTaskStarted",
-            "eventTimestamp": new_timestamp_string(),
+            "eventTimestamp": timestamp or new_timestamp_string(),
             "activityTaskStartedEventAttributes": {
                 "scheduledEventId": scheduled,
                 "identity": DEFAULT_WORKER_IDENTITY,
@@ -249,11 +250,12 @@ class History(swf.models.History):
         return self
 
     def add_activity_task_completed(self, scheduled, started,
-                                    result=None):
+                                    result=None,
+                                    timestamp=None):
         self.events.append(EventFactory({
             "eventId": len(self.events) + 1,
             "eventType": "ActivityTaskCompleted",
-            "eventTimestamp": new_timestamp_string(),
+            "eventTimestamp": timestamp or new_timestamp_string(),
             "activityTaskCompletedEventAttributes": {
                 "startedEventId": started,
                 "scheduledEventId": scheduled,
@@ -267,11 +269,12 @@ class History(swf.models.History):
                                  scheduled=None,
                                  started=None,
                                  reason=DEFAULT_REASON,
-                                 details=DEFAULT_DETAILS):
+                                 details=DEFAULT_DETAILS,
+                                 timestamp=None):
         self.events.append(EventFactory({
             'eventId': self.next_id,
             'eventType': 'ActivityTaskFailed',
-            'eventTimestamp': new_timestamp_string(),
+            'eventTimestamp': timestamp or new_timestamp_string(),
             'activityTaskFailedEventAttributes': {
                 'reason': reason,
                 'details': details,
@@ -317,13 +320,23 @@ class History(swf.models.History):
                           details=DEFAULT_DETAILS,
                           activity_type=None,
                           cause=None,
-                          timeout_type='START_TO_CLOSE'):
+                          timeout_type='START_TO_CLOSE',
+                          timestamps=None):
+        """
+        Add the events of an activity task up to `last_state`.
+
+        :param timestamps: actual (scheduled, started, closed) timestamps;
+                           generated if None.
+        :type timestamps: Optional[(float, float, float)]
+        """
+        scheduled_at, started_at, closed_at = timestamps or (None, None, None)
         self.add_activity_task_scheduled(
             activity,
             decision_id,
             activity_id,
             input,
-            control)
+            control,
+            timestamp=scheduled_at)
         if last_state == 'scheduled':
             return self
 
@@ -336,7 +349,7 @@ class History(swf.models.History):
             return self
 
         scheduled_id = self.last_id
-        self.add_activity_task_started(scheduled=scheduled_id)
+        self.add_activity_task_started(scheduled=scheduled_id, timestamp=started_at)
         if last_state == 'started':
             return self
 
@@ -345,13 +358,15 @@ class History(swf.models.History):
             self.add_activity_task_completed(
                 scheduled=scheduled_id,
                 started=started_id,
-                result=result)
+                result=result,
+                timestamp=closed_at)
         elif last_state == 'failed':
             self.add_activity_task_failed(
                 scheduled=scheduled_id,
                 started=started_id,
                 reason=reason,
-                details=details)
+                details=details,
+                timestamp=closed_at)
         elif last_state == 'timed_out':
             self.add_activity_task_timed_out(
                 scheduled=scheduled_id,
@@ -0,0 +1,64 @@
+"""
+Time the construction of GroupFuture and ChainFuture for large canvases.
+
+Usage: python -m tests.benchmarks.canvas [size ...]
+"""
+from __future__ import print_function
+
+import sys
+import timeit
+
+from simpleflow import futures
+from simpleflow.canvas import ChainFuture, GroupFuture
+
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+class FakeWorkflow(object):
+    """
+    Return finished futures, except for one activity out of `running_every`.
+    """
+    def __init__(self, running_every=None):
+        self.running_every = running_every
+        self.nb_submitted = 0
+
+    def submit(self, activity):
+        self.nb_submitted += 1
+        future = futures.Future()
+        if self.running_every and self.nb_submitted % self.running_every == 0:
+            future.set_running()
+        else:
+            future.set_finished(activity)
+        return future
+
+
+def bench_group(size, max_parallel=None):
+    activities = list(range(size))
+    return GroupFuture(activities, FakeWorkflow(running_every=2), max_parallel=max_parallel)
+
+
+def bench_chain(size):
+    activities = list(range(size))
+    return ChainFuture(
+        activities,
+        FakeWorkflow(),
+        bubbles_exception_on_failure=True,
+        send_result=False,
+        break_on_failure=True,
+    )
+
+
+def main(sizes):
+    for size in sizes:
+        for name, func in (
+                ('group', lambda: bench_group(size)),
+                ('group max_parallel={}'.format(size // 2), lambda: bench_group(size, max_parallel=size // 2)),
+                ('chain', lambda: bench_chain(size)),
+        ):
+            duration = min(timeit.repeat(func, number=1, repeat=3))
+            print('{:>7} {:<28} {:.4f}s'.format(size, name, duration))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -1,10 +1,14 @@
 import json
 import unittest
 
+from mock import patch
+
 from simpleflow.activity import with_attributes
 from simpleflow import metrology, storage, settings
 from simpleflow.constants import MINUTE, HOUR
 from simpleflow.local.executor import Executor
+from simpleflow.history import History
+from swf.models.history import builder
 
 import boto
 from moto import mock_s3
@@ -63,5 +67,50 @@ class MetrologyTestCase(unittest.TestCase):
         self.assertEquals(res[0][1]["metrology"]["steps"][0]["metadata"]["num"], 1)
 
 
+class FakeKey(object):
+    def __init__(self, name, content):
+        self.key = self.name = name
+        self.content = content
+
+    def get_contents_as_string(self, encoding=None):
+        return json.dumps(self.content)
+
+
+class PushMetrologyTestCase(unittest.TestCase):
+    def test_push_metrology(self):
+        history = builder.History(MyWorkflow, input={})
+        for i in range(3):
+            history.add_activity_task(
+                MyMetrologyTask,
+                decision_id=history.last_id,
+                activity_id='activity-{}'.format(i),
+                last_state='completed',
+                input={'args': [i]},
+                result=i,
+            )
+        keys = [
+            FakeKey('wf/run/activity.activity-{}.json'.format(i), {'meta': i})
+            for i in (2, 0)
+        ] + [FakeKey('wf/run/metrology.json', {})]
+        pushed = {}
+
+        def push(bucket, path, src_file, content_type=None):
+            with open(src_file) as fp:
+                pushed[path] = json.load(fp)
+
+        ex = Executor(MyWorkflow)
+        ex.create_workflow()
+        with patch.object(metrology.MetrologyWorkflow, 'metrology_path', 'wf/run'), \
+                patch.object(storage, 'list_keys', return_value=keys), \
+                patch.object(storage, 'push', side_effect=push):
+            ex.workflow.push_metrology(History(history))
+
+        self.assertEqual(['wf/run/metrology.json'], list(pushed))
+        self.assertEqual(
+            [('activity-0', {'meta': 0}), ('activity-1', None), ('activity-2', {'meta': 2})],
+            [(name, task.get('metrology')) for name, task in pushed['wf/run/metrology.json']],
+        )
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,126 @@
+import threading
+import unittest
+
+from simpleflow import activity, futures
+from simpleflow.canvas import Chain, Group
+from simpleflow.exceptions import TaskFailed
+from simpleflow.local.executor import Executor, LocalFuture
+from tests.data import (
+    BaseTestWorkflow,
+    increment,
+    raise_error,
+    raise_on_failure,
+)
+
+
+rendezvous = threading.Event()
+
+
+@activity.with_attributes()
+def wait_rendezvous():
+    return rendezvous.wait(5)
+
+
+@activity.with_attributes()
+def set_rendezvous():
+    rendezvous.set()
+
+
+class RendezvousWorkflow(BaseTestWorkflow):
+    def run(self):
+        waiting = self.submit(wait_rendezvous)
+        self.submit(set_rendezvous)
+        return waiting.result
+
+
+class IncrementWorkflow(BaseTestWorkflow):
+    def run(self, count):
+        fs = [self.submit(increment, i) for i in range(count)]
+        return futures.wait(*fs)
+
+
+class FutureArgumentWorkflow(BaseTestWorkflow):
+    def run(self):
+        return self.submit(increment, self.submit(increment, 1)).result
+
+
+class CanvasWorkflow(BaseTestWorkflow):
+    def run(self):
+        group = self.submit(Group(*[(increment, i) for i in range(5)], max_parallel=2))
+        chain = self.submit(Chain((increment, 1), (increment, ), (increment, ), send_result=True))
+        return group.result, chain.result
+
+
+class FailingWorkflow(BaseTestWorkflow):
+    def run(self):
+        future = self.submit(raise_error)
+        return future.exception is not None
+
+
+class RaisingWorkflow(BaseTestWorkflow):
+    def run(self):
+        self.submit(raise_on_failure)
+
+
+class TestPoolExecutor(unittest.TestCase):
+    def setUp(self):
+        rendezvous.clear()
+
+    def test_activities_run_concurrently(self):
+        self.assertTrue(Executor(RendezvousWorkflow, max_workers=2, pool_type='thread').run())
+
+    def test_process_pool(self):
+        executor = Executor(IncrementWorkflow, max_workers=2)
+        self.assertEqual([1, 2, 3, 4], executor.run({'args': [4]}))
+
+        events = [e for e in executor._history.events if e.type == 'ActivityTask']
+        self.assertEqual(['scheduled', 'started', 'completed'] * 4, [e.state for e in events])
+        for scheduled, started, completed in zip(events[0::3], events[1::3], events[2::3]):
+            self.assertTrue(scheduled.timestamp <= started.timestamp <= completed.timestamp)
+
+    def test_submit_returns_pending_future(self):
+        executor = Executor(RendezvousWorkflow, max_workers=1, pool_type='thread')
+        executor.initialize_history({})
+        executor.create_workflow()
+        future = executor.submit(wait_rendezvous)
+        self.assertIsInstance(future, LocalFuture)
+        self.assertFalse(future.done)
+
+        rendezvous.set()
+        self.assertTrue(future.result)
+        self.assertTrue(future.finished)
+        executor.shutdown_pool()
+
+    def test_state_has_no_side_effects(self):
+        executor = Executor(RaisingWorkflow, max_workers=1, pool_type='thread')
+        executor.initialize_history({})
+        executor.create_workflow()
+        future = executor.submit(raise_on_failure)
+        while not future.done:
+            pass
+        self.assertEqual(futures.FINISHED, future.state)
+        self.assertEqual([], [e for e in executor._history.events if e.type == 'ActivityTask'])
+
+        with self.assertRaises(TaskFailed):
+            future.wait()
+        events = [e for e in executor._history.events if e.type == 'ActivityTask']
+        self.assertEqual(['scheduled', 'started', 'failed'], [e.state for e in events])
+        executor.shutdown_pool()
+
+    def test_future_as_argument(self):
+        self.assertEqual(3, Executor(FutureArgumentWorkflow, max_workers=2).run())
+
+    def test_canvas(self):
+        result = Executor(CanvasWorkflow, max_workers=2, pool_type='thread').run()
+        self.assertEqual(([1, 2, 3, 4, 5], [2, 3, 4]), result)
+
+    def test_failure(self):
+        self.assertTrue(Executor(FailingWorkflow, max_workers=2, pool_type='thread').run())
+
+    def test_raises_on_failure(self):
+        with self.assertRaises(TaskFailed):
+            Executor(RaisingWorkflow, max_workers=2, pool_type='thread').run()
+
+    def test_invalid_pool_type(self):
+        with self.assertRaises(ValueError):
+            Executor(IncrementWorkflow, max_workers=2, pool_type='fiber')
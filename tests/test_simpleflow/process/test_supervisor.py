@@ -3,6 +3,7 @@ import os
 import signal
 import sys
 import time
+import unittest
 
 from flaky import flaky
 from psutil import Process
@@ -157,3 +158,63 @@ class TestSupervisor(IntegrationTestCase):
         os.kill(p.pid, signal.SIGTERM)
         p.join()
         expect(p.exitcode).to.equal(-15)
+
+
+def exit_with_error():
+    os._exit(3)
+
+
+def report_and_sleep(queue):
+    queue.put(os.getpid())
+    time.sleep(60)
+
+
+class QuickSupervisor(Supervisor):
+    min_uptime = 0
+
+
+class TestSupervisorRestarts(unittest.TestCase):
+    def end_processes(self, supervisor):
+        for child in list(supervisor._processes.values()):
+            child.join(5)
+        supervisor._cleanup_worker_processes()
+
+    def test_crashing_processes_are_restarted_with_backoff(self):
+        supervisor = Supervisor(exit_with_error, nb_children=2)
+        supervisor.min_backoff = 0.2
+        supervisor.max_backoff = 0.3
+        supervisor._start_worker_processes()
+        self.assertEqual(2, len(supervisor._processes))
+        self.end_processes(supervisor)
+        self.assertEqual({}, supervisor._processes)
+        self.assertEqual(2, supervisor.nb_crashes)
+        self.assertEqual(0, supervisor.nb_restarts)
+
+        # backoff: 0.2s then 0.3s
+        supervisor._start_worker_processes()
+        self.assertEqual({}, supervisor._processes)
+        time.sleep(0.3)
+        supervisor._start_worker_processes()
+        self.assertEqual(2, len(supervisor._processes))
+        self.assertEqual(2, supervisor.nb_restarts)
+
+        self.end_processes(supervisor)
+        self.assertEqual(4, supervisor.nb_crashes)
+        self.assertEqual(0.3, supervisor._backoff)
+
+    def test_ended_processes_are_replaced_immediately(self):
+        queue = multiprocessing.Queue()
+        supervisor = QuickSupervisor(report_and_sleep, arguments=(queue,), nb_children=2)
+        process = multiprocessing.Process(target=supervisor.target)
+        process.start()
+        try:
+            pids = [queue.get(timeout=5) for _ in range(2)]
+            os.kill(pids[0], signal.SIGKILL)
+            start = time.time()
+            new_pid = queue.get(timeout=5)
+            self.assertLess(time.time() - start, 1)
+            self.assertNotIn(new_pid, pids)
+        finally:
+            os.kill(process.pid, signal.SIGTERM)
+            process.join(5)
+        self.assertEqual(0, process.exitcode)
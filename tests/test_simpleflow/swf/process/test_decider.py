@@ -0,0 +1,203 @@
+import multiprocessing
+import os
+import unittest
+
+from mock import patch
+
+import swf.exceptions
+from swf.models import Domain
+from swf.models.history import builder
+from swf.models.workflow import WorkflowExecution, WorkflowType
+from swf.responses import Response
+
+from simpleflow.swf.executor import Executor
+from simpleflow.swf.process.decider.base import (
+    DecisionPrefetcher,
+    DeciderPoller,
+    DeciderWorkerPool,
+    dump_decision_response,
+    get_decision_deadline,
+    load_decision_response,
+)
+from tests.data import BaseTestWorkflow
+
+
+class ExampleWorkflow(BaseTestWorkflow):
+    pass
+
+
+class FakePoller(object):
+    domain = Domain('TestDomain')
+    task_list = 'test-task-list'
+    identity = 'test-identity'
+    nb_retries = 0
+    is_alive = True
+
+    def __init__(self):
+        self.decision_durations = []
+
+    def record_decision_duration(self, duration):
+        self.decision_durations.append(duration)
+
+
+def build_decision_response(token='token'):
+    history = builder.History(ExampleWorkflow, input={})
+    history.add_decision_task()
+    workflow_type = WorkflowType(FakePoller.domain, 'ExampleWorkflow', 'example')
+    execution = WorkflowExecution(
+        FakePoller.domain, 'workflow-id', 'run-id', workflow_type=workflow_type)
+    return Response(token=token, history=history, execution=execution)
+
+
+class TestDecisionResponseDump(unittest.TestCase):
+    def test_round_trip(self):
+        response = build_decision_response()
+        loaded = load_decision_response(FakePoller.domain, dump_decision_response(response))
+
+        self.assertEqual('token', loaded.token)
+        self.assertEqual('workflow-id', loaded.execution.workflow_id)
+        self.assertEqual('run-id', loaded.execution.run_id)
+        self.assertEqual('ExampleWorkflow', loaded.execution.workflow_type.name)
+        self.assertEqual('example', loaded.execution.workflow_type.version)
+        self.assertEqual(
+            [(e.id, e.type, e.state) for e in response.history.events],
+            [(e.id, e.type, e.state) for e in loaded.history.events],
+        )
+
+
+class TestDeciderWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.queue = multiprocessing.Queue()
+        queue = self.queue
+
+        def fake_process_decision(poller, decision_response):
+            queue.put((os.getpid(), decision_response.token))
+
+        patcher = patch(
+            'simpleflow.swf.process.decider.base.process_decision',
+            fake_process_decision,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_decisions(self, pool, count):
+        try:
+            for i in range(count):
+                pool.submit(build_decision_response(token='token-{}'.format(i)))
+        finally:
+            pool.stop()
+        return [self.queue.get(timeout=5) for _ in range(count)]
+
+    def test_workers_are_reused(self):
+        pool = DeciderWorkerPool(FakePoller(), 1)
+        results = self.run_decisions(pool, 3)
+
+        self.assertEqual(['token-0', 'token-1', 'token-2'], [token for _, token in results])
+        self.assertEqual(1, len(set(pid for pid, _ in results)))
+        self.assertNotIn(os.getpid(), [pid for pid, _ in results])
+
+    def test_workers_are_recycled(self):
+        pool = DeciderWorkerPool(FakePoller(), 1, max_decisions=2)
+        results = self.run_decisions(pool, 4)
+
+        pids = [pid for pid, _ in results]
+        self.assertEqual(pids[0], pids[1])
+        self.assertEqual(pids[2], pids[3])
+        self.assertNotEqual(pids[0], pids[2])
+
+    def test_decision_durations_are_reported(self):
+        poller = FakePoller()
+        self.run_decisions(DeciderWorkerPool(poller, 1), 3)
+        # the last decision is collected by stop()
+        self.assertEqual(2, len(poller.decision_durations))
+
+
+class TestGetDecisionDeadline(unittest.TestCase):
+    def test_deadline_from_decision_task_timeout(self):
+        response = build_decision_response()
+        timeout = int(ExampleWorkflow.decision_tasks_timeout)
+        self.assertEqual(1000 + timeout, get_decision_deadline(response, 1000))
+
+    def test_no_deadline(self):
+        response = build_decision_response()
+        for event in response.history.events:
+            if event.type == 'DecisionTask' and event.state == 'scheduled':
+                event.start_to_close_timeout = 'NONE'
+        self.assertIsNone(get_decision_deadline(response, 1000))
+
+
+class FakeDecider(object):
+    """
+    Return `count` decision tasks, then time out until stopped.
+    """
+    def __init__(self, poller, count):
+        self.poller = poller
+        self.count = count
+        self._nb_polls = multiprocessing.Value('i', 0)
+
+    @property
+    def nb_polls(self):
+        return self._nb_polls.value
+
+    def poll(self, task_list=None, identity=None):
+        if self.nb_polls >= self.count:
+            self.poller.is_alive = False
+            raise swf.exceptions.PollTimeout('timeout')
+        self._nb_polls.value += 1
+        return build_decision_response(token='token-{}'.format(self.nb_polls))
+
+
+class TestDecisionPrefetcher(unittest.TestCase):
+    def test_prefetch_is_bounded(self):
+        poller = FakePoller()
+        decider = FakeDecider(poller, 5)
+        prefetcher = DecisionPrefetcher(poller, 2, decider=decider)
+        prefetcher.start()
+
+        first, _ = prefetcher.get(timeout=5)
+        prefetcher.join(0.2)
+        # one task taken out, two waiting: the process is blocked
+        self.assertEqual(3, decider.nb_polls)
+        self.assertTrue(prefetcher.is_alive())
+
+        tokens = [first.token]
+        while len(tokens) < 5:
+            response, deadline = prefetcher.get(timeout=5)
+            tokens.append(response.token)
+            self.assertIsNotNone(deadline)
+        self.assertIsNone(prefetcher.get(timeout=5))
+        prefetcher.join(5)
+
+        self.assertEqual(['token-{}'.format(i) for i in range(1, 6)], tokens)
+        self.assertEqual(5, prefetcher.nb_polled)
+        self.assertFalse(prefetcher.is_alive())
+
+    def test_poll_errors_are_forwarded(self):
+        poller = FakePoller()
+
+        class FailingDecider(object):
+            def poll(self, task_list=None, identity=None):
+                raise ValueError('boom')
+
+        prefetcher = DecisionPrefetcher(poller, 1, decider=FailingDecider())
+        prefetcher.start()
+        error = prefetcher.get(timeout=5)
+        prefetcher.join(5)
+        self.assertIsInstance(error, ValueError)
+
+    def test_pipelined_poller(self):
+        poller = DeciderPoller(
+            [Executor(FakePoller.domain, ExampleWorkflow)],
+            FakePoller.domain,
+            FakePoller.task_list,
+            is_standalone=False,
+            prefetch_decisions=2,
+        )
+        tokens = []
+        with patch('simpleflow.swf.process.decider.base.swf.actors.Decider',
+                   lambda domain, task_list: FakeDecider(poller, 3)), \
+                patch.object(poller, 'bind_signal_handlers'), \
+                patch.object(poller, 'set_process_name'), \
+                patch.object(DeciderPoller, 'process', lambda self, response: tokens.append(response.token)):
+            poller.start()
+        self.assertEqual(['token-1', 'token-2', 'token-3'], tokens)
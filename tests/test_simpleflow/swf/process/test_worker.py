@@ -1,14 +1,32 @@
 from collections import namedtuple
 from mock import patch
+import logging
+import multiprocessing
+import os
+import threading
+import time
 import unittest
 
 from moto import mock_swf
 
-from simpleflow.swf.process.worker.base import ActivityWorker, ActivityPoller
+import swf.exceptions
+from simpleflow.swf.process.worker.base import (
+    ActivityExecutorPool,
+    ActivityPoller,
+    ActivitySlots,
+    ActivityWorker,
+    HeartbeatSchedule,
+    HeartbeatService,
+    RunningTask,
+)
+from simpleflow.swf.process.worker import progress
+from simpleflow.swf.process.worker.progress import ProgressChannel
 from swf.models import Domain, ActivityTask
+from swf.responses import Response
 
 
 FakeActivityType = namedtuple("FakeActivityType", ["name"])
+FakeTask = namedtuple("FakeTask", ["activity_id", "activity_type"])
 
 
 @mock_swf
@@ -32,5 +50,468 @@ class TestActivityWorker(unittest.TestCase):
         self.assertIn("No module named ", mock.call_args[1]["reason"])
 
 
+class FakePoller(object):
+    domain = Domain("test-domain")
+    task_list = "task-list"
+    nb_retries = 0
+    is_alive = True
+
+
+def build_response(token):
+    raw_response = {
+        'taskToken': token,
+        'activityId': 'activity-{}'.format(token),
+        'activityType': {'name': 'activity', 'version': 'example'},
+        'workflowExecution': {'workflowId': 'workflow-id', 'runId': 'run-id'},
+        'startedEventId': 1,
+        'input': '{}',
+    }
+    return Response(
+        task_token=token,
+        activity_task=FakeTask(raw_response['activityId'], FakeActivityType('activity')),
+        raw_response=raw_response,
+    )
+
+
+class FakeActor(object):
+    """
+    Record the heartbeats and failures sent by ActivitySlots.
+    """
+    def __init__(self):
+        self.heartbeats = []
+        self.details = []
+        self.failures = []
+        self.lock = threading.Lock()
+
+    def heartbeat(self, token, details=None):
+        with self.lock:
+            self.heartbeats.append(token)
+            self.details.append((token, details))
+        if token == 'cancel':
+            return {'cancelRequested': True}
+        return {}
+
+    def fail(self, token, reason=None, details=None):
+        with self.lock:
+            self.failures.append((token, reason))
+
+
+class FakeWorker(object):
+    pid = None
+
+    def __init__(self):
+        self.terminated = threading.Event()
+
+    def terminate(self):
+        self.terminated.set()
+
+
+class TimedActor(FakeActor):
+    """
+    Record the heartbeat times; the first `nb_throttled` ones are throttled.
+    """
+    def __init__(self, nb_throttled=0):
+        super(TimedActor, self).__init__()
+        self.nb_throttled = nb_throttled
+        self.times = []
+
+    def heartbeat(self, token, details=None):
+        with self.lock:
+            self.times.append(time.time())
+            if len(self.times) <= self.nb_throttled:
+                raise swf.exceptions.RateLimitExceededError('Rate exceeded')
+        return super(TimedActor, self).heartbeat(token, details)
+
+
+class SlowActor(FakeActor):
+    """
+    Heartbeats block until `done` is set.
+    """
+    def __init__(self):
+        super(SlowActor, self).__init__()
+        self.sending = threading.Event()
+        self.done = threading.Event()
+
+    def heartbeat(self, token, details=None):
+        self.sending.set()
+        self.done.wait(10)
+        return super(SlowActor, self).heartbeat(token, details)
+
+
+class TestHeartbeatService(unittest.TestCase):
+    def make_service(self, actor):
+        service = HeartbeatService(FakePoller(), actor=actor)
+        service.start()
+        self.addCleanup(service.join, 5)
+        self.addCleanup(service.stop)
+        return service
+
+    def add(self, service, token, interval):
+        running = RunningTask(token, FakeTask(token, FakeActivityType('activity')), FakeWorker(), interval)
+        service.add(running)
+        return running
+
+    def test_cancel_terminates_the_task(self):
+        actor = FakeActor()
+        service = self.make_service(actor)
+        running = self.add(service, 'cancel', 0.05)
+
+        self.assertTrue(running.worker.terminated.wait(5))
+        service.remove(running)
+        self.assertTrue(running.stopped)
+        time.sleep(0.2)
+        self.assertEqual(['cancel'], actor.heartbeats)
+
+    def test_heartbeats_are_spread(self):
+        actor = TimedActor()
+        service = self.make_service(actor)
+        start = time.time()
+        tasks = [self.add(service, 'token-{}'.format(i), 1) for i in range(20)]
+        time.sleep(1.1)
+        for running in tasks:
+            service.remove(running)
+
+        first_times = actor.times[:20]
+        self.assertEqual(20, len(set(actor.heartbeats[:20])))
+        self.assertTrue(all(start <= t <= start + 1.05 for t in first_times))
+        self.assertGreater(max(first_times) - min(first_times), 0.3)
+
+    def test_throttling_pauses_all_heartbeats(self):
+        actor = TimedActor(nb_throttled=1)
+        service = self.make_service(actor)
+        service.min_backoff = 0.3
+        for i in range(3):
+            self.add(service, 'token-{}'.format(i), 0.05)
+        time.sleep(0.6)
+
+        throttled_at = actor.times[0]
+        self.assertGreater(len(actor.heartbeats), 3)
+        self.assertTrue(all(t >= throttled_at + 0.3 for t in actor.times[1:]))
+        self.assertEqual(0, service._backoff)
+
+
+class TestActivitySlots(unittest.TestCase):
+    def setUp(self):
+        self.poller = FakePoller()
+        self.actor = FakeActor()
+        self.started = multiprocessing.Queue()
+        self.go = multiprocessing.Event()
+        started, go = self.started, self.go
+
+        def fake_process_task(poller, token, task, progress_channel=None):
+            progress_channel.write('started {}'.format(token))
+            started.put((token, os.getpid()))
+            if token == 'cancel':
+                # don't get killed while holding the lock of the shared event
+                time.sleep(10)
+            go.wait(10)
+            if token == 'crash':
+                os._exit(3)
+
+        patcher = patch('simpleflow.swf.process.worker.base.process_task', fake_process_task)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_slots(self, nb_slots, heartbeat=None):
+        slots = ActivitySlots(self.poller, nb_slots, heartbeat, worker=self.actor)
+        slots.tick = 0.02
+        slots.start()
+        self.addCleanup(slots.join, 10)
+        self.addCleanup(slots.stop)
+        self.addCleanup(self.go.set)
+        return slots
+
+    def launch(self, slots, token):
+        self.assertTrue(slots.acquire())
+        slots.launch(build_response(token))
+
+    def test_tasks_run_concurrently(self):
+        slots = self.make_slots(3)
+        for i in range(3):
+            self.launch(slots, 'token-{}'.format(i))
+
+        # all the tasks started while none of them ended
+        started = [self.started.get(timeout=5) for _ in range(3)]
+        self.assertEqual(3, len(set(pid for _, pid in started)))
+        self.assertEqual(3, slots.nb_running)
+
+        # no free slot: the poller can't take another task
+        self.poller.is_alive = False
+        self.assertFalse(slots.acquire())
+        self.poller.is_alive = True
+
+        self.go.set()
+        self.assertTrue(slots.acquire())
+        slots.stop()
+        slots.join(10)
+        self.assertFalse(slots.is_alive())
+        self.assertEqual(0, slots.nb_running)
+        self.assertEqual([], self.actor.failures)
+
+    def test_heartbeats_and_failures(self):
+        slots = self.make_slots(3, heartbeat=0.05)
+        for token in ('ok', 'crash', 'cancel'):
+            self.launch(slots, token)
+        for _ in range(3):
+            self.started.get(timeout=5)
+        time.sleep(0.3)
+        self.go.set()
+        slots.stop()
+        slots.join(10)
+
+        self.assertFalse(slots.is_alive())
+        self.assertIn('ok', self.actor.heartbeats)
+        self.assertIn('crash', self.actor.heartbeats)
+        self.assertIn(('ok', 'started ok'), self.actor.details)
+        # cancelled: heartbeats stopped and the process was terminated
+        self.assertEqual(1, self.actor.heartbeats.count('cancel'))
+        self.assertEqual(1, len(self.actor.failures))
+        token, reason = self.actor.failures[0]
+        self.assertEqual('crash', token)
+        self.assertIn('exit code 3', reason)
+
+    def test_tasks_dont_share_the_poller_connection(self):
+        self.poller = ActivityPoller(Domain("test-domain"), "task-list", heartbeat=0, nb_slots=2)
+        connection = self.poller.connection
+        connections = multiprocessing.Queue()
+
+        def process_task(poller, token, task, progress_channel=None):
+            connections.put((poller.connection is connection, poller.connection._pool is connection._pool))
+
+        slots = self.make_slots(2)
+        with patch('simpleflow.swf.process.worker.base.process_task', process_task):
+            self.launch(slots, 'token')
+            self.assertEqual((False, False), connections.get(timeout=5))
+        self.assertIs(connection, self.poller.connection)
+
+    def test_slow_heartbeats_dont_delay_launches(self):
+        actor = SlowActor()
+        self.actor = actor
+        slots = self.make_slots(2, heartbeat=0.01)
+        self.addCleanup(actor.done.set)
+        self.launch(slots, 'token-0')
+        self.assertTrue(actor.sending.wait(5))
+
+        start = time.time()
+        self.launch(slots, 'token-1')
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(
+            ['token-0', 'token-1'],
+            sorted(self.started.get(timeout=5)[0] for _ in range(2)))
+
+    @mock_swf
+    def test_poller_with_slots(self):
+        poller = ActivityPoller(Domain("test-domain"), "task-list", heartbeat=0, nb_slots=2)
+        tokens = ['token-0', 'token-1', 'token-2']
+        polled = []
+
+        def poll_with_retry():
+            polled.append(self.go.is_set())
+            if not tokens:
+                poller.is_alive = False
+                raise swf.exceptions.PollTimeout('timeout')
+            return build_response(tokens.pop(0))
+
+        timer = threading.Timer(0.5, self.go.set)
+        timer.start()
+        with patch.object(poller, 'poll_with_retry', poll_with_retry), \
+                patch.object(poller, 'bind_signal_handlers'):
+            poller.start()
+
+        self.assertEqual(
+            ['token-0', 'token-1', 'token-2'],
+            sorted(self.started.get(timeout=5)[0] for _ in range(3)))
+        # the third task waited for a free slot
+        self.assertEqual([False, False, True], polled[:3])
+        self.assertFalse(poller._slots.is_alive())
+
+
+class TestActivityExecutorPool(unittest.TestCase):
+    def setUp(self):
+        self.queue = multiprocessing.Queue()
+        queue = self.queue
+
+        def fake_process_task(poller, token, task, progress_channel=None):
+            queue.put((token, task.activity_id, os.getpid()))
+            if token == 'crash':
+                # flush the queue before dying
+                queue.close()
+                queue.join_thread()
+                os._exit(3)
+
+        patcher = patch('simpleflow.swf.process.worker.base.process_task', fake_process_task)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_tasks(self, pool, tokens):
+        results = []
+        try:
+            for token in tokens:
+                executor = pool.submit(build_response(token))
+                executor.join(5)
+                self.assertFalse(executor.is_alive())
+                results.append((executor.exitcode, self.queue.get(timeout=5)))
+        finally:
+            pool.stop()
+        return results
+
+    def test_forks_wait_for_the_log_calls(self):
+        handler = logging.Handler()
+        logging.getLogger('simpleflow.test').addHandler(handler)
+        self.addCleanup(logging.getLogger('simpleflow.test').removeHandler, handler)
+        slots = ActivitySlots(FakePoller(), 1, None, worker=FakeActor())
+        self.assertTrue(slots.acquire())
+
+        # another thread is logging: no fork meanwhile
+        handler.acquire()
+        launcher = threading.Thread(target=slots.launch, args=(build_response('token-0'),))
+        launcher.start()
+        time.sleep(0.2)
+        self.assertTrue(launcher.is_alive())
+        self.assertTrue(self.queue.empty())
+
+        handler.release()
+        launcher.join(5)
+        self.assertFalse(launcher.is_alive())
+        self.assertEqual('token-0', self.queue.get(timeout=5)[0])
+        slots._tasks[0].worker.join(5)
+
+    def test_executors_are_reused(self):
+        pool = ActivityExecutorPool(FakePoller(), 1)
+        results = self.run_tasks(pool, ['token-0', 'token-1', 'token-2'])
+
+        self.assertEqual([0, 0, 0], [exitcode for exitcode, _ in results])
+        self.assertEqual(
+            ['activity-token-0', 'activity-token-1', 'activity-token-2'],
+            [activity_id for _, (_, activity_id, _) in results])
+        pids = set(pid for _, (_, _, pid) in results)
+        self.assertEqual(1, len(pids))
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_executors_are_recycled(self):
+        pool = ActivityExecutorPool(FakePoller(), 1, max_tasks=2)
+        results = self.run_tasks(pool, ['token-0', 'token-1', 'crash', 'token-3'])
+
+        self.assertEqual([0, 0, 3, 0], [exitcode for exitcode, _ in results])
+        pids = [pid for _, (_, _, pid) in results]
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+        # the executor died during the task: replaced by a new one
+        self.assertNotEqual(pids[2], pids[3])
+
+    def test_slots_use_the_pool(self):
+        poller = FakePoller()
+        pool = ActivityExecutorPool(poller, 2)
+        slots = ActivitySlots(poller, 2, None, worker=FakeActor(), executor_pool=pool)
+        slots.tick = 0.02
+        slots.start()
+        try:
+            for i in range(4):
+                self.assertTrue(slots.acquire())
+                slots.launch(build_response('token-{}'.format(i)))
+        finally:
+            slots.stop()
+            slots.join(10)
+            pool.stop()
+
+        results = [self.queue.get(timeout=5) for _ in range(4)]
+        self.assertEqual(4, len(set(token for token, _, _ in results)))
+        self.assertEqual(2, len(set(pid for _, _, pid in results)))
+
+    def test_poller_with_warm_executors(self):
+        poller = ActivityPoller(Domain("test-domain"), "task-list", heartbeat=0, warm_executors=True)
+        tokens = ['token-0', 'token-1', 'token-2']
+
+        def poll_with_retry():
+            if not tokens:
+                poller.is_alive = False
+                raise swf.exceptions.PollTimeout('timeout')
+            return build_response(tokens.pop(0))
+
+        with patch.object(poller, 'poll_with_retry', poll_with_retry), \
+                patch.object(poller, 'bind_signal_handlers'):
+            poller.start()
+
+        results = [self.queue.get(timeout=5) for _ in range(3)]
+        self.assertEqual(['token-0', 'token-1', 'token-2'], [token for token, _, _ in results])
+        self.assertEqual(1, len(set(pid for _, _, pid in results)))
+        self.assertEqual([], poller.executor_pool.pids)
+
+
+class TestProgressChannel(unittest.TestCase):
+    def test_latest_details_are_read(self):
+        channel = ProgressChannel()
+        self.assertIsNone(channel.read())
+        channel.write('one')
+        channel.write('two')
+        self.assertEqual('two', channel.read())
+        self.assertEqual('two', channel.read())
+
+        channel.clear()
+        self.assertIsNone(channel.read())
+        with self.assertRaises(ValueError):
+            channel.write('x' * 3000)
+
+    def test_report_progress_from_the_task_process(self):
+        channel = ProgressChannel()
+
+        def report():
+            progress.channel = channel
+            progress.report_progress({'done': 42})
+
+        process = multiprocessing.Process(target=report)
+        process.start()
+        process.join(5)
+        self.assertEqual('{"done":42}', channel.read())
+        # no-op outside of a worker
+        progress.report_progress('ignored')
+
+
+class FakeActivityTypeModel(object):
+    def __init__(self, task_heartbeat_timeout):
+        self.task_heartbeat_timeout = task_heartbeat_timeout
+
+
+class TestHeartbeatSchedule(unittest.TestCase):
+    def make_task(self, name):
+        activity_type = namedtuple('ActivityType', ['name', 'version'])(name, 'example')
+        return FakeTask('activity-id', activity_type)
+
+    def test_fixed_interval(self):
+        self.assertEqual(60, HeartbeatSchedule(FakePoller.domain, 60).get_interval(self.make_task('a')))
+        self.assertIsNone(HeartbeatSchedule(FakePoller.domain, None, 0.5).get_interval(self.make_task('a')))
+
+    def test_interval_from_heartbeat_timeout(self):
+        schedule = HeartbeatSchedule(FakePoller.domain, 60, fraction=0.5, jitter=0.1)
+        timeouts = {'short': '10', 'none': 'NONE'}
+
+        def get(name, version):
+            return FakeActivityTypeModel(timeouts[name])
+
+        with patch('simpleflow.swf.process.worker.base.ActivityTypeQuerySet') as queryset:
+            queryset.return_value.get.side_effect = get
+            for _ in range(3):
+                self.assertTrue(4.5 <= schedule.get_interval(self.make_task('short')) <= 5.5)
+            self.assertEqual(60, schedule.get_interval(self.make_task('none')))
+            # activity types are described once
+            self.assertEqual(2, queryset.return_value.get.call_count)
+
+            queryset.return_value.get.side_effect = swf.exceptions.ResponseError('boom')
+            self.assertEqual(60, schedule.get_interval(self.make_task('unknown')))
+
+    def test_invalid_fraction(self):
+        for fraction in (0, -0.5, 1, 0.95):
+            with self.assertRaises(ValueError):
+                HeartbeatSchedule(FakePoller.domain, 60, fraction=fraction, jitter=0.1)
+        with self.assertRaises(ValueError):
+            HeartbeatSchedule(FakePoller.domain, 60, fraction=0.5, jitter=1)
+
+    def test_interval_is_capped(self):
+        schedule = HeartbeatSchedule(FakePoller.domain, 60, fraction=0.99, jitter=0)
+        with patch('simpleflow.swf.process.worker.base.ActivityTypeQuerySet') as queryset:
+            queryset.return_value.get.return_value = FakeActivityTypeModel('10')
+            self.assertEqual(9, schedule.get_interval(self.make_task('a')))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,16 +1,20 @@
+import hashlib
 import mock
 import unittest
 
 from sure import expect
 
 from simpleflow import activity, format, futures
+from simpleflow.swf import executor as swf_executor
 from simpleflow.swf.executor import Executor
+from simpleflow.utils import json_dumps
 from swf.models.history import builder
 from swf.responses import Response
 from tests.data import (
     BaseTestWorkflow,
     DOMAIN,
     increment,
+    triple,
 )
 from tests.utils import MockSWFTestCase
 
@@ -124,6 +128,156 @@ class TestCaseNotNeedingDomain(unittest.TestCase):
         expect(details).to.be.none
 
 
+class SkippingWorkflow(BaseTestWorkflow):
+    skip_inert_replays = True
+
+    def run(self):
+        a = self.submit(increment, 3)
+        return a.result
+
+
+class TestSkipInertReplays(unittest.TestCase):
+    activity_id = 'activity-tests.data.activities.increment-1'
+
+    def build_history(self, last_state='started'):
+        history = builder.History(SkippingWorkflow, input={})
+        history.add_decision_task_completed()
+        history.add_activity_task(
+            increment,
+            decision_id=history.last_id,
+            last_state=last_state,
+            activity_id=self.activity_id,
+            result=4,
+        )
+        history.add_decision_task_scheduled()
+        history.add_decision_task_started()
+        return history
+
+    def test_skip_replay(self):
+        executor = Executor(DOMAIN, SkippingWorkflow)
+        with mock.patch.object(SkippingWorkflow, 'run') as run:
+            decisions = executor.replay(Response(history=self.build_history(), execution=None))
+        expect(decisions.decisions).to.equal([])
+        expect(run.call_count).to.equal(0)
+        expect(executor.nb_skipped_replays).to.equal(1)
+        expect(executor.nb_replays).to.equal(1)
+
+    def test_replay_if_not_enabled(self):
+        executor = Executor(DOMAIN, SkippingWorkflow)
+        with mock.patch.object(SkippingWorkflow, 'skip_inert_replays', False):
+            executor.replay(Response(history=self.build_history(), execution=None))
+        expect(executor.nb_skipped_replays).to.equal(0)
+
+    def test_replay_after_decision_timeout(self):
+        history = self.build_history()
+        history.add_decision_task_timed_out()
+        history.add_decision_task_scheduled()
+        history.add_decision_task_started()
+        executor = Executor(DOMAIN, SkippingWorkflow)
+        executor.replay(Response(history=history, execution=None))
+        expect(executor.nb_skipped_replays).to.equal(0)
+
+    def test_replay_on_completed_activity(self):
+        executor = Executor(DOMAIN, SkippingWorkflow)
+        decisions = executor.replay(Response(history=self.build_history('completed'), execution=None))
+        expect(executor.nb_skipped_replays).to.equal(0)
+        expect(decisions.decisions[0]['decisionType']).to.equal('CompleteWorkflowExecution')
+
+
+class IdempotentWorkflow(BaseTestWorkflow):
+    def run(self):
+        a = self.submit(triple, 3)
+        return a.result
+
+
+class FastHashWorkflow(IdempotentWorkflow):
+    task_id_hash = 'fast'
+
+
+class TestIdempotentTaskIds(unittest.TestCase):
+    md5_id = 'activity-tests.data.activities.triple-{}'.format(
+        hashlib.md5(json_dumps({'args': [3], 'kwargs': {}}).encode('utf-8')).hexdigest())
+
+    def setUp(self):
+        swf_executor._task_id_cache.clear()
+
+    def scheduled_activity_id(self, workflow, history=None):
+        if history is None:
+            history = builder.History(workflow, input={})
+        executor = Executor(DOMAIN, workflow)
+        decisions = executor.replay(Response(history=history, execution=None)).decisions
+        if not decisions:
+            return None
+        return decisions[0]['scheduleActivityTaskDecisionAttributes']['activityId']
+
+    def test_md5_by_default(self):
+        expect(self.scheduled_activity_id(IdempotentWorkflow)).to.equal(self.md5_id)
+
+    def test_fast_hash(self):
+        arguments = json_dumps({'args': [3], 'kwargs': {}}).encode('utf-8')
+        expect(self.scheduled_activity_id(FastHashWorkflow)).to.equal(
+            'activity-tests.data.activities.triple-{}'.format(swf_executor.fast_hash(arguments)))
+
+    def test_fast_hash_keeps_md5_for_running_executions(self):
+        history = builder.History(FastHashWorkflow, input={})
+        history.add_decision_task_completed()
+        history.add_activity_task(
+            triple,
+            decision_id=history.last_id,
+            last_state='scheduled',
+            activity_id=self.md5_id,
+        )
+        history.add_decision_task_scheduled()
+        history.add_decision_task_started()
+        expect(self.scheduled_activity_id(FastHashWorkflow, history)).to.be.none
+
+    def test_task_ids_are_memoized(self):
+        with mock.patch.object(swf_executor, 'hash_task_arguments',
+                               wraps=swf_executor.hash_task_arguments) as hash_task_arguments:
+            self.scheduled_activity_id(IdempotentWorkflow)
+            expect(self.scheduled_activity_id(IdempotentWorkflow)).to.equal(self.md5_id)
+        expect(hash_task_arguments.call_count).to.equal(1)
+
+
+class PrefetchingWorkflow(BaseTestWorkflow):
+    prefetch_jumbo_fields = True
+
+    def run(self):
+        futures.wait(self.submit(increment, 1))
+
+
+class TestPrefetchJumboFields(unittest.TestCase):
+    jumbo_field = 'simpleflow+s3://jumbo-bucket/abc 42'
+
+    def build_history(self):
+        history = builder.History(PrefetchingWorkflow, input={})
+        history.add_decision_task_completed()
+        history.add_activity_task(
+            increment,
+            decision_id=history.last_id,
+            activity_id='activity-tests.data.activities.increment-1',
+        )
+        history.events[-1].attributes['result'] = self.jumbo_field
+        history.add_decision_task_scheduled()
+        history.add_decision_task_started()
+        return history
+
+    def test_prefetch(self):
+        executor = Executor(DOMAIN, PrefetchingWorkflow)
+        with mock.patch('simpleflow.format.prefetch_jumbo_fields', return_value=1) as prefetch:
+            executor.replay(Response(history=self.build_history(), execution=None))
+        expect(prefetch.call_count).to.equal(1)
+        expect(prefetch.call_args[0][0]).to.equal([self.jumbo_field])
+        expect(prefetch.call_args[1]['max_bytes']).to.equal(PrefetchingWorkflow.prefetch_jumbo_fields_max_bytes)
+
+    def test_no_prefetch_if_not_enabled(self):
+        executor = Executor(DOMAIN, PrefetchingWorkflow)
+        with mock.patch.object(PrefetchingWorkflow, 'prefetch_jumbo_fields', False), \
+                mock.patch('simpleflow.format.prefetch_jumbo_fields') as prefetch:
+            executor.replay(Response(history=self.build_history(), execution=None))
+        expect(prefetch.call_count).to.equal(0)
+
+
 @activity.with_attributes(raises_on_failure=True)
 def print_me_n_times(s, n, raises=False):
     if raises:
@@ -0,0 +1,30 @@
+import json
+import unittest
+
+import swf.models.decision
+
+from simpleflow.swf.utils import DecisionsAndContext
+
+
+def make_decision(i):
+    decision = swf.models.decision.MarkerDecision()
+    decision.record('marker-{}'.format(i), details='x' * i)
+    return decision
+
+
+class TestDecisionsAndContext(unittest.TestCase):
+    def test_request_size_empty(self):
+        self.assertEqual(len(json.dumps([])), DecisionsAndContext().request_size())
+
+    def test_request_size_is_maintained(self):
+        decisions = [make_decision(i) for i in range(5)]
+        dac = DecisionsAndContext(decisions[:1])
+        dac.append_decision(decisions[1])
+        dac.extend_decision(decisions[2:4])
+        self.assertEqual(len(json.dumps(decisions[:4])), dac.request_size())
+
+        size = DecisionsAndContext.encoded_size(decisions[4])
+        self.assertEqual(len(json.dumps(decisions)), dac.request_size(size, 1))
+
+        dac.extend_decision(decisions[4:], size)
+        self.assertEqual(len(json.dumps(decisions)), dac.request_size())
@@ -160,6 +160,23 @@ class TestGroup(unittest.TestCase):
         ).submit(executor)
         self.assertTrue(future.finished)
 
+    def test_counters(self):
+        future = Group(
+            (to_string, "test1"),
+            (zero_division),
+            (running_task, "test2"),
+            (running_task, "test3"),
+            (running_task, "test4"),
+            max_parallel=2
+        ).submit(executor)
+        self.assertEqual(4, len(future.futures))
+        self.assertEqual(2, future.nb_finished)
+        self.assertEqual(1, future.nb_failed)
+        self.assertEqual(2, future.nb_running)
+        self.assertEqual(0, future.nb_pending)
+        self.assertEqual(0, future.nb_cancelled)
+        self.assertTrue(future.running)
+
     def test_propagate_attribute(self):
         """
         Test that attribute 'raises_on_failure' is well propagated through Group.
@@ -240,6 +257,17 @@ class TestChain(unittest.TestCase):
         self.assertTrue(chain.activities[0].activity.raises_on_failure)
         self.assertTrue(chain.activities[1].activity.raises_on_failure)
 
+    def test_counters(self):
+        future = Chain(
+            (to_string, "test1"),
+            (zero_division),
+            (to_string, "test2"),
+        ).submit(executor)
+        self.assertEqual(2, len(future.futures))
+        self.assertEqual(2, future.nb_finished)
+        self.assertEqual(1, future.nb_failed)
+        self.assertTrue(future.finished)
+
     def test_raises_on_failure_doesnt_set_exception(self):
         future = Chain(
             (zero_division),
@@ -4,6 +4,7 @@ import unittest
 import random
 
 import boto
+import mock
 from moto import mock_s3
 
 from simpleflow import constants, format
@@ -125,3 +126,143 @@ class TestFormat(unittest.TestCase):
 
         for case in cases:
             self.assertEquals(case[1], format.decode(case[0], parse_json=False))
+
+
+class TestJumboFieldsMemoryCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = format.JumboFieldsMemoryCache(size_limit=10)
+        cache.set("a", "aaaa")
+        cache.set("b", "bbbb")
+        self.assertEqual("aaaa", cache.get("a"))
+
+        # "b" is the least recently used
+        cache.set("c", "cccc")
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(8, cache.size)
+        self.assertEqual(1, cache.evictions)
+
+    def test_counters(self):
+        cache = format.JumboFieldsMemoryCache(size_limit=10)
+        cache.set("a", "aaaa")
+        cache.get("a")
+        cache.get("b")
+        self.assertEqual(
+            {'entries': 1, 'size': 4, 'size_limit': 10, 'hits': 1, 'misses': 1, 'evictions': 0},
+            cache.stats(),
+        )
+
+    def test_oversized_content_isnt_cached(self):
+        cache = format.JumboFieldsMemoryCache(size_limit=10)
+        cache.set("a", "aaaa")
+        cache.set("b", "b" * 11)
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+
+    def test_replace(self):
+        cache = format.JumboFieldsMemoryCache(size_limit=10)
+        cache.set("a", "aaaa")
+        cache.set("a", "aa")
+        self.assertEqual(1, len(cache))
+        self.assertEqual(2, cache.size)
+
+
+class TestPrefetchJumboFields(unittest.TestCase):
+    def setUp(self):
+        self.cache = format.JumboFieldsMemoryCache(size_limit=1000)
+        patcher = mock.patch('simpleflow.format.JUMBO_FIELDS_MEMORY_CACHE', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch('simpleflow.storage.pull_content')
+    def test_prefetch(self, pull_content):
+        pull_content.side_effect = lambda bucket, path: path * 3
+        self.cache.set('cached', 'cached content')
+        fields = [
+            'simpleflow+s3://jumbo-bucket/abc 9',
+            'simpleflow+s3://jumbo-bucket/dir/def 9',
+            'simpleflow+s3://jumbo-bucket/abc 9',
+            'simpleflow+s3://jumbo-bucket/cached 14',
+        ]
+
+        self.assertEqual(2, format.prefetch_jumbo_fields(fields, max_bytes=100, max_workers=2))
+        self.assertEqual(2, pull_content.call_count)
+        self.assertEqual('abcabcabc', self.cache.get('abc'))
+        self.assertEqual('dir/defdir/defdir/def', self.cache.get('dir/def'))
+
+    @mock.patch('simpleflow.storage.pull_content')
+    def test_max_bytes(self, pull_content):
+        pull_content.return_value = 'content'
+        fields = [
+            'simpleflow+s3://jumbo-bucket/a 60',
+            'simpleflow+s3://jumbo-bucket/b 60',
+            'simpleflow+s3://jumbo-bucket/c 30',
+        ]
+        self.assertEqual(2, format.prefetch_jumbo_fields(fields, max_bytes=100, max_workers=2))
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+        self.assertIn('c', self.cache)
+
+    @mock.patch('simpleflow.storage.pull_content')
+    def test_failures_are_ignored(self, pull_content):
+        pull_content.side_effect = IOError('boom')
+        fields = ['simpleflow+s3://jumbo-bucket/a 60']
+        self.assertEqual(0, format.prefetch_jumbo_fields(fields, max_bytes=100, max_workers=2))
+        self.assertNotIn('a', self.cache)
+
+
+class TestCompressedJumboFields(unittest.TestCase):
+    def setUp(self):
+        self.cache = format.JumboFieldsMemoryCache(size_limit=100 * 1024 ** 2)
+        self.objects = {}
+        for patcher in (
+            mock.patch('simpleflow.format.JUMBO_FIELDS_MEMORY_CACHE', self.cache),
+            mock.patch('simpleflow.storage.push_content', self.push_content),
+            mock.patch('simpleflow.storage.pull_content', self.pull_content),
+            mock.patch.dict('os.environ', {'SIMPLEFLOW_JUMBO_FIELDS_BUCKET': 'jumbo-bucket'}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def push_content(self, bucket, path, content):
+        self.objects[(bucket, path)] = content
+
+    def pull_content(self, bucket, path, encoding='utf-8'):
+        content = self.objects[(bucket, path)]
+        return content.decode(encoding) if encoding and isinstance(content, bytes) else content
+
+    def round_trip(self, message):
+        encoded = format.result(message)
+        self.cache.clear()
+        return encoded, format.decode(encoded, use_proxy=False)
+
+    def test_compressed_round_trip(self):
+        message = 'A' * 64000
+        for compression in constants.JUMBO_FIELDS_COMPRESSIONS:
+            with mock.patch.dict('os.environ', {'SIMPLEFLOW_JUMBO_FIELDS_COMPRESSION': compression}):
+                encoded, decoded = self.round_trip(message)
+            self.assertTrue(encoded.startswith('simpleflow+s3+{}://jumbo-bucket/'.format(compression)))
+            self.assertEqual('64002', encoded.split()[1])
+            self.assertEqual(message, decoded)
+            self.assertLess(len(self.objects[('jumbo-bucket', encoded.split('/')[-1].split()[0])]), 1000)
+
+    def test_uncompressed_fields_still_decode(self):
+        message = 'A' * 64000
+        encoded, _ = self.round_trip(message)
+        self.assertTrue(encoded.startswith('simpleflow+s3://jumbo-bucket/'))
+        with mock.patch.dict('os.environ', {'SIMPLEFLOW_JUMBO_FIELDS_COMPRESSION': 'zlib'}):
+            self.assertEqual(message, format.decode(encoded, use_proxy=False))
+
+    def test_compression_raises_max_size(self):
+        message = 'A' * (constants.JUMBO_FIELDS_MAX_SIZE + 1)
+        with self.assertRaisesRegexp(ValueError, "Message too long even for a jumbo field"):
+            format.result(message)
+        with mock.patch.dict('os.environ', {'SIMPLEFLOW_JUMBO_FIELDS_COMPRESSION': 'zlib'}):
+            _, decoded = self.round_trip(message)
+        self.assertEqual(message, decoded)
+
+    def test_invalid_compression(self):
+        with mock.patch.dict('os.environ', {'SIMPLEFLOW_JUMBO_FIELDS_COMPRESSION': 'zip'}):
+            with self.assertRaisesRegexp(ValueError, "Invalid jumbo fields compression"):
+                format.result('A' * 64000)
@@ -0,0 +1,162 @@
+import shutil
+import tempfile
+import unittest
+
+from simpleflow.history import History, HistoryParseCache
+from swf.models.event import EventFactory
+from swf.models.history import builder
+from tests.data import (
+    BaseTestWorkflow,
+    increment,
+)
+
+
+class ExampleWorkflow(BaseTestWorkflow):
+    pass
+
+
+class TestHistoryParseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = HistoryParseCache(directory=self.directory)
+        self.key = ('workflow-id', 'run-id')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build_history(self):
+        history = builder.History(ExampleWorkflow, input={})
+        history.add_activity_task(
+            increment,
+            decision_id=history.last_id,
+            last_state='scheduled',
+            activity_id='activity-1',
+            input={'args': [1]},
+        )
+        history.add_marker('a_marker', {'foo': 'bar'})
+        return history
+
+    @staticmethod
+    def complete_history(history):
+        scheduled_id = history.events[-2].id
+        history.add_activity_task_started(scheduled_id)
+        history.add_activity_task_completed(scheduled_id, history.last_id, result=2)
+        history.add_signal('a_signal', {'x': 42})
+        history.add_decision_task()
+
+    def test_resume_from_cached_state(self):
+        swf_history = self.build_history()
+        history = History(swf_history)
+        history.parse(cache=self.cache, key=self.key)
+        last_event_id = history.last_event_id
+        self.assertEqual(len(swf_history.events), last_event_id)
+
+        self.complete_history(swf_history)
+        resumed = History(swf_history)
+        resumed.load_state(self.cache.get(self.key))
+        self.assertEqual(last_event_id, resumed.last_event_id)
+
+        resumed = History(swf_history)
+        resumed.parse(cache=self.cache, key=self.key)
+        full = History(swf_history)
+        full.parse()
+
+        self.assertEqual(full.last_event_id, resumed.last_event_id)
+        self.assertEqual(full.activities, resumed.activities)
+        self.assertEqual('completed', resumed.activities['activity-1']['state'])
+        self.assertEqual(full.markers, resumed.markers)
+        self.assertEqual(full.signals, resumed.signals)
+        self.assertEqual(full.tasks, resumed.tasks)
+        self.assertEqual(full.completed_decision_id, resumed.completed_decision_id)
+        self.assertIs(resumed.activities['activity-1'], resumed.tasks[0])
+
+    def test_full_parse_if_events_dont_match(self):
+        history = History(self.build_history())
+        history.parse(cache=self.cache, key=self.key)
+
+        other_history = builder.History(ExampleWorkflow, input={})
+        other_history.add_signal('a_signal', {'x': 42})
+        other_history.add_marker('a_marker', {'foo': 'baz'})
+        other_history.add_decision_task()
+        resumed = History(other_history)
+        resumed.parse(cache=self.cache, key=self.key)
+
+        self.assertEqual({}, resumed.activities)
+        self.assertEqual(['a_signal'], list(resumed.signals))
+        self.assertEqual(len(other_history.events), resumed.last_event_id)
+
+    def test_parse_twice_is_idempotent(self):
+        swf_history = self.build_history()
+        history = History(swf_history)
+        history.parse()
+        history.parse()
+        self.assertEqual(1, len(history.tasks))
+
+
+class TestHistoryIndexes(unittest.TestCase):
+    def test_find_recorded_marker(self):
+        swf_history = builder.History(ExampleWorkflow, input={})
+        swf_history.add_marker('a_marker', 'foo')
+        swf_history.add_marker('a_marker', 'bar')
+        swf_history.add_marker('a_marker', 'foo')
+        history = History(swf_history)
+        history.parse()
+
+        self.assertEqual(6, history.find_recorded_marker('a_marker', '"foo"')['event_id'])
+        self.assertEqual(5, history.find_recorded_marker('a_marker', '"bar"')['event_id'])
+        self.assertIsNone(history.find_recorded_marker('a_marker', '"baz"'))
+        self.assertIsNone(history.find_recorded_marker('another_marker', '"foo"'))
+
+    def add_signaled_workflow(self, swf_history, signal_name, workflow_id, run_id):
+        initiated_id = swf_history.next_id
+        swf_history.events.append(EventFactory({
+            'eventId': initiated_id,
+            'eventType': 'SignalExternalWorkflowExecutionInitiated',
+            'eventTimestamp': 0,
+            'signalExternalWorkflowExecutionInitiatedEventAttributes': {
+                'workflowId': workflow_id,
+                'signalName': signal_name,
+                'decisionTaskCompletedEventId': 0,
+            },
+        }))
+        swf_history.events.append(EventFactory({
+            'eventId': initiated_id + 1,
+            'eventType': 'ExternalWorkflowExecutionSignaled',
+            'eventTimestamp': 0,
+            'externalWorkflowExecutionSignaledEventAttributes': {
+                'initiatedEventId': initiated_id,
+                'workflowExecution': {'workflowId': workflow_id, 'runId': run_id},
+            },
+        }))
+
+    def test_find_signaled_workflow(self):
+        swf_history = builder.History(ExampleWorkflow, input={})
+        self.add_signaled_workflow(swf_history, 'a_signal', 'wf-1', 'run-1')
+        self.add_signaled_workflow(swf_history, 'a_signal', 'wf-1', 'run-2')
+        self.add_signaled_workflow(swf_history, 'a_signal', 'wf-2', 'run-3')
+        history = History(swf_history)
+        history.parse()
+
+        self.assertEqual('run-1', history.find_signaled_workflow('a_signal', 'wf-1')['run_id'])
+        self.assertEqual('run-2', history.find_signaled_workflow('a_signal', 'wf-1', 'run-2')['run_id'])
+        self.assertEqual('run-3', history.find_signaled_workflow('a_signal', 'wf-2')['run_id'])
+        self.assertIsNone(history.find_signaled_workflow('a_signal', 'wf-2', 'run-1'))
+        self.assertIsNone(history.find_signaled_workflow('another_signal', 'wf-1'))
+
+
+class TestJumboFields(unittest.TestCase):
+    def test_jumbo_fields(self):
+        swf_history = builder.History(ExampleWorkflow, input={})
+        swf_history.add_activity_task(
+            increment,
+            decision_id=swf_history.last_id,
+            activity_id='activity-1',
+            input={'args': [1]},
+        )
+        swf_history.events[-1].attributes['result'] = 'simpleflow+s3://jumbo-bucket/abc 42'
+        swf_history.add_signal('a_signal', 'simpleflow+s3://jumbo-bucket/def 42')
+
+        self.assertEqual(
+            ['simpleflow+s3://jumbo-bucket/abc 42'],
+            History(swf_history).jumbo_fields(),
+        )
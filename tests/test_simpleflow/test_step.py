@@ -1,6 +1,7 @@
 import json
 import unittest
 
+from mock import patch
 from moto import mock_swf, mock_s3
 import boto
 from simpleflow.local import Executor
@@ -12,13 +13,14 @@ from simpleflow import workflow, task, storage, futures
 from simpleflow.constants import MINUTE, HOUR
 from simpleflow.step.submittable import Step
 from simpleflow.step.workflow import WorkflowStepMixin
-from simpleflow.step.tasks import GetStepsDoneTask, MarkStepDoneTask
+from simpleflow.step.tasks import GetStepsDoneTask, MarkStepDoneTask, MarkStepsDoneTask
 from simpleflow.step.utils import (
+    StepsTrie,
     should_force_step,
     get_step_force_reasons,
     step_will_run,
 )
-from simpleflow.step.constants import UNKNOWN_CONTEXT
+from simpleflow.step.constants import STEPS_DONE_BATCH_MARKER, UNKNOWN_CONTEXT
 from .base import TestWorkflowMixin
 
 BUCKET = "perfect_day"
@@ -248,6 +250,57 @@ class StepTestCase(unittest.TestCase, TestWorkflowMixin):
             sorted(get_step_force_reasons(step_name, reasons)),
             ["MY_REASON", "MY_ROOT_REASON"])
 
+    def test_steps_trie(self):
+        step_name = "a.b.c"
+        for force_steps in (["a"], ["a.b"], ["a.b.c"], ["*"], ["x", "a.b"]):
+            self.assertTrue(should_force_step(step_name, StepsTrie(force_steps)))
+        for force_steps in ([], ["a.c"], ["a.b.cd"], ["a.b.c.d"], ["b"], ["a.b."]):
+            self.assertFalse(should_force_step(step_name, StepsTrie(force_steps)))
+
+        trie = StepsTrie()
+        trie.add("a.b", ["MY_REASON"])
+        trie.add("a", ["MY_ROOT_REASON"])
+        trie.add("*", ["ALL"])
+        trie.add("a.b.d", ["OTHER_REASON"])
+        self.assertEqual(
+            ["ALL", "MY_ROOT_REASON", "MY_REASON"],
+            get_step_force_reasons(step_name, trie))
+        self.assertTrue(step_will_run("a.b.c", [], StepsTrie(["a.b"]), ["a.b"], force=True))
+        self.assertFalse(step_will_run("a.b.c", StepsTrie(), StepsTrie(["a"]), []))
+
+    def test_forced_steps_trie(self):
+        executor = Executor(MyWorkflow)
+        executor.create_workflow()
+        workflow = executor.workflow
+        self.assertFalse(workflow.get_forced_steps_trie().matches("a"))
+
+        workflow.add_forced_steps(["a.b", "c"], "workflow_init")
+        workflow.add_forced_steps(["a"])
+        workflow.add_skipped_steps(["*"], "skip_all")
+        self.assertTrue(workflow.get_forced_steps_trie().matches("a.b.c"))
+        self.assertEqual(["workflow_init"], workflow.get_forced_steps_trie().get_reasons("a.b.c"))
+        self.assertFalse(workflow.get_forced_steps_trie().matches("b"))
+        self.assertEqual(["skip_all"], workflow.get_skipped_steps_trie().get_reasons("b"))
+
+        trie = workflow.get_forced_steps_trie()
+        self.assertIs(trie, workflow.get_forced_steps_trie())
+        workflow.add_forced_steps(["c"], "again")
+        self.assertIsNot(trie, workflow.get_forced_steps_trie())
+        self.assertEqual(["again", "workflow_init"], sorted(workflow.get_forced_steps_trie().get_reasons("c")))
+
+        workflow.steps_forced = {"b"}
+        self.assertTrue(workflow.get_forced_steps_trie().matches("b"))
+        self.assertFalse(workflow.get_forced_steps_trie().matches("a"))
+
+    def test_forced_steps_trie_follows_get_forced_steps(self):
+        class ForcingWorkflow(MyWorkflow):
+            def get_forced_steps(self):
+                return ["a"]
+
+        executor = Executor(ForcingWorkflow)
+        executor.create_workflow()
+        self.assertTrue(executor.workflow.get_forced_steps_trie().matches("a.b"))
+
     def test_step_will_run_skipped(self):
         self.assertFalse(step_will_run("a.b.c", [], ["a.b"], ["a.b"]))
         self.assertFalse(step_will_run("a.b.c", [], ["a.b"], []))
@@ -272,3 +325,185 @@ class StepTestCase(unittest.TestCase, TestWorkflowMixin):
 
         self.assertFalse(activities.activities[0].activity.raises_on_failure)
         self.assertFalse(activities.activities[1].activity.raises_on_failure)
+
+
+class ParallelStepsWorkflow(MyWorkflow):
+    def run(self, steps):
+        futures.wait(*[
+            self.submit(Step(step, task.ActivityTask(MyTask, i)))
+            for i, step in enumerate(steps)
+        ])
+
+
+class BatchedStepsWorkflow(ParallelStepsWorkflow):
+    batch_steps_done = True
+
+
+class NonIdempotentBatchedStepsWorkflow(BatchedStepsWorkflow):
+    def get_step_activity_params(self):
+        return {'idempotent': False}
+
+
+class UnwaitedStepsWorkflow(MyWorkflow):
+    batch_steps_done = True
+
+    def run(self, steps):
+        for i, step in enumerate(steps):
+            self.submit(Step(step, task.ActivityTask(MyTask, i)))
+        futures.wait(self.submit(self.wait_signal('end')))
+
+
+@patch('simpleflow.step.tasks.storage.push_content')
+@patch('simpleflow.step.tasks.storage.list_keys', return_value=[])
+class TestStepsDone(unittest.TestCase):
+    def run_workflow(self, workflow_class, steps):
+        executor = Executor(workflow_class)
+        executor.run({'args': [steps]})
+        return executor
+
+    def count_activities(self, executor, activity_class):
+        return len([
+            event for event in executor._history.events
+            if event.type == 'ActivityTask' and event.state == 'scheduled' and
+            event.activity_type['name'].endswith('.' + activity_class.__name__)
+        ])
+
+    def test_steps_done_are_listed_once(self, list_keys, push_content):
+        executor = self.run_workflow(ParallelStepsWorkflow, ['step_a', 'step_b', 'step_c'])
+
+        self.assertEqual(1, list_keys.call_count)
+        self.assertEqual(1, self.count_activities(executor, GetStepsDoneTask))
+        self.assertEqual(3, self.count_activities(executor, MarkStepDoneTask))
+
+    def test_batch_steps_done(self, list_keys, push_content):
+        # no decisions to batch steps in with the local executor
+        executor = self.run_workflow(BatchedStepsWorkflow, ['step_a', 'step_b', 'step_c'])
+
+        self.assertEqual(3, self.count_activities(executor, MarkStepsDoneTask))
+        self.assertEqual(0, self.count_activities(executor, MarkStepDoneTask))
+        self.assertEqual(
+            ['local/steps/step_a', 'local/steps/step_b', 'local/steps/step_c'],
+            [call[0][1] for call in push_content.call_args_list],
+        )
+        self.assertEqual(
+            [{'steps': ['step_a']}, {'steps': ['step_b']}, {'steps': ['step_c']}],
+            [m.details for m in executor.list_markers(all=True) if m.name == STEPS_DONE_BATCH_MARKER],
+        )
+        completed = [
+            m.details['step'] for m in executor.list_markers(all=True)
+            if m.name == 'log.step' and m.details['status'] == 'completed'
+        ]
+        self.assertEqual(['step_a', 'step_b', 'step_c'], completed)
+
+    def test_recorded_batch_is_reused(self, list_keys, push_content):
+        executor = Executor(BatchedStepsWorkflow)
+        executor.initialize_history({})
+        executor.create_workflow()
+        workflow = executor.workflow
+        workflow.submit(workflow.record_marker(STEPS_DONE_BATCH_MARKER, {'steps': ['step_a', 'step_b']}))
+
+        future = workflow.get_step_done_future('step_b')
+        self.assertTrue(future.finished)
+        self.assertEqual(
+            ['local/steps/step_a', 'local/steps/step_b'],
+            [call[0][1] for call in push_content.call_args_list],
+        )
+        batch = workflow.get_step_done_future('step_c')
+        self.assertTrue(batch.finished)
+        self.assertEqual(['step_c'], batch.step_names)
+        self.assertEqual('local/steps/step_c', push_content.call_args[0][1])
+
+
+class TestBatchStepsDoneReplay(unittest.TestCase, TestWorkflowMixin):
+    WORKFLOW = BatchedStepsWorkflow
+
+    def decide(self):
+        """
+        Replay, then record the markers and complete the activities of the
+        decisions.
+        """
+        activities = {
+            a.name: a for a in (task.Activity(GetStepsDoneTask), task.Activity(MarkStepsDoneTask), MyTask)
+        }
+        decisions = self.replay()
+        for decision in decisions:
+            if decision['decisionType'] == 'RecordMarker':
+                attributes = decision['recordMarkerDecisionAttributes']
+                self.history.add_marker(attributes['markerName'], json.loads(attributes['details']))
+            elif decision['decisionType'] == 'ScheduleActivityTask':
+                name = decision['scheduleActivityTaskDecisionAttributes']['activityType']['name']
+                self.add_activity_task_from_decision(decision, activities[name], result=[])
+        self.history.add_decision_task()
+        return decisions
+
+    def get_scheduled_activities(self, decisions):
+        return [
+            decision['scheduleActivityTaskDecisionAttributes']
+            for decision in decisions if decision['decisionType'] == 'ScheduleActivityTask'
+        ]
+
+    @mock_swf
+    def test_batch_steps_done(self):
+        self.build_history({"args": [['step_a', 'step_b']]})
+
+        scheduled = self.get_scheduled_activities(self.decide())
+        self.assertEqual([task.Activity(GetStepsDoneTask).name], [a['activityType']['name'] for a in scheduled])
+
+        self.decide()  # log.step markers
+        scheduled = self.get_scheduled_activities(self.decide())
+        self.assertEqual([MyTask.name] * 2, [a['activityType']['name'] for a in scheduled])
+
+        decisions = self.decide()
+        scheduled = self.get_scheduled_activities(decisions)
+        self.assertEqual([task.Activity(MarkStepsDoneTask).name], [a['activityType']['name'] for a in scheduled])
+        self.assertEqual(['step_a', 'step_b'], json.loads(scheduled[0]['input'])['args'][2])
+        self.assertEqual(
+            [{'steps': ['step_a', 'step_b']}],
+            [
+                json.loads(d['recordMarkerDecisionAttributes']['details']) for d in decisions
+                if d['decisionType'] == 'RecordMarker'
+            ]
+        )
+
+        decisions = self.decide()
+        self.assertEqual([], self.get_scheduled_activities(decisions))
+        self.assertEqual(
+            [('step_a', 'completed'), ('step_b', 'completed')],
+            [
+                (details['step'], details['status'])
+                for details in (
+                    json.loads(d['recordMarkerDecisionAttributes']['details']) for d in decisions
+                    if d['decisionType'] == 'RecordMarker'
+                )
+            ]
+        )
+        decisions = self.decide()
+        self.assertEqual('CompleteWorkflowExecution', decisions[0]['decisionType'])
+
+    @mock_swf
+    def test_non_idempotent_batch_is_scheduled_once(self):
+        self.WORKFLOW = NonIdempotentBatchedStepsWorkflow
+        self.build_history({"args": [['step_a', 'step_b']]})
+
+        self.decide()  # GetStepsDoneTask
+        self.decide()  # log.step markers
+        self.decide()  # MyTask's
+        scheduled = self.get_scheduled_activities(self.decide())
+        self.assertEqual([task.Activity(MarkStepsDoneTask).name], [a['activityType']['name'] for a in scheduled])
+
+        decisions = self.decide()
+        self.assertEqual([], self.get_scheduled_activities(decisions))
+        decisions = self.decide()
+        self.assertEqual('CompleteWorkflowExecution', decisions[0]['decisionType'])
+
+    @mock_swf
+    def test_unwaited_steps_are_marked_done(self):
+        self.WORKFLOW = UnwaitedStepsWorkflow
+        self.build_history({"args": [['step_a', 'step_b']]})
+
+        self.decide()  # GetStepsDoneTask
+        self.decide()  # log.step markers
+        self.decide()  # MyTask's
+        scheduled = self.get_scheduled_activities(self.decide())
+        self.assertEqual([task.Activity(MarkStepsDoneTask).name], [a['activityType']['name'] for a in scheduled])
+        self.assertEqual(['step_a', 'step_b'], json.loads(scheduled[0]['input'])['args'][2])
@@ -109,3 +109,172 @@ class TestGroup(unittest.TestCase):
         # bucket with too many "/": raise
         with self.assertRaises(ValueError):
             storage.sanitize_bucket_and_host('s3-eu-west-1.amazonaws.com/mybucket/subpath')
+
+
+class TestConnections(unittest.TestCase):
+    def setUp(self):
+        for patcher in (
+            patch.dict(storage.CONNECTIONS, clear=True),
+            patch.dict(storage.BUCKET_CACHE, clear=True),
+            patch.dict(storage.CONNECTIONS_STATS, {'created': 0, 'reused': 0, 'resets': 0}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_connections_are_reused(self):
+        conn = storage.get_connection("s3.amazonaws.com")
+        self.assertIs(conn, storage.get_connection("s3.amazonaws.com"))
+        self.assertIsNot(conn, storage.get_connection("s3-eu-west-1.amazonaws.com"))
+        self.assertEqual(
+            {'created': 2, 'reused': 1, 'resets': 0, 'connections': 2},
+            storage.get_connections_stats(),
+        )
+
+    def test_buckets_use_pooled_connections(self):
+        bucket = storage.get_bucket("s3.amazonaws.com/bucket")
+        self.assertIs(bucket, storage.get_bucket("s3.amazonaws.com/bucket"))
+        self.assertIs(bucket.connection, storage.get_connection("s3.amazonaws.com"))
+
+    def test_reset_after_fork(self):
+        conn = storage.get_connection("s3.amazonaws.com")
+        storage.get_bucket("s3.amazonaws.com/bucket")
+        with patch.object(storage, "CONNECTIONS_PID", -1):
+            self.assertIsNot(conn, storage.get_connection("s3.amazonaws.com"))
+            self.assertEqual(1, storage.get_connections_stats()["resets"])
+            self.assertEqual({}, storage.BUCKET_CACHE)
+
+
+class FakeKey(object):
+    """
+    Minimal boto Key over a FakeBucket, supporting ranged GETs.
+    """
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.position = 0
+
+    @property
+    def size(self):
+        return len(self.bucket.objects[self.name])
+
+    @property
+    def etag(self):
+        return '"{}"'.format(hash(self.bucket.objects[self.name]))
+
+    def get_contents_as_string(self, headers=None, encoding=None):
+        data = self.bucket.objects[self.name]
+        if headers and 'Range' in headers:
+            assert headers['If-Match'] == self.etag
+            start, end = headers['Range'].replace('bytes=', '').split('-')
+            data = data[int(start):int(end) + 1]
+            self.bucket.ranges.append((int(start), int(end)))
+        return data.decode(encoding) if encoding else data
+
+    def get_contents_to_filename(self, filename):
+        with open(filename, 'wb') as fp:
+            fp.write(self.bucket.objects[self.name])
+
+    def set_contents_from_filename(self, filename, headers=None):
+        with open(filename, 'rb') as fp:
+            self.bucket.objects[self.name] = fp.read()
+
+    def read(self, size):
+        data = self.bucket.objects[self.name][self.position:self.position + size]
+        self.position += len(data)
+        return data
+
+    def close(self):
+        self.position = 0
+
+
+class FakeMultiPartUpload(object):
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.parts = {}
+
+    def upload_part_from_file(self, fp, part_num, size):
+        self.parts[part_num] = fp.read(size)
+
+    def complete_upload(self):
+        self.bucket.objects[self.name] = b''.join(self.parts[num] for num in sorted(self.parts))
+        self.bucket.uploads.append(sorted(self.parts))
+
+    def cancel_upload(self):
+        self.parts = {}
+
+
+class FakeBucket(object):
+    def __init__(self):
+        self.objects = {}
+        self.ranges = []
+        self.uploads = []
+
+    def get_key(self, name):
+        return FakeKey(self, name)
+
+    def initiate_multipart_upload(self, name, headers=None):
+        return FakeMultiPartUpload(self, name)
+
+
+class TestTransfers(unittest.TestCase):
+    def setUp(self):
+        self.bucket = FakeBucket()
+        for patcher in (
+            patch.object(storage, 'get_bucket', return_value=self.bucket),
+            patch.object(storage, 'Key', FakeKey),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.src = tempfile.mktemp()
+        self.dest = tempfile.mktemp()
+        self.data = os.urandom(2500)
+        with open(self.src, 'wb') as fp:
+            fp.write(self.data)
+
+    def tearDown(self):
+        for filename in (self.src, self.dest):
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def test_multipart_upload(self):
+        with patch.object(storage, 'MIN_PART_SIZE', 1000):
+            storage.push('bucket', 'key', self.src, part_size=1000, concurrency=2)
+        self.assertEqual([[1, 2, 3]], self.bucket.uploads)
+        self.assertEqual(self.data, self.bucket.objects['key'])
+
+    def test_upload_parts_have_the_minimum_size(self):
+        with patch.object(storage, 'MIN_PART_SIZE', 2000):
+            storage.push('bucket', 'key', self.src, part_size=1000)
+        self.assertEqual([[1, 2]], self.bucket.uploads)
+        self.assertEqual(self.data, self.bucket.objects['key'])
+
+    def test_small_upload(self):
+        storage.push('bucket', 'key', self.src, part_size=3000)
+        self.assertEqual([], self.bucket.uploads)
+        self.assertEqual(self.data, self.bucket.objects['key'])
+
+    def test_ranged_download(self):
+        self.bucket.objects['key'] = self.data
+        storage.pull('bucket', 'key', self.dest, part_size=1000, concurrency=2)
+        self.assertEqual([(0, 999), (1000, 1999), (2000, 2499)], sorted(self.bucket.ranges))
+        with open(self.dest, 'rb') as fp:
+            self.assertEqual(self.data, fp.read())
+
+    def test_small_download(self):
+        self.bucket.objects['key'] = self.data
+        storage.pull('bucket', 'key', self.dest, part_size=3000)
+        self.assertEqual([], self.bucket.ranges)
+        with open(self.dest, 'rb') as fp:
+            self.assertEqual(self.data, fp.read())
+
+    def test_iter_content(self):
+        self.bucket.objects['key'] = u'h\xe9h\xe9'.encode('utf-8')
+        self.assertEqual(
+            [b'h\xc3', b'\xa9h', b'\xc3\xa9'],
+            list(storage.iter_content('bucket', 'key', chunk_size=2)),
+        )
+        self.assertEqual(
+            u'h\xe9h\xe9',
+            u''.join(storage.iter_content('bucket', 'key', chunk_size=2, encoding='utf-8')),
+        )
@@ -1,5 +1,7 @@
 import boto
+import threading
 import unittest
+from mock import Mock
 from moto import mock_swf
 
 from swf.exceptions import PollTimeout
@@ -46,3 +48,65 @@ class TestActor(unittest.TestCase):
         )
         self.assertEquals(response.execution.workflow_id, 'wfe-1234')
         self.assertIsNotNone(response.execution.run_id)
+
+    def test_poll_with_paginated_history(self):
+        events = [
+            {
+                'eventId': 1,
+                'eventType': 'WorkflowExecutionStarted',
+                'eventTimestamp': 1365177769.585,
+                'workflowExecutionStartedEventAttributes': {
+                    'taskList': {'name': 'test-task-list'},
+                    'workflowType': {'name': 'test-workflow', 'version': 'v1.2'},
+                },
+            },
+        ] + [
+            {
+                'eventId': i,
+                'eventType': 'MarkerRecorded',
+                'eventTimestamp': 1365177769.585,
+                'markerRecordedEventAttributes': {
+                    'markerName': 'marker-{}'.format(i),
+                    'decisionTaskCompletedEventId': 1,
+                },
+            }
+            for i in range(2, 8)
+        ]
+        pages = {
+            None: {'events': events[:3], 'nextPageToken': 'page-2'},
+            'page-2': {'events': events[3:5], 'nextPageToken': 'page-3'},
+            'page-3': {'events': events[5:]},
+        }
+
+        def poll_for_decision_task(domain, task_list, identity, next_page_token=None):
+            page = dict(pages[next_page_token])
+            page.update({
+                'taskToken': 'token',
+                'workflowType': {'name': 'test-workflow', 'version': 'v1.2'},
+                'workflowExecution': {'workflowId': 'wfe-1234', 'runId': 'run-id'},
+            })
+            return page
+
+        self.actor.connection = Mock()
+        self.actor.connection.poll_for_decision_task.side_effect = poll_for_decision_task
+
+        response = self.actor.poll()
+
+        self.assertEqual(list(range(1, 8)), [evt.id for evt in response.history])
+        self.assertEqual(events, response.history.raw)
+        self.assertEqual([3, 2, 2], [timing['events'] for timing in response.page_timings])
+        self.assertEqual('wfe-1234', response.execution.workflow_id)
+
+    def test_poll_with_failing_history_page(self):
+        def poll_for_decision_task(domain, task_list, identity, next_page_token=None):
+            if next_page_token:
+                return {}
+            return {'taskToken': 'token', 'events': [], 'nextPageToken': 'page-2'}
+
+        self.actor.connection = Mock()
+        self.actor.connection.poll_for_decision_task.side_effect = poll_for_decision_task
+
+        with self.assertRaises(PollTimeout):
+            self.actor.poll()
+        # the fetcher thread is done with the connection
+        self.assertEqual([], [t for t in threading.enumerate() if t.name == 'HistoryPageFetcher'])
@@ -6,7 +6,9 @@ from datetime import datetime
 
 import pytz
 
-from swf.models.event import Event
+from mock import patch
+
+from swf.models.event import Event, EventFactory, CompiledEventFactory
 from swf.models.history import History
 import swf.constants
 
@@ -35,6 +37,57 @@ class TestEvent(unittest.TestCase):
         ev = Event('WorkflowExecutionStarted', 'REGISTERED', 0, {None: {}})
         self.assertEqual(datetime(1970, 1, 1, 0, 0, tzinfo=pytz.UTC), ev.timestamp)
 
+    def make_event(self, event_type='ActivityTaskScheduled', **attributes):
+        key = event_type[0].lower() + event_type[1:] + 'EventAttributes'
+        return EventFactory({
+            'eventId': 1,
+            'eventType': event_type,
+            'eventTimestamp': 0,
+            key: attributes,
+        })
+
+    def test_attributes_from_raw_data(self):
+        ev = self.make_event(activityId='activity-1', decisionTaskCompletedEventId=4, someNewField=1)
+        self.assertEqual('activity-1', ev.activity_id)
+        self.assertEqual(4, ev.decision_task_completed_event_id)
+        self.assertEqual(1, ev.some_new_field)
+        self.assertIsNone(getattr(ev, 'control', None))
+        with self.assertRaises(AttributeError):
+            ev.control
+        self.assertFalse(hasattr(ev, '__dict__') and ev.__dict__)
+
+    def test_explicit_attributes_override_raw_data(self):
+        ev = self.make_event(activityId='activity-1')
+        ev.activity_id = 'activity-2'
+        ev.extra = 'foo'
+        self.assertEqual('activity-2', ev.activity_id)
+        self.assertEqual('foo', ev.extra)
+
+    def test_input_is_decoded_on_access(self):
+        with patch('swf.models.event.base.format.decode', return_value={'args': [1]}) as decode:
+            ev = self.make_event(input='{"args": [1]}')
+            self.assertEqual(0, decode.call_count)
+            self.assertEqual({'args': [1]}, ev.input)
+            self.assertEqual({'args': [1]}, ev.input)
+        self.assertEqual(1, decode.call_count)
+        self.assertEqual({}, self.make_event().input)
+
+    def test_name_is_per_event(self):
+        scheduled = self.make_event('ActivityTaskScheduled')
+        completed = self.make_event('ActivityTaskCompleted', result='42')
+        self.assertEqual('ActivityTaskScheduled', scheduled.name)
+        self.assertEqual('ActivityTaskCompleted', completed.name)
+        self.assertEqual('42', completed.result)
+
+    def test_compiled_event_copies_attributes(self):
+        ev = self.make_event(activityId='activity-1', input='{"args": [1]}')
+        ev.extra = 'foo'
+        compiled = CompiledEventFactory(ev)
+        self.assertEqual('activity-1', compiled.activity_id)
+        self.assertEqual({'args': [1]}, compiled.input)
+        self.assertEqual('foo', compiled.extra)
+        self.assertEqual('scheduled', compiled.state)
+
 
 class TestHistory(unittest.TestCase):
 
@@ -69,3 +122,33 @@ class TestHistory(unittest.TestCase):
     def test_get_by_invalid_index_type(self):
         with self.assertRaises(TypeError):
             dummy = self.history["invalid, bitch"]
+
+
+class TestEventFactory(unittest.TestCase):
+    def test_dispatch_table_matches_event_names(self):
+        for event_name, (event_class, state, attributes_key) in EventFactory.dispatch_table.items():
+            event_type = EventFactory._extract_event_type(event_name)
+            self.assertIs(EventFactory.events[event_type]['event'], event_class)
+            self.assertEqual(EventFactory._extract_event_state(event_type, event_name), state)
+            self.assertTrue(attributes_key.endswith('EventAttributes'))
+
+    def test_unknown_event_type_falls_back(self):
+        ev = EventFactory({
+            'eventId': 1,
+            'eventType': 'MarkerSomethingNew',
+            'eventTimestamp': 0,
+            'markerSomethingNewEventAttributes': {'markerName': 'foo'},
+        })
+        self.assertEqual('Marker', ev.type)
+        self.assertEqual('something_new', ev.state)
+        self.assertEqual('foo', ev.marker_name)
+        self.assertNotIn('MarkerSomethingNew', EventFactory.dispatch_table)
+
+    def test_from_event_list(self):
+        raw_events = mock_get_workflow_execution_history()['events']
+        events = EventFactory.from_event_list(raw_events)
+        expected = [EventFactory(raw_event) for raw_event in raw_events]
+        self.assertEqual(
+            [(e.id, e.type, e.state, e.name) for e in expected],
+            [(e.id, e.type, e.state, e.name) for e in events],
+        )